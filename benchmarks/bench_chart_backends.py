@@ -0,0 +1,54 @@
+"""Benchmark PNG versus vector chart embedding in generated reports.
+
+Usage:
+    python benchmarks/bench_chart_backends.py [--reports 30]
+
+Each backend renders the same synthetic athletes; the median generation time
+and the mean output file size are reported as JSON.
+"""
+
+import argparse
+import datetime
+import json
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from PIL import Image
+
+import nevald_report_gen.reports.FD_PDF_V1 as pdf
+from fixtures import make_athletes, make_report_inputs
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--reports", type=int, default=30)
+    args = parser.parse_args()
+
+    _, ref_data = make_report_inputs()
+    athletes = make_athletes(args.reports)
+
+    report = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        logo = Path(tmp) / "logo.png"
+        Image.new("RGB", (144, 36), "white").save(logo)
+        pdf.LOGO_PATH = str(logo)
+        for backend in pdf.CHART_BACKENDS:
+            timings, sizes = [], []
+            for i, athlete_df in enumerate(athletes):
+                out = Path(tmp) / f"{backend}_{i}.pdf"
+                start = time.perf_counter()
+                pdf.generate_athlete_pdf(f"Athlete {i}", datetime.date(2025, 1, 1), out, athlete_df,
+                                         ref_data, chart_backend=backend)
+                timings.append(time.perf_counter() - start)
+                sizes.append(out.stat().st_size)
+            report[backend] = {
+                "median_s": round(statistics.median(timings[1:] or timings), 4),
+                "mean_bytes": round(statistics.mean(sizes)),
+            }
+    print(json.dumps({"reports": args.reports, "backends": report}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""Benchmark the ForceDecks trial parser against the original pandas version.
+
+Usage:
+    python benchmarks/bench_fd_parser.py [--trials 12] [--results 500] [--repeat 20]
+
+Both parsers start from the raw JSON bytes, as returned by the API or the
+trial cache, so JSON decoding is included in each timing.
+"""
+
+import argparse
+import json
+import statistics
+import time
+
+from fixtures import make_trial_payload
+from nevald_report_gen.api.fd_parser import parse_fd_results, parse_fd_results_reference
+from nevald_report_gen.api.metric_vars import METRICS_OF_INTEREST
+
+
+def time_it(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--trials", type=int, default=12)
+    parser.add_argument("--results", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    report = {}
+    for test_type in sorted(METRICS_OF_INTEREST):
+        payload = make_trial_payload(test_type, args.trials, args.results)
+        reference = time_it(lambda: parse_fd_results_reference(json.loads(payload), test_type), args.repeat)
+        fast = time_it(lambda: parse_fd_results(payload, test_type), args.repeat)
+        report[test_type] = {
+            "payload_bytes": len(payload),
+            "reference_s": round(reference, 6),
+            "parser_s": round(fast, 6),
+            "speedup": round(reference / fast, 2),
+        }
+    print(json.dumps({"trials": args.trials, "results_per_trial": args.results, "parsers": report}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
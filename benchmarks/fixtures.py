@@ -0,0 +1,262 @@
+"""Synthetic VALD and BigQuery data for the benchmarks.
+
+Every generator is seeded, so repeated runs time identical inputs. Sizes are
+configurable to model small clubs as well as tenants with tens of thousands of
+profiles and reference tables with hundreds of thousands of tests.
+
+* :func:`make_trial_payload` - raw ``/trials`` JSON for one test, as returned
+  by the ForceDecks API (or stored in the trial cache).
+* :func:`make_session_payloads` - one payload per test type for a session.
+* :func:`make_profiles` - the frame returned by ``ValdClient.get_profiles``.
+* :func:`make_reference_tables` - full BigQuery reference tables, keyed by
+  table name, with several tests per athlete across a range of ages.
+* :func:`make_report_inputs` - ``(athlete_df, ref_data)`` produced by running
+  the synthetic session through the real parser, selectors and reference cache.
+* :func:`offline_client` - a ``ValdClient`` answering from synthetic payloads.
+"""
+
+import json
+import random
+import string
+import tempfile
+import zlib
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from nevald_report_gen.api import vald_client
+from nevald_report_gen.api.metric_vars import METRICS_OF_INTEREST
+from nevald_report_gen.config import CMJ_TABLE, HJ_TABLE, IMTP_TABLE, PPU_TABLE
+
+TEST_TYPES = ("CMJ", "HJ", "IMTP", "PPU")
+REFERENCE_TABLES = {"cmj": CMJ_TABLE, "hj": HJ_TABLE, "imtp": IMTP_TABLE, "ppu": PPU_TABLE}
+
+# Short unit names used in metric ids -> names sent by the API
+UNITS = {"N": "Newton", "Ns": "Newton Second", "N/s": "Newton Per Second", "ms": "Millisecond",
+         "W": "Watt", "W/kg": "Watt Per Kilo", "RSI_mod": "RSIModified", "lb": "Pound",
+         "cm": "Centimeter", "N/kg": "Newton Per Kilo", "": "No Unit"}
+
+# Reference columns per table, as stored in BigQuery. The first column of each
+# table is the one pull_all_ref ranks athletes by.
+REFERENCE_COLUMNS = {
+    "cmj": ["cmj_composite_score", "BODY_WEIGHT_LBS_Trial_lb", "PEAK_TAKEOFF_POWER_Trial_W",
+            "CONCENTRIC_IMPULSE_Trial_Ns", "ECCENTRIC_BRAKING_RFD_Trial_N_s",
+            "BODYMASS_RELATIVE_TAKEOFF_POWER_Trial_W_kg"],
+    "hj": ["hop_rsi_avg_best_5"],
+    "imtp": ["ISO_BM_REL_FORCE_PEAK_Trial_N_kg", "PEAK_VERTICAL_FORCE_Trial_N"],
+    "ppu": ["PEAK_CONCENTRIC_FORCE_Trial_N", "ECCENTRIC_BRAKING_RFD_Trial_N_s_"],
+}
+# Reference columns named differently from the API result they summarise
+_RESULT_ALIASES = {"HOP_RSI_AVG_BEST_5": "HOP_RSI"}
+
+
+def _result_name(metric: str) -> str:
+    """API result name a metric id or reference column is based on."""
+    name = metric.upper()
+    if name in _RESULT_ALIASES:
+        return _RESULT_ALIASES[name]
+    for limb in ("_TRIAL_", "_ASYM_", "_LEFT_", "_RIGHT_"):
+        if limb in name:
+            return name.split(limb, 1)[0]
+    return name
+
+
+def metric_scale(metric: str) -> float:
+    """Typical magnitude of a metric, shared by athlete payloads and references.
+
+    Values land between 1 and 5000 depending on the result, so percentiles and
+    z-scores computed on synthetic data fall across the whole range.
+    """
+    return 1 + zlib.crc32(_result_name(metric).encode()) % 5000
+
+
+# -- VALD -------------------------------------------------------------------------
+def make_trial_payload(test_type: str, n_trials: int = 8, n_results: int = 0, seed: int = 0) -> bytes:
+    """Return a ``/trials`` payload for ``test_type``.
+
+    Every trial carries the metrics of interest for the test type plus unused
+    results up to ``n_results`` per trial (real payloads hold several hundred).
+    """
+    rng = random.Random(seed)
+    definitions = []
+    for metric in METRICS_OF_INTEREST[test_type]:
+        for limb in ("Trial", "Asym", "Left", "Right"):
+            if f"_{limb}_" in metric:
+                result, unit = metric.split(f"_{limb}_", 1)
+                definitions.append((result, limb, UNITS.get(unit, unit), metric_scale(result)))
+                break
+    while len(definitions) < n_results:
+        i = len(definitions)
+        definitions.append((f"EXTRA_RESULT_{i}", rng.choice(["Trial", "Left", "Right", "Asym"]),
+                            rng.choice(list(UNITS.values())), rng.uniform(1, 5000)))
+    trials = []
+    for t in range(n_trials):
+        results = [
+            {
+                "resultId": rng.randrange(10**6),
+                "value": round(rng.gauss(scale, scale * 0.1), 4),
+                "time": rng.randrange(10**4),
+                "limb": limb,
+                "repeat": 0,
+                "definition": {"id": i, "result": result, "description": result.lower(),
+                               "unit": unit, "repeatable": False, "asymmetry": limb == "Asym"},
+            }
+            for i, (result, limb, unit, scale) in enumerate(definitions)
+        ]
+        trials.append({"id": f"trial-{t}", "athleteId": "a", "results": results})
+    return json.dumps(trials).encode()
+
+
+def make_session_payloads(n_trials: int = 8, n_results: int = 0, seed: int = 0) -> Dict[str, bytes]:
+    """Return one trial payload per test type, keyed by test type."""
+    return {
+        test_type: make_trial_payload(test_type, n_trials, n_results, seed + i)
+        for i, test_type in enumerate(TEST_TYPES)
+    }
+
+
+def _random_name(rng: random.Random, low: int, high: int) -> str:
+    return "".join(rng.choices(string.ascii_lowercase, k=rng.randint(low, high)))
+
+
+def make_profiles(n: int, seed: int = 0) -> pd.DataFrame:
+    """Return ``n`` profiles shaped like ``ValdClient.get_profiles``.
+
+    Names are drawn from pools of first and last names, so common fragments
+    recur across many profiles as they do in real tenants.
+    """
+    rng = random.Random(seed)
+    first = [_random_name(rng, 3, 8) for _ in range(max(n // 20, 10))]
+    last = [_random_name(rng, 4, 10) for _ in range(max(n // 10, 10))]
+    names = [f"{rng.choice(first)} {rng.choice(last)}".title() for _ in range(n)]
+    return pd.DataFrame({"fullName": names, "profileId": [f"profile-{i:06d}" for i in range(n)]})
+
+
+class _Response:
+    def __init__(self, content: bytes):
+        self.content = content
+        self.status_code = 200
+        self.headers: Dict[str, str] = {}
+
+    def json(self):
+        return json.loads(self.content)
+
+    def raise_for_status(self) -> None:
+        pass
+
+
+def offline_client(payloads: Dict[str, bytes]) -> vald_client.ValdClient:
+    """Return a ``ValdClient`` whose trial requests are answered from ``payloads``.
+
+    Test ids are the test types, so ``client.get_fd_results("CMJ", "CMJ")``
+    downloads and parses the CMJ payload. No token is fetched, the rate limit
+    is effectively off and the on-disk caches are disabled.
+    """
+    get_token = vald_client.get_vald_token
+    vald_client.get_vald_token = lambda: "benchmark"
+    try:
+        client = vald_client.ValdClient(rate_limit_per_sec=1e9, burst=10**6,
+                                        use_trial_cache=False, use_session_index=False)
+    finally:
+        vald_client.get_vald_token = get_token
+    client.session.request = lambda method, url, **kwargs: _Response(
+        payloads[url.rsplit("/tests/", 1)[1].split("/", 1)[0]])
+    return client
+
+
+# -- BIGQUERY ---------------------------------------------------------------------
+def make_reference_tables(
+    n_athletes: int = 2000,
+    tests_per_athlete: int = 3,
+    seed: int = 0,
+) -> Dict[str, pd.DataFrame]:
+    """Return full reference tables keyed by BigQuery table name.
+
+    Each athlete has ``tests_per_athlete`` rows per table at ages between 14
+    and 35.
+    """
+    rng = np.random.default_rng(seed)
+    names = [f"athlete {i:06d}" for i in range(n_athletes)]
+    n_rows = n_athletes * tests_per_athlete
+    tables = {}
+    for key, columns in REFERENCE_COLUMNS.items():
+        df = pd.DataFrame({
+            "athlete_name": np.repeat(names, tests_per_athlete),
+            "age_at_test": rng.integers(14, 36, n_rows),
+        })
+        for column in columns:
+            scale = metric_scale(column)
+            df[column] = rng.normal(scale, scale * 0.15, n_rows)
+        tables[REFERENCE_TABLES[key]] = df
+    return tables
+
+
+def query_reference_table(
+    df: pd.DataFrame,
+    columns: Optional[Sequence[str]] = None,
+    best_by: Optional[str] = None,
+    partition_by: Sequence[str] = ("athlete_name",),
+) -> pd.DataFrame:
+    """Apply the projection and best-row dedupe ``pull_ref`` asks BigQuery for."""
+    if best_by is not None:
+        df = (df.sort_values(best_by, ascending=False, na_position="last")
+                .drop_duplicates(subset=list(partition_by)))
+    if columns is not None:
+        df = df[list(dict.fromkeys(["athlete_name", "age_at_test", *([best_by] if best_by else []), *columns]))]
+    return df.reset_index(drop=True)
+
+
+def reference_cache(tables: Dict[str, pd.DataFrame], cache_dir: Optional[str] = None):
+    """Return a ``ReferenceCache`` that pulls from ``tables`` instead of BigQuery."""
+    from nevald_report_gen.data.ref_cache import ReferenceCache
+
+    cache_dir = cache_dir or tempfile.mkdtemp(prefix="bench-ref-")
+    return ReferenceCache(
+        cache_dir,
+        fetch=lambda table, min_age, max_age, **query: query_reference_table(tables[table], **query),
+    )
+
+
+# -- REPORT INPUTS ----------------------------------------------------------------
+def athlete_data(client: vald_client.ValdClient) -> pd.DataFrame:
+    """Assemble a report's athlete data the way ``get_athlete_data`` does."""
+    from nevald_report_gen.api.ind_ath_data import (
+        select_best_cmj_trial,
+        select_best_hj_trial,
+        select_best_imtp_trial,
+        select_best_ppu_trial,
+    )
+
+    results = {test_type: client.get_fd_results(test_type, test_type) for test_type in TEST_TYPES}
+    full_df = pd.concat([
+        select_best_cmj_trial(results["CMJ"]),
+        select_best_hj_trial(results["HJ"]),
+        select_best_imtp_trial(results["IMTP"]),
+        select_best_ppu_trial(results["PPU"]),
+    ], ignore_index=True)
+    full_df.iloc[1, 1] = full_df.iloc[1, 1] * 2.20462
+    return full_df
+
+
+def make_report_inputs(
+    n_reference_athletes: int = 2000,
+    n_trials: int = 8,
+    min_age: int = 18,
+    max_age: int = 22,
+    seed: int = 0,
+) -> Tuple[pd.DataFrame, Dict[str, pd.DataFrame]]:
+    """Return ``(athlete_df, ref_data)`` ready for ``generate_athlete_pdf``."""
+    from nevald_report_gen.data.pull_all import pull_all_ref
+
+    client = offline_client(make_session_payloads(n_trials, seed=seed))
+    cache = reference_cache(make_reference_tables(n_reference_athletes, seed=seed))
+    return athlete_data(client), pull_all_ref(min_age, max_age, cache=cache)
+
+
+def make_athletes(n: int, seed: int = 0) -> List[pd.DataFrame]:
+    """Return ``n`` athlete data frames with different trial values."""
+    return [
+        athlete_data(offline_client(make_session_payloads(seed=seed + 10 * i)))
+        for i in range(n)
+    ]
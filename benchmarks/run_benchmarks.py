@@ -0,0 +1,290 @@
+"""Time the report pipeline's hot paths on synthetic data and emit JSON.
+
+Usage:
+    python benchmarks/run_benchmarks.py [--size small|default|large] [--repeat 20]
+        [--only fd_results] [--output results.json]
+        [--baseline previous.json] [--tolerance 0.25]
+
+Covers trial payload parsing through ``ValdClient.get_fd_results``, the
+``select_best_*`` selectors, reference slicing, percentiles, composite scores,
+profile search, chart rendering and full ``generate_athlete_pdf`` runs. Inputs
+come from ``fixtures.py`` and never touch the network.
+
+With ``--baseline`` the median of every benchmark is compared with the same
+benchmark in an earlier JSON report; the command exits with status 1 when any
+is slower by more than ``--tolerance`` (a fraction, 0.25 = 25%).
+"""
+
+import argparse
+import datetime
+import io
+import json
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+import fixtures
+from nevald_report_gen.api import ind_ath_data
+from nevald_report_gen.api.profile_index import ProfileIndex
+from nevald_report_gen.data.pull_all import pull_all_ref
+from nevald_report_gen.data.ref_stats import ReferenceDistribution, get_distribution
+from nevald_report_gen.reports import FD_PDF_V1 as pdf
+from nevald_report_gen.reports import charts, vector_charts
+
+SIZES = {
+    "small": {"profiles": 2000, "reference_athletes": 500, "trials": 6, "results": 100,
+              "roster": 50, "repeat": 5},
+    "default": {"profiles": 20000, "reference_athletes": 5000, "trials": 8, "results": 400,
+                "roster": 500, "repeat": 20},
+    "large": {"profiles": 60000, "reference_athletes": 30000, "trials": 12, "results": 800,
+              "roster": 2000, "repeat": 20},
+}
+TEST_DATE = datetime.date(2025, 9, 8)
+SEARCH_QUERIES = ("a", "ke", "son", "mar", "ella", "an sm")
+
+
+# -- BENCHMARK CASES --------------------------------------------------------------
+# Each case is ``(name, setup)``; ``setup(env)`` returns the callable to time
+Case = Tuple[str, Callable[[dict], Callable[[], object]]]
+
+
+def _fd_results(test_type: str) -> Case:
+    def setup(env):
+        client = env["client"]
+        return lambda: client.get_fd_results(test_type, test_type)
+    return f"fd_results.{test_type}", setup
+
+
+def _select_best(test_type: str) -> Case:
+    selector = getattr(ind_ath_data, f"select_best_{test_type.lower()}_trial")
+
+    def setup(env):
+        frame = env["frames"][test_type]
+        return lambda: selector(frame)
+    return f"select_best.{test_type}", setup
+
+
+def _select_best_cmj_roster(env):
+    frames = [env["frames"]["CMJ"]] * env["size"]["roster"]
+    return lambda: ind_ath_data.select_best_cmj_trials(frames)
+
+
+def _pull_all_ref(env):
+    cache = env["cache"]
+    return lambda: pull_all_ref(18, 22, cache=cache)
+
+
+def _report_columns(env):
+    return [(env["ref_data"][table], column) for table, column, _ in _report_metrics()]
+
+
+def _report_metrics():
+    """(table, reference column, athlete metric) for every percentile on a report."""
+    metrics = [(table, column, metric) for metric, (table, column, _) in pdf.COMPOSITE_WEIGHTS.items()]
+    metrics += [("cmj", "BODYMASS_RELATIVE_TAKEOFF_POWER_Trial_W_kg", "CMJ_BODYMASS_RELATIVE_TAKEOFF_POWER_Trial_W/kg"),
+                ("ppu", "ECCENTRIC_BRAKING_RFD_Trial_N_s_", "PPU_ECCENTRIC_BRAKING_RFD_Trial_N/s")]
+    return metrics
+
+
+def _distributions_build(env):
+    columns = _report_columns(env)
+    return lambda: [ReferenceDistribution(df[column]) for df, column in columns]
+
+
+def _percentiles(env):
+    values = env["athlete_df"].set_index("metric_id")["Value"]
+    lookups = [(env["ref_data"][table], column, values[metric]) for table, column, metric in _report_metrics()]
+    return lambda: [get_distribution(df, column).percentile(value) for df, column, value in lookups]
+
+
+def _composite(env):
+    athlete_df, ref_data = env["athlete_df"], env["ref_data"]
+    return lambda: pdf.calculate_zscore_composite(athlete_df, pdf.composite_weights(ref_data))
+
+
+def _composite_roster(env):
+    weights = pdf.composite_weights(env["ref_data"])
+    ref_stats = [dist for dist, _ in weights.values()]
+    metric_weights = [weight for _, weight in weights.values()]
+    means = np.array([dist.mean for dist in ref_stats])
+    values = np.random.default_rng(0).normal(means, means * 0.2, (env["size"]["roster"], len(means)))
+    return lambda: pdf.zscore_composite_scores(values, ref_stats, metric_weights)
+
+
+def _profile_index_build(env):
+    profiles = env["profiles"]
+    return lambda: ProfileIndex(profiles)
+
+
+def _profile_search(env):
+    index = ProfileIndex(env["profiles"])
+    return lambda: [index.search(query, limit=200) for query in SEARCH_QUERIES]
+
+
+def _spider_values(env):
+    return np.random.default_rng(1).uniform(0, 100, len(pdf.SPIDER_LABELS))
+
+
+def _spider_png(env):
+    values = _spider_values(env)
+    renderer = charts.get_spider_renderer(pdf.SPIDER_LABELS)
+    return lambda: renderer.render(values)
+
+
+def _composite_png(env):
+    return lambda: charts.composite_score_chart(63.5)
+
+
+def _spider_vector(env):
+    values = _spider_values(env)
+    return lambda: vector_charts.spider_chart_drawing(values, pdf.SPIDER_LABELS, pdf.SPIDER_CHART_SIZE)
+
+
+def _composite_vector(env):
+    return lambda: vector_charts.composite_chart_drawing(63.5, pdf.COMPOSITE_CHART_SIZE)
+
+
+def _report(backend: str) -> Case:
+    def setup(env):
+        athlete_df, ref_data = env["athlete_df"], env["ref_data"]
+
+        def run():
+            pdf.generate_athlete_pdf("Bench Athlete", TEST_DATE, io.BytesIO(), athlete_df, ref_data,
+                                     chart_backend=backend)
+        return run
+    return f"report.{backend}", setup
+
+
+CASES: List[Case] = [
+    *(_fd_results(t) for t in fixtures.TEST_TYPES),
+    *(_select_best(t) for t in fixtures.TEST_TYPES),
+    ("select_best.CMJ_roster", _select_best_cmj_roster),
+    ("reference.pull_all_ref", _pull_all_ref),
+    ("percentiles.build", _distributions_build),
+    ("percentiles.lookup", _percentiles),
+    ("composite.athlete", _composite),
+    ("composite.roster", _composite_roster),
+    ("profiles.index_build", _profile_index_build),
+    ("profiles.search", _profile_search),
+    ("charts.spider_png", _spider_png),
+    ("charts.composite_png", _composite_png),
+    ("charts.spider_vector", _spider_vector),
+    ("charts.composite_vector", _composite_vector),
+    _report("png"),
+    _report("vector"),
+]
+
+
+# -- RUNNER -----------------------------------------------------------------------
+def build_env(size: dict, workdir: Path) -> dict:
+    """Generate every input once; timings never include data generation."""
+    payloads = fixtures.make_session_payloads(size["trials"], size["results"])
+    client = fixtures.offline_client(payloads)
+    cache = fixtures.reference_cache(fixtures.make_reference_tables(size["reference_athletes"]),
+                                     str(workdir / "reference"))
+    logo = workdir / "logo.png"
+    Image.new("RGB", (144, 36), "white").save(logo)
+    pdf.LOGO_PATH = str(logo)
+    return {
+        "size": size,
+        "client": client,
+        "frames": {t: client.get_fd_results(t, t) for t in fixtures.TEST_TYPES},
+        "cache": cache,
+        "ref_data": pull_all_ref(18, 22, cache=cache),
+        "athlete_df": fixtures.athlete_data(client),
+        "profiles": fixtures.make_profiles(size["profiles"]),
+    }
+
+
+def time_case(fn: Callable[[], object], repeat: int) -> Dict[str, float]:
+    """Run ``fn`` once to warm up, then ``repeat`` times; timings in seconds."""
+    fn()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return {
+        "median_s": round(statistics.median(timings), 7),
+        "min_s": round(min(timings), 7),
+        "mean_s": round(statistics.mean(timings), 7),
+        "stdev_s": round(statistics.stdev(timings), 7) if len(timings) > 1 else 0.0,
+        "runs": repeat,
+    }
+
+
+def run(size_name: str, repeat: Optional[int] = None, only: Optional[str] = None) -> dict:
+    """Run the selected benchmarks and return the JSON-ready report."""
+    size = dict(SIZES[size_name])
+    repeat = repeat or size.pop("repeat")
+    size.pop("repeat", None)
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="nevald-bench-") as tmp:
+        env = build_env(size, Path(tmp))
+        for name, setup in CASES:
+            if only and only not in name:
+                continue
+            results[name] = time_case(setup(env), repeat)
+    return {
+        "meta": {
+            "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "size": size_name,
+            "parameters": size,
+        },
+        "benchmarks": results,
+    }
+
+
+def compare(report: dict, baseline: dict, tolerance: float) -> List[dict]:
+    """Return the benchmarks whose median grew by more than ``tolerance``."""
+    regressions = []
+    for name, result in report["benchmarks"].items():
+        before = baseline.get("benchmarks", {}).get(name)
+        if not before or not before["median_s"]:
+            continue
+        ratio = result["median_s"] / before["median_s"]
+        result["baseline_median_s"] = before["median_s"]
+        result["ratio"] = round(ratio, 3)
+        if ratio > 1 + tolerance:
+            regressions.append({"name": name, "ratio": round(ratio, 3)})
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", choices=sorted(SIZES), default="default")
+    parser.add_argument("--repeat", type=int, default=None, help="Timed runs per benchmark")
+    parser.add_argument("--only", default=None, help="Run benchmarks whose name contains this text")
+    parser.add_argument("--output", type=Path, default=None, help="Write the JSON report here")
+    parser.add_argument("--baseline", type=Path, default=None, help="Earlier JSON report to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown against the baseline")
+    args = parser.parse_args(argv)
+
+    report = run(args.size, args.repeat, args.only)
+    regressions = []
+    if args.baseline is not None:
+        regressions = compare(report, json.loads(args.baseline.read_text()), args.tolerance)
+        report["regressions"] = regressions
+
+    text = json.dumps(report, indent=2)
+    if args.output is not None:
+        args.output.write_text(text + "\n")
+    print(text)
+    if regressions:
+        names = ", ".join(r["name"] for r in regressions)
+        print(f"Slower than baseline by more than {args.tolerance:.0%}: {names}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,138 @@
+"""Parsing of ForceDecks ``/trials`` payloads into a pivoted metrics frame.
+
+A trial payload holds every result VALD calculates (several hundred per
+trial), while reports only use the handful listed in ``METRICS_OF_INTEREST``.
+:func:`parse_fd_results` filters results while the JSON is being decoded and
+writes the values it keeps straight into a preallocated NumPy array, instead of
+building a DataFrame of every result and pivoting it.
+
+:func:`parse_fd_results_reference` is the original pandas implementation. It is
+kept to verify the fast parser and to benchmark against.
+"""
+
+import json
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from nevald_report_gen.api.metric_vars import METRICS_OF_INTEREST, unit_map
+
+Payload = Union[bytes, str]
+
+
+class _ResultCollector:
+    """``object_hook`` for :func:`json.loads` that collects results as they decode.
+
+    Each result object is reduced to its ``metric_id`` as soon as it is
+    decoded. Results for metrics of interest are written into ``values``
+    (metrics x occurrence) and every other result is discarded on the spot.
+    Occurrence numbers follow document order per metric, matching the
+    ``cumcount`` used to number trials in the pandas implementation.
+    """
+
+    def __init__(self, metrics: List[str]):
+        self.metrics = metrics
+        self._row_of = {m: i for i, m in enumerate(metrics)}
+        # metric_id -> [row of interest or -1, occurrences so far], plus a
+        # memo of raw (result, limb, unit) keys so each is formatted only once
+        self._by_metric: Dict[str, List[int]] = {}
+        self._keys: Dict[Tuple, List[int]] = {}
+        self.values = np.full((len(metrics), 16), np.nan)
+        # has_value[k] is True when any metric has a value at occurrence k
+        self.has_value: List[bool] = []
+        self.n_results = 0
+
+    def _state(self, definition: dict, limb) -> List[int]:
+        key = (definition.get("result", ""), limb, definition.get("unit", ""))
+        state = self._keys.get(key)
+        if state is None:
+            metric_id = f"{key[0]}_{limb}_{unit_map(key[2])}"
+            state = self._by_metric.setdefault(metric_id, [self._row_of.get(metric_id, -1), 0])
+            self._keys[key] = state
+        return state
+
+    def __call__(self, obj: dict):
+        definition = obj.get("definition")
+        if not isinstance(definition, dict) or "results" in obj:
+            return obj
+        self.n_results += 1
+        state = self._state(definition, obj.get("limb"))
+        occurrence = state[1]
+        state[1] += 1
+
+        value = obj.get("value")
+        if value is None:
+            return None
+        if occurrence >= len(self.has_value):
+            self.has_value.extend([False] * (occurrence + 1 - len(self.has_value)))
+        self.has_value[occurrence] = True
+        row = state[0]
+        if row >= 0:
+            if occurrence >= self.values.shape[1]:
+                grown = np.full((len(self.metrics), 2 * (occurrence + 1)), np.nan)
+                grown[:, : self.values.shape[1]] = self.values
+                self.values = grown
+            self.values[row, occurrence] = value
+        return None
+
+
+def parse_fd_results(payload: Payload, test_type: str) -> Optional[pd.DataFrame]:
+    """Parse a raw ``/trials`` payload into one row per metric of interest.
+
+    Returns the same frame as :func:`parse_fd_results_reference` (``metric_id``
+    followed by ``trial N`` columns, metrics sorted by name) with float values
+    and a fresh index, or ``None`` if the payload holds no results.
+    """
+    collector = _ResultCollector(METRICS_OF_INTEREST[test_type])
+    data = json.loads(payload, object_hook=collector)
+    if not data or not isinstance(data, list) or collector.n_results == 0:
+        return None
+
+    # Like pivot_table: drop trial columns with no values for any metric and
+    # metrics with no values in any trial
+    columns = [k for k, present in enumerate(collector.has_value) if present]
+    values = collector.values[:, columns] if columns else collector.values[:, :0]
+    keep = sorted(m for i, m in enumerate(collector.metrics) if not np.isnan(values[i]).all())
+    rows = [collector.metrics.index(m) for m in keep]
+
+    frame = pd.DataFrame(values[rows], columns=[f"trial {k + 1}" for k in columns])
+    frame.insert(0, "metric_id", keep)
+    return frame
+
+
+def parse_fd_results_reference(test_data_json: list, test_type: str) -> Optional[pd.DataFrame]:
+    """Original pandas implementation of :func:`parse_fd_results`."""
+    if not test_data_json or not isinstance(test_data_json, list):
+        return None
+
+    all_results = []
+    for trial in test_data_json:
+        for res in trial.get("results", []):
+            all_results.append(
+                {
+                    "value": res.get("value"),
+                    "limb": res.get("limb"),
+                    "result_key": res["definition"].get("result", ""),
+                    "unit": res["definition"].get("unit", ""),
+                }
+            )
+    if not all_results:
+        return None
+
+    df = pd.DataFrame(all_results)
+    df["unit"] = df["unit"].apply(unit_map)
+    df["metric_id"] = (
+        df["result_key"].astype(str)
+        + "_"
+        + df["limb"].astype(str)
+        + "_"
+        + df["unit"].astype(str)
+    )
+    df["trial"] = df.groupby("metric_id").cumcount() + 1
+    pivot = df.pivot_table(index="metric_id", columns="trial", values="value", aggfunc="first")
+    pivot.columns = [f"trial {c}" for c in pivot.columns]
+    pivot = pivot.reset_index()
+    pivot = pivot[pivot["metric_id"].isin(METRICS_OF_INTEREST[test_type])]
+
+    return pivot
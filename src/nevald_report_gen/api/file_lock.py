@@ -0,0 +1,71 @@
+"""Exclusive file locks shared between processes, on POSIX and Windows."""
+
+import os
+import time
+from pathlib import Path
+from typing import Optional, Union
+
+if os.name == "nt":
+    import msvcrt
+
+    def _try_lock(fd: int) -> None:
+        msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+
+    def _unlock(fd: int) -> None:
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+else:
+    import fcntl
+
+    def _try_lock(fd: int) -> None:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+    def _unlock(fd: int) -> None:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+
+
+class FileLock:
+    """Advisory lock held on ``path`` while inside a ``with`` block.
+
+    Every process (or thread) that opens a :class:`FileLock` on the same path
+    waits for the current holder to release it. The lock file itself is left
+    in place; only the lock on it matters. Acquiring raises
+    :class:`TimeoutError` after ``timeout`` seconds (``None`` waits forever).
+    """
+
+    def __init__(self, path: Union[str, Path], timeout: Optional[float] = 30.0, poll_interval: float = 0.05):
+        self.path = Path(path)
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self._fd: Optional[int] = None
+
+    def acquire(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout
+        while True:
+            try:
+                _try_lock(fd)
+                self._fd = fd
+                return
+            except OSError:
+                if deadline is not None and time.monotonic() >= deadline:
+                    os.close(fd)
+                    raise TimeoutError(f"Timed out waiting for lock on {self.path}")
+                time.sleep(self.poll_interval)
+
+    def release(self) -> None:
+        if self._fd is None:
+            return
+        fd, self._fd = self._fd, None
+        try:
+            _unlock(fd)
+        finally:
+            os.close(fd)
+
+    def __enter__(self) -> "FileLock":
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.release()
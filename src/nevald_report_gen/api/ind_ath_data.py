@@ -10,47 +10,103 @@
 # =================================================================================
 
 # -- IMPORTS ----------------------------------------------------------------------
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+import numpy as np
 import pandas as pd
 
-from typing import Optional
+from typing import Dict, List, Optional, Sequence, Tuple
 # -- IMPORTS FROM OTHER SCRIPTS ---------------------------------------------------
 
+from nevald_report_gen import spans
 from nevald_report_gen.api.vald_client import ValdClient
 from nevald_report_gen.api.VALDapiHelpers import cmj_z_score
 
+# -- BEST TRIAL SELECTION ---------------------------------------------------------
+# Metrics feeding cmj_z_score, in argument order
+CMJ_SCORE_METRICS = [
+    "CONCENTRIC_IMPULSE_Trial_Ns",
+    "ECCENTRIC_BRAKING_RFD_Trial_N/s",
+    "PEAK_CONCENTRIC_FORCE_Trial_N",
+    "BODYMASS_RELATIVE_TAKEOFF_POWER_Trial_W/kg",
+    "RSI_MODIFIED_Trial_RSI_mod",
+    "ECCENTRIC_BRAKING_IMPULSE_Trial_Ns",
+]
+
+
+def _trial_columns(df: pd.DataFrame) -> List[str]:
+    return [col for col in df.columns if col.startswith("trial")]
+
+
+def _metric_matrix(df: pd.DataFrame, metrics: Sequence[str], trial_columns: List[str]) -> np.ndarray:
+    """Return a ``(len(metrics), n_trials)`` float matrix for the given metrics.
+
+    Rows are located through a single ``metric_id`` -> position map instead of
+    a boolean mask per metric; the first row wins if a metric is repeated.
+    """
+    positions: Dict[str, int] = {}
+    for pos, metric in enumerate(df["metric_id"]):
+        positions.setdefault(metric, pos)
+    rows = [positions[m] for m in metrics]
+    return df[trial_columns].iloc[rows].to_numpy(dtype=float)
+
+
+def _best_index(scores: np.ndarray) -> np.ndarray:
+    """Index of the highest score along the last axis, ignoring missing trials."""
+    filled = np.where(np.isnan(scores), -np.inf, scores)
+    return np.argmax(filled, axis=-1)
+
+
+def _best_trial_frame(df: pd.DataFrame, trial_column: str, prefix: str) -> pd.DataFrame:
+    best_df = df[["metric_id", trial_column]].copy()
+    best_df["metric_id"] = prefix + best_df["metric_id"]
+    best_df.rename(columns={trial_column: "Value"}, inplace=True)
+    return best_df
+
+
+def _stack_metric_matrices(
+    frames: Sequence[pd.DataFrame], metrics: Sequence[str]
+) -> Tuple[np.ndarray, List[List[str]]]:
+    """Stack per-session metric matrices into one NaN-padded 3D array.
+
+    Returns an array of shape ``(n_sessions, len(metrics), max_trials)`` and
+    the trial columns of each session.
+    """
+    columns = [_trial_columns(df) for df in frames]
+    width = max((len(c) for c in columns), default=0)
+    stacked = np.full((len(frames), len(metrics), width), np.nan)
+    for i, (df, cols) in enumerate(zip(frames, columns)):
+        stacked[i, :, : len(cols)] = _metric_matrix(df, metrics, cols)
+    return stacked, columns
+
+
+def select_best_cmj_trials(frames: Sequence[pd.DataFrame]) -> List[pd.DataFrame]:
+    """Select the best CMJ trial for many sessions in one vectorised pass.
+
+    Every session's z-scores are computed together on a stacked
+    ``(sessions, metrics, trials)`` array; the result matches calling
+    :func:`select_best_cmj_trial` on each frame.
+    """
+    if not frames:
+        return []
+    stacked, columns = _stack_metric_matrices(frames, CMJ_SCORE_METRICS)
+    scores = np.round(cmj_z_score(*stacked.transpose(1, 0, 2)), 5)
+    best = _best_index(scores)
+    return [
+        _best_trial_frame(df, cols[b], "CMJ_") for df, cols, b in zip(frames, columns, best)
+    ]
+
+
 def select_best_cmj_trial(df: pd.DataFrame) -> pd.DataFrame:
     """Return CMJ metrics for the best trial based on z-score."""
-    trial_columns = [col for col in df.columns if col.startswith("trial")]
-    z_scores = []
-    for trial in trial_columns:
-        trial_score = cmj_z_score(
-            pd.to_numeric(df[df["metric_id"] == "CONCENTRIC_IMPULSE_Trial_Ns"][trial].values[0]),
-            pd.to_numeric(df[df["metric_id"] == "ECCENTRIC_BRAKING_RFD_Trial_N/s"][trial].values[0]),
-            pd.to_numeric(df[df["metric_id"] == "PEAK_CONCENTRIC_FORCE_Trial_N"][trial].values[0]),
-            pd.to_numeric(
-                df[df["metric_id"] == "BODYMASS_RELATIVE_TAKEOFF_POWER_Trial_W/kg"][trial].values[0]
-            ),
-            pd.to_numeric(df[df["metric_id"] == "RSI_MODIFIED_Trial_RSI_mod"][trial].values[0]),
-            pd.to_numeric(df[df["metric_id"] == "ECCENTRIC_BRAKING_IMPULSE_Trial_Ns"][trial].values[0]),
-        )
-        z_scores.append(round(float(trial_score), 5))
-    best_trial = z_scores.index(max(z_scores)) + 1
-    best_df = df[["metric_id", f"trial {best_trial}"]].copy()
-    best_df["metric_id"] = "CMJ_" + best_df["metric_id"]
-    best_df.rename(columns={f"trial {best_trial}": "Value"}, inplace=True)
-    return best_df
+    return select_best_cmj_trials([df])[0]
 
 
 def select_best_hj_trial(df: pd.DataFrame) -> pd.DataFrame:
     """Return a dataframe with averaged RSI values for HJ."""
-    trial_columns = [col for col in df.columns if col.startswith("trial")]
-    rsi_values = [
-        round(float(df[df["metric_id"] == "HOP_RSI_Trial_"][trial].values[0]), 5)
-        for trial in trial_columns
-    ]
-    rsi_values.sort(reverse=True)
-    average_rsi = sum(rsi_values[1:6]) / 5
+    rsi_values = np.round(_metric_matrix(df, ["HOP_RSI_Trial_"], _trial_columns(df))[0], 5)
+    rsi_values = np.sort(rsi_values)[::-1]
+    average_rsi = sum(rsi_values[1:6].tolist()) / 5
     return pd.DataFrame([
         {"metric_id": "HJ_AVJ_RSI_Trial_", "Value": average_rsi}
     ])
@@ -58,87 +114,102 @@ def select_best_hj_trial(df: pd.DataFrame) -> pd.DataFrame:
 
 def select_best_imtp_trial(df: pd.DataFrame) -> pd.DataFrame:
     """Return IMTP metrics for the trial with highest peak vertical force."""
-    trial_columns = [col for col in df.columns if col.startswith("trial")]
-    peak_values = [
-        round(float(df[df["metric_id"] == "PEAK_VERTICAL_FORCE_Trial_N"][trial].values[0]), 5)
-        for trial in trial_columns
-    ]
-    best_trial = peak_values.index(max(peak_values)) + 1
-    rel_value = round(
-        float(
-            df[df["metric_id"] == "ISO_BM_REL_FORCE_PEAK_Trial_N/kg"][f"trial {best_trial}"].values[0]
+    matrix = np.round(
+        _metric_matrix(
+            df,
+            ["PEAK_VERTICAL_FORCE_Trial_N", "ISO_BM_REL_FORCE_PEAK_Trial_N/kg"],
+            _trial_columns(df),
         ),
         5,
     )
+    best = int(_best_index(matrix[0]))
     rows = [
-        {"metric_id": "IMTP_PEAK_VERTICAL_FORCE_Trial_N", "Value": peak_values[best_trial - 1]},
-        {"metric_id": "IMTP_ISO_BM_REL_FORCE_PEAK_Trial_N/kg", "Value": rel_value},
+        {"metric_id": "IMTP_PEAK_VERTICAL_FORCE_Trial_N", "Value": float(matrix[0, best])},
+        {"metric_id": "IMTP_ISO_BM_REL_FORCE_PEAK_Trial_N/kg", "Value": float(matrix[1, best])},
     ]
     return pd.DataFrame(rows)
 
 
 def select_best_ppu_trial(df: pd.DataFrame) -> pd.DataFrame:
     """Return PPU metrics for the trial with highest peak concentric force."""
-    trial_columns = [col for col in df.columns if col.startswith("trial")]
-    peak_values = [
-        round(float(df[df["metric_id"] == "PEAK_CONCENTRIC_FORCE_Trial_N"][trial].values[0]), 5)
-        for trial in trial_columns
-    ]
-    best_trial = peak_values.index(max(peak_values)) + 1
-    best_df = df[["metric_id", f"trial {best_trial}"]].copy()
-    best_df.rename(columns={f"trial {best_trial}": "Value"}, inplace=True)
-    best_df["metric_id"] = "PPU_" + best_df["metric_id"]
-    return best_df
+    trial_columns = _trial_columns(df)
+    peak_values = np.round(_metric_matrix(df, ["PEAK_CONCENTRIC_FORCE_Trial_N"], trial_columns)[0], 5)
+    best = int(_best_index(peak_values))
+    return _best_trial_frame(df, trial_columns[best], "PPU_")
 
 
 # -- FUNCTIONS --------------------------------------------------------------------
+# Tests in a complete session, downloaded in parallel
+SESSION_TESTS = 4
+
+
+def fetch_session_results(
+    client: ValdClient,
+    test_sessions: pd.DataFrame,
+    max_workers: int = SESSION_TESTS,
+) -> Dict[str, pd.DataFrame]:
+    """Fetch trial data for every test in ``test_sessions`` concurrently.
+
+    Requests are issued from a small thread pool and paced by the client's
+    shared rate limiter. Results are keyed by test type; if a type appears more
+    than once the last test wins, as with a sequential loop.
+    """
+    tests = list(zip(test_sessions["testType"], test_sessions["testId"]))
+    if not tests:
+        return {}
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(tests))) as pool:
+        calls = [spans.bind(client.get_fd_results, test_id, test_type) for test_type, test_id in tests]
+        frames = list(pool.map(lambda call: call(), calls))
+
+    results = {}
+    for (test_type, _), df in zip(tests, frames):
+        if df is not None:
+            results[test_type] = df
+    return results
+
+
 def get_athlete_data(
     athlete_name: str,
     test_date: datetime,
     client: Optional[ValdClient] = None,
 ):
     """Pull athlete data for the specified test date and return it as a DataFrame."""
-    athlete_name = athlete_name.lower().strip()
-    if client is None:
-        client = ValdClient()
-
-    # Step 1 & 2: Get profiles and map athlete name to ID
-    profiles = client.get_profiles()
-    if profiles.empty:
-        print("No profiles found. Try again. Exiting.")
-        return None
-    profiles["fullName"] = profiles["fullName"].str.lower().str.strip()
-    athlete_row = profiles[profiles["fullName"] == athlete_name]
-    if athlete_row.empty:
-        print("Athlete not found. Check name spelling and spaces. Exiting.")
-        return None
-    profile_id = athlete_row.iloc[0]["profileId"]
-
-    # Step 3: Fetch all test sessions for the athlete
-    first_vald_date = datetime(2020, 1, 1, 0, 0, 0)
-    test_sessions = client.get_tests_by_profile(first_vald_date, profile_id)
-    if test_sessions is None:
-        print("No test sessions found for athlete.")
-        return None
-    test_sessions = test_sessions[test_sessions["modifiedDateUtc"] == test_date]
-    if test_sessions.empty:
-        print("No test sessions found for the given date. Try again.")
-        return None
-
-    # Step 4: Fetch test session data (gives all 4 tests and all trials)
-    test_IDandType_list = list(zip(test_sessions["testType"], test_sessions["testId"]))
-    results = {}
-    for testType, testID in test_IDandType_list:
-        df = client.get_fd_results(testID, testType)
-        if df is not None:
-            results[testType] = df
-
-    # Step 5: Select best trials and merge data
-    _cmj_df = select_best_cmj_trial(results["CMJ"])
-    _hj_df = select_best_hj_trial(results["HJ"])
-    _imtp_df = select_best_imtp_trial(results["IMTP"])
-    _ppu_df = select_best_ppu_trial(results["PPU"])
-
-    full_df = pd.concat([_cmj_df, _hj_df, _imtp_df, _ppu_df], ignore_index=True)
-    full_df.iloc[1, 1] = full_df.iloc[1, 1] * 2.20462
-    return full_df
+    with spans.span("athlete_data"):
+        athlete_name = athlete_name.lower().strip()
+        if client is None:
+            client = ValdClient()
+
+        # Step 1 & 2: Get profiles and map athlete name to ID
+        profiles = client.get_profile_index()
+        if not len(profiles):
+            print("No profiles found. Try again. Exiting.")
+            return None
+        profile_id = profiles.lookup(athlete_name)
+        if profile_id is None:
+            print("Athlete not found. Check name spelling and spaces. Exiting.")
+            return None
+
+        # Step 3: Fetch all test sessions for the athlete
+        first_vald_date = datetime(2020, 1, 1, 0, 0, 0)
+        test_sessions = client.get_tests_by_profile(first_vald_date, profile_id)
+        if test_sessions is None:
+            print("No test sessions found for athlete.")
+            return None
+        test_sessions = test_sessions[test_sessions["modifiedDateUtc"] == test_date]
+        if test_sessions.empty:
+            print("No test sessions found for the given date. Try again.")
+            return None
+
+        # Step 4: Fetch test session data (gives all 4 tests and all trials)
+        results = fetch_session_results(client, test_sessions)
+
+        # Step 5: Select best trials and merge data
+        with spans.span("select_best"):
+            _cmj_df = select_best_cmj_trial(results["CMJ"])
+            _hj_df = select_best_hj_trial(results["HJ"])
+            _imtp_df = select_best_imtp_trial(results["IMTP"])
+            _ppu_df = select_best_ppu_trial(results["PPU"])
+
+        full_df = pd.concat([_cmj_df, _hj_df, _imtp_df, _ppu_df], ignore_index=True)
+        full_df.iloc[1, 1] = full_df.iloc[1, 1] * 2.20462
+        return full_df
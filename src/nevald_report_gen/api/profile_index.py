@@ -0,0 +1,103 @@
+"""In-memory search index over the tenant's VALD profiles.
+
+Type-ahead search used to run ``str.contains`` over the whole profile frame on
+every keystroke, and every report looked its athlete up by lowercasing and
+scanning the same frame. :class:`ProfileIndex` is built once from
+:meth:`ValdClient.get_profiles` and answers both from precomputed structures:
+
+* exact name lookups through a normalised name -> profile ID map;
+* substring search through an n-gram index. Every 1-, 2- and 3-character
+  substring of a name maps to the sorted positions of the names containing
+  it, so a query of up to three characters is a single posting list and a
+  longer one intersects its trigram lists before confirming the few
+  remaining candidates.
+
+Results keep the order of the profile list, as the frame-based search did.
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Longest substring indexed directly
+NGRAM = 3
+
+_EMPTY = np.empty(0, dtype=np.int32)
+
+
+def normalize_name(name: str) -> str:
+    """Lowercase ``name`` and collapse runs of whitespace to single spaces."""
+    return " ".join(str(name).lower().split())
+
+
+class ProfileIndex:
+    """Exact and type-ahead lookups over a profile list.
+
+    ``profiles`` is the frame returned by :meth:`ValdClient.get_profiles`
+    (``fullName`` and ``profileId`` columns). Names are matched without regard
+    to case or repeated whitespace. When several profiles share a name,
+    :meth:`lookup` returns the first, like a scan of the frame would.
+    """
+
+    def __init__(self, profiles: pd.DataFrame):
+        self.profiles = profiles
+        if profiles is None or profiles.empty:
+            self.names: List[str] = []
+            self.profile_ids: List[str] = []
+        else:
+            self.names = profiles["fullName"].tolist()
+            self.profile_ids = profiles["profileId"].tolist()
+        self._normalized = [normalize_name(name) for name in self.names]
+
+        self._by_name: Dict[str, int] = {}
+        postings: Dict[str, List[int]] = {}
+        for pos, name in enumerate(self._normalized):
+            self._by_name.setdefault(name, pos)
+            grams = {name[i:i + k] for k in range(1, NGRAM + 1) for i in range(len(name) - k + 1)}
+            for gram in grams:
+                postings.setdefault(gram, []).append(pos)
+        # Positions are appended in order, so every posting list is sorted
+        self._postings = {gram: np.array(p, dtype=np.int32) for gram, p in postings.items()}
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def lookup(self, name: str) -> Optional[str]:
+        """Return the profile ID for an exact (normalised) name, or ``None``."""
+        pos = self._by_name.get(normalize_name(name))
+        return None if pos is None else self.profile_ids[pos]
+
+    def _positions(self, query: str) -> np.ndarray:
+        if not query:
+            return np.arange(len(self.names), dtype=np.int32)
+        if len(query) <= NGRAM:
+            return self._postings.get(query, _EMPTY)
+
+        lists = []
+        for gram in {query[i:i + NGRAM] for i in range(len(query) - NGRAM + 1)}:
+            posting = self._postings.get(gram)
+            if posting is None:
+                return _EMPTY
+            lists.append(posting)
+        lists.sort(key=len)
+        candidates = lists[0]
+        for posting in lists[1:]:
+            if not len(candidates):
+                break
+            candidates = np.intersect1d(candidates, posting, assume_unique=True)
+        # Sharing every trigram does not guarantee the trigrams are adjacent
+        normalized = self._normalized
+        return np.fromiter((p for p in candidates if query in normalized[p]), dtype=np.int32)
+
+    def search(self, query: str, limit: Optional[int] = None) -> List[Tuple[str, str]]:
+        """Return ``(name, profileId)`` for names containing ``query``.
+
+        An empty query matches every profile. ``limit`` caps the number of
+        results, keeping the first in profile-list order.
+        """
+        positions = self._positions(normalize_name(query))
+        if limit is not None:
+            positions = positions[:limit]
+        names, ids = self.names, self.profile_ids
+        return [(names[p], ids[p]) for p in positions.tolist()]
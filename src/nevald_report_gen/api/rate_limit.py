@@ -0,0 +1,101 @@
+"""Rate limiting for requests made to the VALD Hub API."""
+
+import asyncio
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Callable, Optional
+
+
+class TokenBucket:
+    """Thread-safe token-bucket rate limiter.
+
+    Tokens refill continuously at ``rate`` per second up to ``burst``, so up to
+    ``burst`` requests may be sent back to back before callers are paced at the
+    steady rate. A single bucket can be shared between threads and asyncio
+    tasks: each caller reserves a token under a lock and then waits outside it
+    (``acquire`` blocks the thread, ``acquire_async`` awaits).
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: int = 1,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        if burst < 1:
+            raise ValueError("burst must be at least 1")
+        self.rate = float(rate)
+        self.burst = burst
+        self._clock = clock
+        self._tokens = float(burst)
+        # Time up to which tokens have been credited; may lie in the future
+        # while the bucket is paused
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """Take a token and return how long the caller must wait to use it."""
+        with self._lock:
+            now = self._clock()
+            if now > self._updated:
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+            self._tokens -= 1
+            wait = self._updated - now
+            if self._tokens < 0:
+                wait += -self._tokens / self.rate
+            return max(wait, 0.0)
+
+    def acquire(self) -> float:
+        """Block until a request may be sent and return the time waited."""
+        wait = self._reserve()
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    async def acquire_async(self) -> float:
+        """Await until a request may be sent and return the time waited."""
+        wait = self._reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    def pause(self, seconds: float) -> None:
+        """Stop issuing tokens for ``seconds``, e.g. after an HTTP 429.
+
+        Requests already waiting keep their place in the queue; they are simply
+        pushed back until the pause is over, after which a single request may go
+        immediately and the rest resume at the steady rate.
+        """
+        with self._lock:
+            until = self._clock() + max(seconds, 0.0)
+            if until > self._updated:
+                self._tokens = min(self._tokens, 1.0)
+                self._updated = until
+
+
+def parse_retry_after(value: Optional[str], now: Optional[datetime] = None) -> Optional[float]:
+    """Return the delay in seconds from a ``Retry-After`` header value.
+
+    The header may hold either a number of seconds or an HTTP date. ``None`` is
+    returned when the value is missing or cannot be parsed.
+    """
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    now = now or datetime.now(timezone.utc)
+    return max((when - now).total_seconds(), 0.0)
@@ -0,0 +1,117 @@
+"""On-disk cache for VALD ForceDecks trial payloads.
+
+Trial results for a completed test never change, so the raw JSON returned by
+the ``/tests/{testId}/trials`` endpoint is stored compressed in a SQLite file
+keyed by test ID. Regenerating or reprinting a report then needs no network
+calls for trial data. The cache is bounded in size and evicts the least
+recently used entries first.
+"""
+
+import sqlite3
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Optional, Union
+
+from nevald_report_gen.config import TRIAL_CACHE_FILE, TRIAL_CACHE_MAX_MB
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS trials (
+    test_id     TEXT PRIMARY KEY,
+    body        BLOB NOT NULL,
+    size        INTEGER NOT NULL,
+    last_access REAL NOT NULL
+)
+"""
+
+
+class TrialCache:
+    """Size-bounded LRU cache of raw trial payloads stored in SQLite.
+
+    The connection is opened lazily and guarded by a lock so a single cache can
+    be shared by the threads of a :class:`ValdClient`. Separate processes may
+    point at the same file; SQLite serialises their writes.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path, None] = None,
+        max_bytes: Optional[int] = None,
+    ):
+        self.path = Path(path or TRIAL_CACHE_FILE)
+        self.max_bytes = max_bytes if max_bytes is not None else int(TRIAL_CACHE_MAX_MB * 1024 * 1024)
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Internal helpers
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False)
+            conn.execute(_SCHEMA)
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        """Drop least recently used entries until the cache fits ``max_bytes``."""
+        (total,) = conn.execute("SELECT COALESCE(SUM(size), 0) FROM trials").fetchone()
+        if total <= self.max_bytes:
+            return
+        rows = conn.execute("SELECT test_id, size FROM trials ORDER BY last_access").fetchall()
+        stale = []
+        for test_id, size in rows:
+            if total <= self.max_bytes:
+                break
+            stale.append((test_id,))
+            total -= size
+        conn.executemany("DELETE FROM trials WHERE test_id = ?", stale)
+
+    # ------------------------------------------------------------------
+    # Public API
+    def get(self, test_id: str) -> Optional[bytes]:
+        """Return the cached payload for ``test_id`` or ``None`` on a miss."""
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute("SELECT body FROM trials WHERE test_id = ?", (test_id,)).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE trials SET last_access = ? WHERE test_id = ?", (time.time(), test_id)
+            )
+            conn.commit()
+        return zlib.decompress(row[0])
+
+    def put(self, test_id: str, payload: bytes) -> None:
+        """Store the raw JSON ``payload`` for ``test_id``."""
+        body = zlib.compress(payload)
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO trials (test_id, body, size, last_access) VALUES (?, ?, ?, ?)",
+                (test_id, body, len(body), time.time()),
+            )
+            self._evict(conn)
+            conn.commit()
+
+    def clear(self) -> None:
+        """Remove every cached payload."""
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM trials")
+            conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            (count,) = self._connect().execute("SELECT COUNT(*) FROM trials").fetchone()
+        return count
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -0,0 +1,155 @@
+"""Local index of VALD ForceDecks test sessions.
+
+Listing an athlete's tests used to re-download their full history on every
+lookup. The index keeps every test row seen so far in a SQLite file together
+with a sync watermark per scope, so later lookups only ask the API for tests
+modified since the watermark and merge the new rows in. A scope is either a
+single profile ID or :data:`TENANT_SCOPE` for a tenant-wide sync.
+"""
+
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterable, NamedTuple, Optional, Union
+
+import pandas as pd
+
+from nevald_report_gen.config import TEST_INDEX_FILE
+
+# Scope name used for tenant-wide syncs covering every profile
+TENANT_SCOPE = "__tenant__"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tests (
+    test_id      TEXT PRIMARY KEY,
+    profile_id   TEXT NOT NULL,
+    test_type    TEXT NOT NULL,
+    modified_utc TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS tests_by_profile ON tests (profile_id, modified_utc);
+CREATE TABLE IF NOT EXISTS sync_state (
+    scope       TEXT PRIMARY KEY,
+    synced_from TEXT NOT NULL,
+    watermark   TEXT NOT NULL
+);
+"""
+
+
+def to_utc_iso(value: Union[datetime, str, pd.Timestamp]) -> str:
+    """Normalise a timestamp to a sortable UTC ISO-8601 string.
+
+    Naive datetimes are taken to be UTC, matching the ``ModifiedFromUtc`` query
+    parameter of the VALD API.
+    """
+    ts = pd.Timestamp(value)
+    ts = ts.tz_localize(timezone.utc) if ts.tzinfo is None else ts.tz_convert(timezone.utc)
+    return ts.strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+
+def from_utc_iso(value: str) -> datetime:
+    """Parse a string produced by :func:`to_utc_iso` into a naive UTC datetime."""
+    return datetime.strptime(value, "%Y-%m-%dT%H:%M:%S.%fZ")
+
+
+class SyncState(NamedTuple):
+    """Range of modification times already pulled into the index for a scope."""
+
+    synced_from: str
+    watermark: str
+
+
+class SessionIndex:
+    """SQLite-backed store of test rows and per-scope sync watermarks.
+
+    The connection is opened lazily and guarded by a lock so a single index
+    can be shared by the threads of a :class:`ValdClient`.
+    """
+
+    def __init__(self, path: Union[str, Path, None] = None):
+        self.path = Path(path or TEST_INDEX_FILE)
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False)
+            conn.executescript(_SCHEMA)
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    # ------------------------------------------------------------------
+    # Public API
+    def sync_state(self, scope: str) -> Optional[SyncState]:
+        """Return the sync state for ``scope`` or ``None`` if never synced."""
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT synced_from, watermark FROM sync_state WHERE scope = ?", (scope,)
+            ).fetchone()
+        return SyncState(*row) if row else None
+
+    def merge(
+        self,
+        scope: str,
+        synced_from: Union[datetime, str],
+        tests: Iterable[dict],
+        profile_id: Optional[str] = None,
+    ) -> None:
+        """Upsert raw test rows from the API and advance the scope's watermark.
+
+        ``synced_from`` is the ``ModifiedFromUtc`` value the rows were requested
+        with. The watermark becomes the latest modification time seen, which is
+        a server timestamp and so unaffected by local clock skew. ``profile_id``
+        fills in rows that do not carry their own profile ID.
+        """
+        synced_from = to_utc_iso(synced_from)
+        rows = [
+            (
+                t["testId"],
+                t.get("profileId") or profile_id,
+                t["testType"],
+                to_utc_iso(t["modifiedDateUtc"]),
+            )
+            for t in tests
+        ]
+        with self._lock:
+            conn = self._connect()
+            conn.executemany(
+                "INSERT OR REPLACE INTO tests (test_id, profile_id, test_type, modified_utc) "
+                "VALUES (?, ?, ?, ?)",
+                rows,
+            )
+            previous = conn.execute(
+                "SELECT synced_from, watermark FROM sync_state WHERE scope = ?", (scope,)
+            ).fetchone()
+            candidates = [synced_from] + [r[3] for r in rows]
+            if previous:
+                synced_from = min(synced_from, previous[0])
+                candidates.append(previous[1])
+            conn.execute(
+                "INSERT OR REPLACE INTO sync_state (scope, synced_from, watermark) VALUES (?, ?, ?)",
+                (scope, synced_from, max(candidates)),
+            )
+            conn.commit()
+
+    def get_tests(self, profile_id: str, modified_from: Union[datetime, str]) -> pd.DataFrame:
+        """Return indexed tests for ``profile_id`` modified at or after ``modified_from``.
+
+        Columns match the VALD ``/tests`` response: ``testId``,
+        ``modifiedDateUtc`` and ``testType``.
+        """
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT test_id, modified_utc, test_type FROM tests "
+                "WHERE profile_id = ? AND modified_utc >= ? ORDER BY modified_utc",
+                (profile_id, to_utc_iso(modified_from)),
+            ).fetchall()
+        return pd.DataFrame(rows, columns=["testId", "modifiedDateUtc", "testType"])
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -1,50 +1,249 @@
 # =================================================================================
 # This script generates a VALD Hub access token using the enviorment credentials
 # Returns a string with the access token
+# The token is kept in memory and refreshed in the background before it expires.
+# Processes share it through the cache file, which is only rewritten under a file
+# lock so two processes never both ask the auth server for a new token.
 # =================================================================================
 
 # -- IMPORTS ----------------------------------------------------------------------
 import os
 import requests
 import json
-from datetime import datetime, timedelta
+import threading
+import time
+import weakref
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Optional, Tuple, Union
+
+from nevald_report_gen import spans
+from nevald_report_gen.api.file_lock import FileLock
 
 
 # -- ENVIORMENT VARIABLES ---------------------------------------------------------
 
-from nevald_report_gen.config import VALD_CLIENT_ID, VALD_CLIENT_SECRET, VALD_AUTH_URL, TOKEN_CACHE_FILE
+from nevald_report_gen.config import (
+    TOKEN_CACHE_FILE,
+    VALD_AUTH_URL,
+    VALD_CLIENT_ID,
+    VALD_CLIENT_SECRET,
+    VALD_TIMEOUT_SECONDS,
+)
 
 CLIENT_ID     = VALD_CLIENT_ID
 CLIENT_SECRET = VALD_CLIENT_SECRET
 AUTH_URL      = VALD_AUTH_URL
 CACHE_FILE    = TOKEN_CACHE_FILE
 
+# Tokens are treated as expired this long before the auth server says they are
+EXPIRY_SAFETY_SECONDS = 60
+# Refresh this long before a token expires
+REFRESH_MARGIN_SECONDS = 300
+# Wait before retrying a failed background refresh
+RETRY_SECONDS = 30
+
+# (access token, seconds until it expires)
+FetchFn = Callable[[], Tuple[str, float]]
+
+# Every live manager, so a forked child can reset their locks and threads
+_managers: "weakref.WeakSet[TokenManager]" = weakref.WeakSet()
+
+
 # -- TOKEN GENERATION FUNCTION ---------------------------------------------------
-def get_vald_token():
-    # Check cache for existing token
-    if os.path.exists(CACHE_FILE):
-        with open(CACHE_FILE, "r") as f:
-            data = json.load(f)
-            if datetime.now() < datetime.fromisoformat(data["expires_at"]):
-                return data["access_token"]
-            
-    # If no cache or expired, generate new token
+def request_token() -> Tuple[str, float]:
+    """Ask the auth server for a new token and return ``(token, expires_in)``."""
     payload = {
         "grant_type": "client_credentials",
         "client_id": CLIENT_ID,
         "client_secret": CLIENT_SECRET
     }
-    response = requests.post(AUTH_URL, data=payload)
+    response = requests.post(AUTH_URL, data=payload, timeout=VALD_TIMEOUT_SECONDS)
+    spans.current().add(requests=1, bytes=len(response.content))
     if response.status_code == 200:
-        token = response.json()['access_token']
-        expires_in = response.json().get('expires_in', 7200)
-        expires_at = (datetime.now() + timedelta(seconds=expires_in - 60)).isoformat()
-
-        with open(CACHE_FILE, "w") as f:
-            json.dump({"access_token": token, "expires_at": expires_at}, f)
-
+        data = response.json()
         print("Access token refreshed.")
-        return token
+        return data['access_token'], data.get('expires_in', 7200)
     else:
         raise Exception(f"Auth failed: {response.status_code} - {response.text}")
 
+
+# -- TOKEN MANAGER ----------------------------------------------------------------
+class TokenManager:
+    """Keep a VALD access token in memory and refresh it before it expires.
+
+    :meth:`get` answers from memory until the token is within
+    ``refresh_margin`` seconds of expiring. Refreshing first re-reads the
+    cache file under a :class:`FileLock`, so a token another process has just
+    fetched is reused, and only asks the auth server when the file holds
+    nothing usable. With ``background_refresh`` a daemon thread refreshes the
+    token shortly before the margin, so callers rarely wait for the auth
+    server. :meth:`invalidate` drops a token the API rejected. A forked child
+    (a batch worker, say) keeps the token but gets a fresh lock and starts
+    its own refresh thread.
+    """
+
+    def __init__(
+        self,
+        cache_file: Union[str, Path] = CACHE_FILE,
+        fetch: FetchFn = request_token,
+        refresh_margin: float = REFRESH_MARGIN_SECONDS,
+        background_refresh: bool = False,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.cache_file = Path(cache_file)
+        self.fetch = fetch
+        self.refresh_margin = refresh_margin
+        self.background_refresh = background_refresh
+        self._clock = clock
+        # (token, time it expires) as one attribute so readers never see a mix
+        self._current: Optional[Tuple[str, float]] = None
+        self._rejected: Optional[str] = None
+        self._reset_threading()
+        _managers.add(self)
+
+    def _reset_threading(self) -> None:
+        # Locks may be inherited held and threads do not survive a fork
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # ------------------------------------------------------------------
+    # Internal helpers
+    def _usable(self, entry: Optional[Tuple[str, float]]) -> bool:
+        return (entry is not None and entry[0] != self._rejected
+                and self._clock() < entry[1] - self.refresh_margin)
+
+    def _read_cache(self) -> Optional[Tuple[str, float]]:
+        try:
+            with open(self.cache_file, "r") as f:
+                data = json.load(f)
+            return data["access_token"], datetime.fromisoformat(data["expires_at"]).timestamp()
+        except (OSError, ValueError, KeyError, TypeError):
+            return None  # Missing or unreadable, fetch a new token
+
+    def _write_cache(self, token: str, expires_at: float) -> None:
+        # Write to a temporary file first so other processes never read a
+        # partially written token
+        self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.cache_file.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump({"access_token": token,
+                       "expires_at": datetime.fromtimestamp(expires_at).isoformat()}, f)
+        os.replace(tmp_path, self.cache_file)
+
+    def _start_background_refresh(self) -> None:
+        if self.background_refresh and self._thread is None:
+            self._thread = threading.Thread(target=self._refresh_loop, name="vald-token-refresh", daemon=True)
+            self._thread.start()
+
+    def _refresh_loop(self) -> None:
+        while not self._stop.is_set():
+            current = self._current
+            wait = 0.0 if current is None else current[1] - self.refresh_margin - self._clock()
+            # Wake slightly early so callers never reach the margin themselves,
+            # then look again in case a caller refreshed in the meantime
+            if wait > 1:
+                if self._stop.wait(wait - 1):
+                    return
+                continue
+            try:
+                self.refresh(force=True)
+            except Exception as e:
+                print(f"Background token refresh failed: {e}")
+                if self._stop.wait(RETRY_SECONDS):
+                    return
+            else:
+                self._stop.wait(1)
+
+    # ------------------------------------------------------------------
+    # Public API
+    def get(self) -> str:
+        """Return a valid token, refreshing it first if it is about to expire."""
+        current = self._current
+        if self._usable(current):
+            if self.background_refresh and self._thread is None:
+                # First use after a fork
+                with self._lock:
+                    self._start_background_refresh()
+            return current[0]
+        return self.refresh()
+
+    def refresh(self, force: bool = False) -> str:
+        """Load or fetch a new token and return it.
+
+        Without ``force`` a token that is still outside the refresh margin is
+        returned as is. A token in the cache file is adopted when it is newer
+        than the one held in memory. If the auth server cannot be reached the
+        current token is returned for as long as it has not expired.
+        """
+        with self._lock, spans.span("vald.token") as stage:
+            current = self._current
+            if not force and self._usable(current):
+                stage.set(cache_hit=True, source="memory")
+                return current[0]
+            with FileLock(self.cache_file.with_name(self.cache_file.name + ".lock")):
+                cached = self._read_cache()
+                if self._usable(cached) and (current is None or cached[1] > current[1]):
+                    stage.set(cache_hit=True, source="file")
+                    self._current = cached
+                else:
+                    stage.set(cache_hit=False, source="auth")
+                    try:
+                        token, expires_in = self.fetch()
+                    except Exception:
+                        if current is not None and current[0] != self._rejected and self._clock() < current[1]:
+                            return current[0]
+                        raise
+                    expires_at = self._clock() + expires_in - EXPIRY_SAFETY_SECONDS
+                    self._write_cache(token, expires_at)
+                    self._current = (token, expires_at)
+            self._start_background_refresh()
+            return self._current[0]
+
+    def invalidate(self, token: str) -> None:
+        """Forget ``token`` after the API rejected it; the next :meth:`get` replaces it."""
+        with self._lock:
+            self._rejected = token
+            if self._current is not None and self._current[0] == token:
+                self._current = None
+
+    def stop(self) -> None:
+        """Stop the background refresh thread."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+_default_manager: Optional[TokenManager] = None
+_default_lock = threading.Lock()
+
+
+def _after_fork_in_child() -> None:
+    global _default_lock
+    _default_lock = threading.Lock()
+    for manager in list(_managers):
+        manager._reset_threading()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+def get_token_manager() -> TokenManager:
+    """Return the process-wide token manager, refreshing in the background."""
+    global _default_manager
+    if _default_manager is None:
+        with _default_lock:
+            if _default_manager is None:
+                _default_manager = TokenManager(background_refresh=True)
+    return _default_manager
+
+
+def get_vald_token() -> str:
+    return get_token_manager().get()
+
+
+def invalidate_vald_token(token: str) -> None:
+    get_token_manager().invalidate(token)
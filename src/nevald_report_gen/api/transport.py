@@ -0,0 +1,168 @@
+"""HTTP transport for the VALD Hub API: pooled connections and retries.
+
+:class:`Transport` wraps a :class:`requests.Session` whose adapters keep up to
+``pool_size`` connections alive per host, sized to the number of threads that
+share the client so parallel trial downloads reuse connections instead of
+opening (and discarding) new ones. Requests that fail transiently are retried:
+
+* ``429 Too Many Requests`` pauses the shared rate limiter for the
+  ``Retry-After`` period (or an exponential fallback), so every thread backs off.
+* ``500``, ``502``, ``503`` and ``504`` answers, connection failures and
+  timeouts are retried after an exponential backoff with jitter, for idempotent
+  methods only.
+
+Responses may be gzip or deflate encoded; they are decoded transparently.
+Counts of requests, retries and failures are kept in :attr:`Transport.stats`.
+
+Example
+-------
+    transport = Transport(pool_size=16, max_retries=4)
+    response = transport.request("GET", url)
+    print(transport.stats.snapshot())
+"""
+
+import random
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .. import spans
+from ..config import VALD_MAX_CONNECTIONS, VALD_MAX_RETRIES, VALD_TIMEOUT_SECONDS
+from .rate_limit import TokenBucket, parse_retry_after
+
+# Server errors worth another attempt; anything else is returned to the caller
+RETRY_STATUSES = frozenset({500, 502, 503, 504})
+THROTTLED_STATUS = 429
+# Methods that are safe to send twice if the first attempt may have arrived
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+# Distinct hosts the client talks to (ForceDecks, profiles, auth, ...)
+POOL_HOSTS = 4
+
+Timeout = Union[float, Tuple[float, float]]
+
+
+class TransportStats:
+    """Thread-safe counters for the requests made through a :class:`Transport`."""
+
+    FIELDS = ("requests", "retries", "throttled", "server_errors", "connection_errors", "failures")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = dict.fromkeys(self.FIELDS, 0)
+
+    def add(self, **counts: int) -> None:
+        with self._lock:
+            for key, value in counts.items():
+                self._counts[key] += value
+
+    def snapshot(self) -> Dict[str, int]:
+        """Return the current counts."""
+        with self._lock:
+            return dict(self._counts)
+
+    def __getattr__(self, name: str) -> int:
+        if name in TransportStats.FIELDS:
+            return self.snapshot()[name]
+        raise AttributeError(name)
+
+
+class Transport:
+    """Pooled :class:`requests.Session` with throttling and retry handling.
+
+    ``max_retries`` bounds the retries after server errors and connection
+    failures; ``max_throttle_retries`` bounds those after 429 answers. The
+    backoff before retry ``n`` (from 0) is drawn between half and all of
+    ``min(backoff_max, backoff_base * 2 ** n)`` seconds, unless the server
+    sent ``Retry-After``. When every attempt fails the last response is
+    returned, or the last connection error raised. ``rate_limiter`` is
+    acquired before every attempt.
+    """
+
+    def __init__(
+        self,
+        pool_size: int = VALD_MAX_CONNECTIONS,
+        max_retries: int = VALD_MAX_RETRIES,
+        max_throttle_retries: int = 3,
+        backoff_base: float = 0.5,
+        backoff_max: float = 30.0,
+        timeout: Optional[Timeout] = VALD_TIMEOUT_SECONDS,
+        rate_limiter: Optional[TokenBucket] = None,
+        session: Optional[requests.Session] = None,
+        sleep: Callable[[float], None] = time.sleep,
+        rng: Callable[[], float] = random.random,
+    ):
+        if pool_size < 1:
+            raise ValueError("pool_size must be at least 1")
+        self.max_retries = max_retries
+        self.max_throttle_retries = max_throttle_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+        self.rate_limiter = rate_limiter
+        self.stats = TransportStats()
+        self._sleep = sleep
+        self._rng = rng
+
+        self.session = session if session is not None else requests.Session()
+        # Block for a free connection rather than opening one that is thrown
+        # away afterwards; urllib3 retries are off because they are done here
+        adapter = HTTPAdapter(pool_connections=POOL_HOSTS, pool_maxsize=pool_size,
+                              pool_block=True, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers["Accept-Encoding"] = "gzip, deflate"
+
+    def backoff(self, attempt: int) -> float:
+        """Seconds to wait before retry ``attempt`` (0 for the first retry)."""
+        ceiling = min(self.backoff_max, self.backoff_base * 2 ** attempt)
+        return ceiling / 2 + self._rng() * ceiling / 2
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """Send a request, retrying transient failures; see the class docstring."""
+        if self.timeout is not None:
+            kwargs.setdefault("timeout", self.timeout)
+        retry_errors = method.upper() in IDEMPOTENT_METHODS
+        stage = spans.current()
+        errors = throttles = 0
+        while True:
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+            self.stats.add(requests=1)
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                self.stats.add(connection_errors=1)
+                if not retry_errors or errors >= self.max_retries:
+                    self.stats.add(failures=1)
+                    raise
+                delay = self.backoff(errors)
+                errors += 1
+            else:
+                stage.add(requests=1, bytes=len(response.content))
+                status = response.status_code
+                retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                if status == THROTTLED_STATUS and throttles < self.max_throttle_retries:
+                    delay = retry_after if retry_after is not None else 2 ** throttles
+                    throttles += 1
+                    self.stats.add(throttled=1, retries=1)
+                    stage.add(retries=1)
+                    if self.rate_limiter is not None:
+                        # Later acquires wait out the pause, for every thread
+                        self.rate_limiter.pause(delay)
+                    else:
+                        self._sleep(delay)
+                    continue
+                if status not in RETRY_STATUSES:
+                    return response
+                self.stats.add(server_errors=1)
+                if not retry_errors or errors >= self.max_retries:
+                    self.stats.add(failures=1)
+                    return response
+                delay = retry_after if retry_after is not None else self.backoff(errors)
+                errors += 1
+            self.stats.add(retries=1)
+            stage.add(retries=1)
+            self._sleep(delay)
@@ -1,89 +1,315 @@
+import logging
 import os
+import threading
 import time
-from datetime import datetime
-from typing import Dict, Optional, Tuple
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
 
 import pandas as pd
 import requests
 from dotenv import load_dotenv
 
-from .token_gen import get_vald_token
-from .metric_vars import METRICS_OF_INTEREST, unit_map
+from .. import spans
+from ..config import TEST_LIST_TTL_MINUTES, VALD_MAX_CONNECTIONS, VALD_MAX_RETRIES, VALD_TESTS_PAGE_SIZE
+from .fd_parser import parse_fd_results
+from .profile_index import ProfileIndex
+from .rate_limit import TokenBucket
+from .response_cache import TrialCache
+from .session_index import TENANT_SCOPE, SessionIndex, from_utc_iso, to_utc_iso
+from .token_gen import TokenManager, get_vald_token, invalidate_vald_token
+from .transport import Transport
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 FORCEDECKS_URL = os.getenv("FORCEDECKS_URL")
 DYNAMO_URL = os.getenv("DYNAMO_URL")
 PROFILE_URL = os.getenv("PROFILE_URL")
 TENANT_ID = os.getenv("TENANT_ID")
 
+# Earliest date to search for ForceDecks tests
+FIRST_VALD_DATE = datetime(2020, 1, 1)
+
 
 class ValdClient:
     """Lightweight client for interacting with the VALD Hub API.
 
-    The client manages a :class:`requests.Session` with the generated
-    authentication token, caches common responses such as the profile list and
-    test sessions, and enforces a simple rate limit between requests to avoid
-    overwhelming the API.
+    The client manages a :class:`requests.Session` authenticated with a token
+    from the process-wide token manager (or ``token_manager``), which is
+    refreshed before it expires and replaced if the API rejects it. It caches
+    common responses such as the profile list and test sessions, and paces
+    requests with a token-bucket rate limiter to avoid overwhelming the API.
+    A single client may be shared between threads; the rate limit applies
+    across all of them. Pass ``rate_limiter`` to share one limiter between
+    several clients.
+
+    Requests go through a :class:`Transport` that keeps up to
+    ``max_connections`` connections alive per host (match it to the number of
+    threads sharing the client) and retries throttled requests, server errors
+    and dropped connections, up to ``max_retries`` times for the latter. Pass
+    ``transport`` to configure it fully.
+
+    Trial payloads are kept in an on-disk :class:`TrialCache` so reprinting a
+    report does not download them again; pass ``use_trial_cache=False`` to
+    always hit the API. Test lists are synced incrementally into a local
+    :class:`SessionIndex` (``use_session_index=False`` disables it). After
+    :meth:`sync_tenant_tests`, per-athlete test lookups are answered from the
+    tenant-wide index without further requests; once the sync is older than
+    ``test_list_ttl`` the next lookup first pulls the tests modified since.
+    Test lists returned by :meth:`get_tests_by_profile` are likewise reused
+    for ``test_list_ttl``, so a long-lived client sees new uploads.
     """
 
-    def __init__(self, rate_limit_per_sec: int = 5):
-        self.session = requests.Session()
-        token = get_vald_token()
-        self.session.headers.update({"Authorization": f"Bearer {token}"})
-        # Basic token bucket style rate limiting
-        self.rate_limit_interval = 1 / rate_limit_per_sec
-        self._last_request = 0.0
+    def __init__(
+        self,
+        rate_limit_per_sec: float = 5,
+        burst: int = 5,
+        rate_limiter: Optional[TokenBucket] = None,
+        max_throttle_retries: int = 3,
+        max_connections: int = VALD_MAX_CONNECTIONS,
+        max_retries: int = VALD_MAX_RETRIES,
+        transport: Optional[Transport] = None,
+        token_manager: Optional[TokenManager] = None,
+        trial_cache: Optional[TrialCache] = None,
+        use_trial_cache: bool = True,
+        session_index: Optional[SessionIndex] = None,
+        use_session_index: bool = True,
+        test_list_ttl: Optional[timedelta] = None,
+    ):
+        # Token bucket rate limiting, shared by every thread using this client
+        self.rate_limiter = rate_limiter or TokenBucket(rate_limit_per_sec, burst)
+        if transport is None:
+            transport = Transport(pool_size=max_connections, max_retries=max_retries,
+                                  max_throttle_retries=max_throttle_retries)
+        if transport.rate_limiter is None:
+            transport.rate_limiter = self.rate_limiter
+        self.transport = transport
+        self.session = transport.session
+        # The token is looked up per request so long-lived clients pick up refreshes
+        if token_manager is not None:
+            self._get_token, self._invalidate_token = token_manager.get, token_manager.invalidate
+        else:
+            self._get_token, self._invalidate_token = get_vald_token, invalidate_vald_token
+        self._get_token()  # Fail early on bad credentials
         # Response caches
+        if use_trial_cache and trial_cache is None:
+            trial_cache = TrialCache()
+        self.trial_cache = trial_cache if use_trial_cache else None
+        if use_session_index and session_index is None:
+            session_index = SessionIndex()
+        self.session_index = session_index if use_session_index else None
+        self.test_list_ttl = test_list_ttl if test_list_ttl is not None else timedelta(minutes=TEST_LIST_TTL_MINUTES)
+        self._tenant_synced_from: Optional[str] = None
+        self._tenant_synced_at = 0.0
+        # Held while syncing the tenant so concurrent lookups share one re-sync
+        self._tenant_lock = threading.RLock()
         self._profiles_cache: Optional[pd.DataFrame] = None
-        self._tests_cache: Dict[Tuple[datetime, str], pd.DataFrame] = {}
+        self._profile_index: Optional[ProfileIndex] = None
+        # Threads sharing the client wait for one profile download and index build
+        self._profiles_lock = threading.RLock()
+        # (modified_from, profile_id) -> (time it was looked up, test list)
+        self._tests_cache: Dict[Tuple[datetime, str], Tuple[float, pd.DataFrame]] = {}
 
     # ------------------------------------------------------------------
     # Internal helpers
     def _request(self, method: str, url: str, **kwargs) -> requests.Response:
-        """Perform an HTTP request respecting the configured rate limit."""
-        elapsed = time.time() - self._last_request
-        if elapsed < self.rate_limit_interval:
-            time.sleep(self.rate_limit_interval - elapsed)
-        response = self.session.request(method, url, **kwargs)
-        self._last_request = time.time()
+        """Perform an HTTP request respecting the configured rate limit.
+
+        Throttled requests, server errors and dropped connections are retried
+        by the transport. A ``401 Unauthorized`` answer replaces the token and
+        retries once. An error still standing afterwards is raised.
+        """
+        headers = kwargs.pop("headers", None) or {}
+        token = self._get_token()
+        response = self.transport.request(method, url, headers={**headers, "Authorization": f"Bearer {token}"},
+                                          **kwargs)
+        if response.status_code == 401:
+            # Revoked or expired early; the next token comes from the auth server
+            self._invalidate_token(token)
+            token = self._get_token()
+            response = self.transport.request(method, url, headers={**headers, "Authorization": f"Bearer {token}"},
+                                              **kwargs)
         response.raise_for_status()
         return response
 
+    def _fetch_tests(self, modified_from: datetime, profile_id: Optional[str] = None) -> List[dict]:
+        """Return raw test rows modified since ``modified_from``.
+
+        Without ``profile_id`` the query covers every profile in the tenant.
+        """
+        url = f"{FORCEDECKS_URL}/tests?TenantId={TENANT_ID}&ModifiedFromUtc={to_utc_iso(modified_from)}"
+        if profile_id is not None:
+            url += f"&ProfileId={profile_id}"
+        response = self._request("GET", url)
+        # The API answers 204 No Content when nothing matches
+        if response.status_code == 204 or not response.content:
+            return []
+        return response.json().get("tests", [])
+
+    def _sync_tests(self, modified_from: datetime, profile_id: str) -> pd.DataFrame:
+        """Bring the session index up to date for ``profile_id`` and query it.
+
+        Only tests modified since the profile's last watermark are requested,
+        unless ``modified_from`` reaches further back than anything synced so far.
+        """
+        state = self.session_index.sync_state(profile_id)
+        if state is None or to_utc_iso(modified_from) < state.synced_from:
+            query_from = modified_from
+        else:
+            query_from = from_utc_iso(state.watermark)
+        stalled_at = self._page_tests(profile_id, query_from, profile_id)[1]
+        if stalled_at is not None:
+            logger.warning("Some tests for profile %s modified at %s were not synced", profile_id, stalled_at)
+        return self.session_index.get_tests(profile_id, modified_from)
+
+    def _page_tests(
+        self,
+        scope: str,
+        query_from: datetime,
+        profile_id: Optional[str] = None,
+    ) -> Tuple[int, Optional[datetime]]:
+        """Page tests modified since ``query_from`` into the index under ``scope``.
+
+        Pages are requested by moving ``ModifiedFromUtc`` to the latest
+        modification time of the previous page until a short page arrives.
+        Returns the number of rows received and, if a full page shares a
+        single modification time, that time: paging by ``ModifiedFromUtc``
+        cannot get past it.
+        """
+        received = 0
+        while True:
+            tests = self._fetch_tests(query_from, profile_id)
+            self.session_index.merge(scope, query_from, tests, profile_id=profile_id)
+            received += len(tests)
+            if len(tests) < VALD_TESTS_PAGE_SIZE:
+                return received, None
+            next_from = max(to_utc_iso(t["modifiedDateUtc"]) for t in tests)
+            if next_from <= to_utc_iso(query_from):
+                return received, query_from
+            query_from = from_utc_iso(next_from)
+
+    def _tenant_index_covers(self, modified_from: datetime) -> bool:
+        """Whether the tenant index answers lookups since ``modified_from``.
+
+        An index synced more than ``test_list_ttl`` ago is brought up to date
+        from its watermark first.
+        """
+        synced_from = self._tenant_synced_from
+        if synced_from is None or to_utc_iso(modified_from) < synced_from:
+            return False
+        with self._tenant_lock:
+            if time.monotonic() - self._tenant_synced_at >= self.test_list_ttl.total_seconds():
+                self.sync_tenant_tests(from_utc_iso(synced_from))
+        return True
+
     # ------------------------------------------------------------------
     # Public API methods
+    def sync_tenant_tests(self, modified_from: datetime = FIRST_VALD_DATE) -> int:
+        """Page through every test in the tenant and merge it into the index.
+
+        Later syncs resume from the tenant watermark, so a roster report costs
+        a few paginated requests instead of one per athlete. When more tests
+        share one modification time than fit on a page (a bulk re-upload, for
+        example), the tests at that time are requested profile by profile
+        before paging carries on past it. Returns the number of rows received.
+        """
+        if self.session_index is None:
+            raise RuntimeError("Tenant sync requires a session index")
+        with self._tenant_lock:
+            state = self.session_index.sync_state(TENANT_SCOPE)
+            if state is None or to_utc_iso(modified_from) < state.synced_from:
+                query_from = modified_from
+            else:
+                query_from = from_utc_iso(state.watermark)
+
+            received = 0
+            while True:
+                count, stalled_at = self._page_tests(TENANT_SCOPE, query_from)
+                received += count
+                if stalled_at is None:
+                    break
+                profiles = self.get_profiles()
+                for profile_id in profiles["profileId"] if not profiles.empty else []:
+                    count, profile_stalled_at = self._page_tests(TENANT_SCOPE, stalled_at, profile_id)
+                    received += count
+                    if profile_stalled_at is not None:
+                        logger.warning("Some tests for profile %s modified at %s were not synced",
+                                       profile_id, profile_stalled_at)
+                # Each profile's tests from the stalled time on are now indexed;
+                # skip a whole millisecond as the API may truncate the query time
+                query_from = stalled_at + timedelta(milliseconds=1)
+
+            self._tenant_synced_from = self.session_index.sync_state(TENANT_SCOPE).synced_from
+            self._tenant_synced_at = time.monotonic()
+            self._tests_cache.clear()
+            return received
+
     def get_profiles(self) -> pd.DataFrame:
         """Return a DataFrame of profiles, using a cached copy if available."""
         if self._profiles_cache is not None:
             return self._profiles_cache
 
-        url = f"{PROFILE_URL}/profiles?tenantId={TENANT_ID}"
-        response = self._request("GET", url)
-        df = pd.DataFrame(response.json().get("profiles", []))
-        if df.empty:
+        with self._profiles_lock, spans.span("vald.profiles") as stage:
+            stage.set(cache_hit=self._profiles_cache is not None)
+            if self._profiles_cache is not None:
+                return self._profiles_cache
+            url = f"{PROFILE_URL}/profiles?tenantId={TENANT_ID}"
+            response = self._request("GET", url)
+            df = pd.DataFrame(response.json().get("profiles", []))
+            if df.empty:
+                return df
+            df["givenName"] = df["givenName"].str.strip().str.lower()
+            df["familyName"] = df["familyName"].str.strip().str.lower()
+            df["fullName"] = (df["givenName"] + " " + df["familyName"]).str.title()
+            df = df[["fullName", "profileId"]]
+            self._profiles_cache = df
             return df
-        df["givenName"] = df["givenName"].str.strip().str.lower()
-        df["familyName"] = df["familyName"].str.strip().str.lower()
-        df["fullName"] = (df["givenName"] + " " + df["familyName"]).str.title()
-        df = df[["fullName", "profileId"]]
-        self._profiles_cache = df
-        return df
+
+    def set_profiles(self, profiles: pd.DataFrame) -> None:
+        """Prime the profile cache with a list fetched elsewhere.
+
+        Batch workers use this so the tenant's profile list is downloaded once
+        per batch rather than once per process.
+        """
+        self._profiles_cache = profiles
+
+    def get_profile_index(self) -> ProfileIndex:
+        """Return a :class:`ProfileIndex` over the cached profile list.
+
+        The index is built on first use and rebuilt only when the profile list
+        is replaced.
+        """
+        with self._profiles_lock:
+            profiles = self.get_profiles()
+            index = self._profile_index
+            if index is None or index.profiles is not profiles:
+                index = self._profile_index = ProfileIndex(profiles)
+            return index
 
     def get_tests_by_profile(self, modified_from: datetime, profile_id: str) -> Optional[pd.DataFrame]:
         """Return test sessions for ``profile_id`` since ``modified_from``.
 
-        The response is cached based on the (date, profile) pair.
+        Only dates containing all four required tests are returned. The
+        response is cached based on the (date, profile) pair for
+        ``test_list_ttl``, and the underlying test list is synced
+        incrementally through the session index.
         """
         cache_key = (modified_from, profile_id)
-        if cache_key in self._tests_cache:
-            return self._tests_cache[cache_key]
+        cached = self._tests_cache.get(cache_key)
+        if cached is not None and time.monotonic() - cached[0] < self.test_list_ttl.total_seconds():
+            return cached[1]
 
-        date_str = modified_from.isoformat()
-        url = (
-            f"{FORCEDECKS_URL}/tests?TenantId={TENANT_ID}&ModifiedFromUtc={date_str}&ProfileId={profile_id}"
-        )
-        response = self._request("GET", url)
-        df = pd.DataFrame(response.json().get("tests", []))
+        with spans.span("vald.tests", cache_hit=False) as stage:
+            if self._tenant_index_covers(modified_from):
+                stage.set(source="tenant_index")
+                df = self.session_index.get_tests(profile_id, modified_from)
+            elif self.session_index is not None:
+                stage.set(source="session_index")
+                df = self._sync_tests(modified_from, profile_id)
+            else:
+                stage.set(source="api")
+                df = pd.DataFrame(self._fetch_tests(modified_from, profile_id))
         if df.empty:
             return None
         df = df[["testId", "modifiedDateUtc", "testType"]]
@@ -94,44 +320,23 @@ class ValdClient:
         filtered_df = df[df["modifiedDateUtc"].isin(valid_dates)]
         if filtered_df.empty:
             return None
-        self._tests_cache[cache_key] = filtered_df
+        self._tests_cache[cache_key] = (time.monotonic(), filtered_df)
         return filtered_df
 
     def get_fd_results(self, test_id: str, test_type: str) -> Optional[pd.DataFrame]:
-        """Fetch ForceDecks results for a specific test session."""
-        url = f"{FORCEDECKS_URL}/v2019q3/teams/{TENANT_ID}/tests/{test_id}/trials"
-        response = self._request("GET", url)
-        test_data_json = response.json()
-        if not test_data_json or not isinstance(test_data_json, list):
-            return None
+        """Fetch ForceDecks results for a specific test session.
 
-        all_results = []
-        for trial in test_data_json:
-            for res in trial.get("results", []):
-                all_results.append(
-                    {
-                        "value": res.get("value"),
-                        "limb": res.get("limb"),
-                        "result_key": res["definition"].get("result", ""),
-                        "unit": res["definition"].get("unit", ""),
-                    }
-                )
-        if not all_results:
-            return None
-
-        df = pd.DataFrame(all_results)
-        df["unit"] = df["unit"].apply(unit_map)
-        df["metric_id"] = (
-            df["result_key"].astype(str)
-            + "_"
-            + df["limb"].astype(str)
-            + "_"
-            + df["unit"].astype(str)
-        )
-        df["trial"] = df.groupby("metric_id").cumcount() + 1
-        pivot = df.pivot_table(index="metric_id", columns="trial", values="value", aggfunc="first")
-        pivot.columns = [f"trial {c}" for c in pivot.columns]
-        pivot = pivot.reset_index()
-        pivot = pivot[pivot["metric_id"].isin(METRICS_OF_INTEREST[test_type])]
-
-        return pivot
\ No newline at end of file
+        The raw trial payload is served from the trial cache when available and
+        stored there after a successful download.
+        """
+        with spans.span("vald.trials", test_type=test_type) as stage:
+            payload = self.trial_cache.get(test_id) if self.trial_cache is not None else None
+            from_cache = payload is not None
+            stage.set(cache_hit=from_cache)
+            if payload is None:
+                url = f"{FORCEDECKS_URL}/v2019q3/teams/{TENANT_ID}/tests/{test_id}/trials"
+                payload = self._request("GET", url).content
+            df = parse_fd_results(payload, test_type) if payload else None
+            if df is not None and self.trial_cache is not None and not from_cache:
+                self.trial_cache.put(test_id, payload)
+            return df
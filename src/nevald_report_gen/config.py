@@ -35,23 +35,24 @@ def find_gcp_credentials():
     return str(PROJECT_ROOT / 'gcp_credentials.json')
 
 GCP_CREDENTIALS_PATH = find_gcp_credentials()
-print(f"Using GCP credentials from: {GCP_CREDENTIALS_PATH}")
 GCP_PROJECT_ID = os.getenv('GCP_PROJECT_ID', 'vald-ref-data')
 
 # VALD API Configuration
 VALD_CLIENT_ID = os.getenv('VALD_CLIENT_ID')
 VALD_CLIENT_SECRET = os.getenv('VALD_CLIENT_SECRET')
 VALD_AUTH_URL = os.getenv('VALD_AUTH_URL', 'https://security.valdperformance.com/connect/token')
+# Connections kept alive per VALD host, retries after server or connection errors,
+# and seconds to wait for a response
+VALD_MAX_CONNECTIONS = int(os.getenv('VALD_MAX_CONNECTIONS', '10'))
+VALD_MAX_RETRIES = int(os.getenv('VALD_MAX_RETRIES', '3'))
+VALD_TIMEOUT_SECONDS = float(os.getenv('VALD_TIMEOUT_SECONDS', '60'))
 
 # File paths
 OUTPUT_DIR = os.getenv('OUTPUT_DIR', str(PROJECT_ROOT / 'Output CSVs'))
 MEDIA_DIR = os.getenv('MEDIA_DIR', str(PROJECT_ROOT / 'Media'))
 PDF_OUTPUT_DIR = os.getenv('PDF_OUTPUT_DIR', str(PROJECT_ROOT / 'PDF Reports'))
-
-# Create directories if they don't exist
-os.makedirs(OUTPUT_DIR, exist_ok=True)
-os.makedirs(MEDIA_DIR, exist_ok=True)
-os.makedirs(PDF_OUTPUT_DIR, exist_ok=True)
+# Importing the config has no side effects; output folders are created by the
+# code that writes into them
 
 # Database table names
 CMJ_TABLE = f"{GCP_PROJECT_ID}.athlete_performance_db.cmj_results"
@@ -61,3 +62,23 @@ PPU_TABLE = f"{GCP_PROJECT_ID}.athlete_performance_db.ppu_results"
 
 # Token cache file
 TOKEN_CACHE_FILE = os.getenv('TOKEN_CACHE_FILE', str(PROJECT_ROOT / '.token_cache.json'))
+
+# Local cache for reference tables pulled from BigQuery
+CACHE_DIR = os.getenv('CACHE_DIR', str(PROJECT_ROOT / '.cache'))
+REF_CACHE_DIR = os.getenv('REF_CACHE_DIR', str(Path(CACHE_DIR) / 'reference'))
+REF_CACHE_TTL_HOURS = float(os.getenv('REF_CACHE_TTL_HOURS', '168'))
+
+# Local cache for VALD trial payloads (completed tests never change)
+TRIAL_CACHE_FILE = os.getenv('TRIAL_CACHE_FILE', str(Path(CACHE_DIR) / 'trials.sqlite'))
+TRIAL_CACHE_MAX_MB = float(os.getenv('TRIAL_CACHE_MAX_MB', '256'))
+
+# Local index of VALD test sessions, synced incrementally per profile
+TEST_INDEX_FILE = os.getenv('TEST_INDEX_FILE', str(Path(CACHE_DIR) / 'tests.sqlite'))
+# Tests returned per page by the ForceDecks /tests endpoint
+VALD_TESTS_PAGE_SIZE = int(os.getenv('VALD_TESTS_PAGE_SIZE', '50'))
+# Minutes a synced test list is trusted before newly uploaded tests are looked for
+TEST_LIST_TTL_MINUTES = float(os.getenv('TEST_LIST_TTL_MINUTES', '5'))
+
+# Local report service (vald-report-service)
+SERVICE_HOST = os.getenv('SERVICE_HOST', '127.0.0.1')
+SERVICE_PORT = int(os.getenv('SERVICE_PORT', '8765'))
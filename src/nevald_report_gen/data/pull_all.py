@@ -4,34 +4,59 @@
 # =================================================================================
 
 # -- IMPORTS ----------------------------------------------------------------------
-from typing import Dict
+from typing import Dict, Optional, Sequence, Tuple
 
 import pandas as pd
 
 # Add project root to path
+from nevald_report_gen import spans
 from nevald_report_gen.config import (
     CMJ_TABLE,
     HJ_TABLE,
     IMTP_TABLE,
     PPU_TABLE,
 )
-from nevald_report_gen.data.pull_ref_data import pull_ref
+from nevald_report_gen.data.ref_cache import ReferenceCache, get_reference_cache
 
+# (table, key, column ranking each athlete's tests, columns read by the reports)
+REFERENCE_QUERIES: Sequence[Tuple[str, str, str, Tuple[str, ...]]] = [
+    (CMJ_TABLE, "cmj", "cmj_composite_score", (
+        "BODY_WEIGHT_LBS_Trial_lb",
+        "PEAK_TAKEOFF_POWER_Trial_W",
+        "CONCENTRIC_IMPULSE_Trial_Ns",
+        "ECCENTRIC_BRAKING_RFD_Trial_N_s",
+        "BODYMASS_RELATIVE_TAKEOFF_POWER_Trial_W_kg",
+    )),
+    (HJ_TABLE, "hj", "hop_rsi_avg_best_5", ()),
+    (IMTP_TABLE, "imtp", "ISO_BM_REL_FORCE_PEAK_Trial_N_kg", ("PEAK_VERTICAL_FORCE_Trial_N",)),
+    (PPU_TABLE, "ppu", "PEAK_CONCENTRIC_FORCE_Trial_N", ("ECCENTRIC_BRAKING_RFD_Trial_N_s_",)),
+]
 
-def pull_all_ref(min_age: int, max_age: int) -> Dict[str, 'pd.DataFrame']:
-    """Fetch reference data for all tests and return them in a dictionary."""
-    test_configs = [
-        (CMJ_TABLE, "cmj", "cmj_composite_score"),
-        (HJ_TABLE, "hj", "hop_rsi_avg_best_5"),
-        (IMTP_TABLE, "imtp", "ISO_BM_REL_FORCE_PEAK_Trial_N_kg"),
-        (PPU_TABLE, "ppu", "PEAK_CONCENTRIC_FORCE_Trial_N"),
-    ]
+
+def pull_all_ref(
+    min_age: int,
+    max_age: int,
+    cache: Optional[ReferenceCache] = None,
+    refresh: bool = False,
+    all_columns: bool = False,
+) -> Dict[str, 'pd.DataFrame']:
+    """Fetch reference data for all tests and return them in a dictionary.
+
+    Tables are served from the local reference cache and only pulled from
+    BigQuery when the cached copy is missing, stale or ``refresh`` is set.
+    BigQuery returns only the columns the reports read (every column with
+    ``all_columns``) and each athlete's best test per age. The
+    best-per-athlete dedupe then runs after the age window is applied, so each
+    athlete's best test *within the window* is kept. Repeated calls for the
+    same window return the same frames until the tables are reloaded.
+    """
+    if cache is None:
+        cache = get_reference_cache()
 
     ref_data: Dict[str, 'pd.DataFrame'] = {}
-    for table, key, sort_col in test_configs:
-        df = pull_ref(table, min_age, max_age)
-        df = df.sort_values(by=sort_col, ascending=False)
-        df = df.drop_duplicates(subset=["athlete_name"], keep="first")
-        ref_data[key] = df
+    with spans.span("reference", min_age=min_age, max_age=max_age):
+        for table, key, sort_col, columns in REFERENCE_QUERIES:
+            ref_data[key] = cache.get(table, min_age, max_age, refresh=refresh,
+                                      columns=None if all_columns else columns, best_by=sort_col)
 
     return ref_data
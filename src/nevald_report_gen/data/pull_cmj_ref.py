@@ -17,7 +17,6 @@ from nevald_report_gen.data.pull_ref_data import pull_ref
 
 
 def pull_cmj_ref(min_age: int, max_age: int) -> pd.DataFrame:
-    df = pull_ref(CMJ_TABLE, min_age, max_age)
-    df = df.sort_values(by="cmj_composite_score", ascending=False)
-    df = df.drop_duplicates(subset=["athlete_name"], keep="first")
+    # BigQuery keeps each athlete's best test, so only those rows are transferred
+    df = pull_ref(CMJ_TABLE, min_age, max_age, best_by="cmj_composite_score")
     return df
\ No newline at end of file
@@ -15,7 +15,6 @@ from nevald_report_gen.data.pull_ref_data import pull_ref
 
 
 def pull_hj_ref(min_age: int, max_age: int) -> pd.DataFrame:
-    df = pull_ref(HJ_TABLE, min_age, max_age)
-    df = df.sort_values(by="hop_rsi_avg_best_5", ascending=False)
-    df = df.drop_duplicates(subset=["athlete_name"], keep="first")
+    # BigQuery keeps each athlete's best test, so only those rows are transferred
+    df = pull_ref(HJ_TABLE, min_age, max_age, best_by="hop_rsi_avg_best_5")
     return df
\ No newline at end of file
@@ -15,9 +15,8 @@ from nevald_report_gen.data.pull_ref_data import pull_ref
 
 
 def pull_imtp_ref(min_age: int, max_age: int) -> pd.DataFrame:
-    df = pull_ref(IMTP_TABLE, min_age, max_age)
-    df = df.sort_values(by="PEAK_VERTICAL_FORCE_Trial_N", ascending=False)
-    df = df.drop_duplicates(subset=["athlete_name"], keep="first")
+    # BigQuery keeps each athlete's best test, so only those rows are transferred
+    df = pull_ref(IMTP_TABLE, min_age, max_age, best_by="PEAK_VERTICAL_FORCE_Trial_N")
     return df
     
 
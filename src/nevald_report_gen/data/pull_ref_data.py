@@ -1,5 +1,6 @@
-from google.cloud import bigquery
-from google.oauth2 import service_account
+import re
+from functools import lru_cache
+from typing import Optional, Sequence
 import pandas as pd
 from pathlib import Path
 import sys
@@ -8,39 +9,136 @@ import sys
 sys.path.append(str(Path(__file__).parent.parent.parent))
 from nevald_report_gen.config import GCP_CREDENTIALS_PATH, GCP_PROJECT_ID
 
+# The BigQuery and Google auth libraries are slow to import, so they are only
+# loaded once a query actually has to run (reference tables are usually cached)
 
-def pull_ref(test_type: str, min_age: int, max_age: int) -> pd.DataFrame:
+
+@lru_cache(maxsize=1)
+def get_bigquery_client() -> "bigquery.Client":
+    """Return a BigQuery client, created once and reused for every query."""
+    from google.cloud import bigquery
+    from google.oauth2 import service_account
+
+    print(f"Using GCP credentials from: {GCP_CREDENTIALS_PATH}")
+    creds = service_account.Credentials.from_service_account_file(GCP_CREDENTIALS_PATH)
+    return bigquery.Client(credentials=creds, project=GCP_PROJECT_ID)
+
+
+# Column names are interpolated into the SQL, so only plain identifiers are allowed
+_IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+# Columns every query keeps: the athlete and the age used to slice age windows
+KEY_COLUMNS = ("athlete_name", "age_at_test")
+_RANK_COLUMN = "_best_rank"
+
+
+def _quote(column: str) -> str:
+    if not _IDENTIFIER.match(column):
+        raise ValueError(f"Invalid column name: {column!r}")
+    return f"`{column}`"
+
+
+def build_ref_query(
+    test_type: str,
+    filter_ages: bool = False,
+    columns: Optional[Sequence[str]] = None,
+    best_by: Optional[str] = None,
+    partition_by: Sequence[str] = ("athlete_name",),
+) -> str:
+    """Return the SQL run by :func:`pull_ref`; see there for the parameters."""
+    if columns is None:
+        select = "*"
+        # Rows with equal scores are ordered by their full contents
+        tie_break, outer_tie_break = "TO_JSON_STRING(ref)", "TO_JSON_STRING(ranked)"
+    else:
+        wanted = list(dict.fromkeys([*KEY_COLUMNS, *([best_by] if best_by else []), *columns]))
+        select = ", ".join(_quote(c) for c in wanted)
+        tie_break = outer_tie_break = ", ".join(_quote(c) for c in wanted if c != best_by)
+    age_filter = "WHERE age_at_test BETWEEN @min_age AND @max_age" if filter_ages else ""
+    if best_by is None:
+        return f"""
+        SELECT {select}
+        FROM `{test_type}`
+        {age_filter}
+    """
+    # Keep the best row per partition; NULL scores only win when nothing else
+    # exists, and ties are broken the same way on every pull
+    partition = ", ".join(_quote(c) for c in partition_by)
+    best = _quote(best_by)
+    return f"""
+        SELECT *
+        FROM (
+            SELECT {select},
+                ROW_NUMBER() OVER (PARTITION BY {partition} ORDER BY {best} DESC NULLS LAST, {tie_break}) AS {_RANK_COLUMN}
+            FROM `{test_type}` AS ref
+            {age_filter}
+        ) AS ranked
+        WHERE {_RANK_COLUMN} = 1
+        ORDER BY {best} DESC, {outer_tie_break}
+    """
+
+
+def pull_ref(
+    test_type: str,
+    min_age: Optional[int],
+    max_age: Optional[int],
+    client=None,
+    columns: Optional[Sequence[str]] = None,
+    best_by: Optional[str] = None,
+    partition_by: Sequence[str] = ("athlete_name",),
+) -> pd.DataFrame:
     """Pull reference data for a specific test type.
 
     Parameters
     ----------
     test_type : str
         Fully qualified table name of the reference data.
-    min_age : int
-        Minimum athlete age to include.
-    max_age : int
+    min_age : int, optional
+        Minimum athlete age to include. Pass ``None`` for both ages to pull
+        the whole table; passing only one of the two raises ``ValueError``.
+    max_age : int, optional
         Maximum athlete age to include.
+    client : google.cloud.bigquery.Client, optional
+        Client used to run the query. Defaults to the shared client from
+        :func:`get_bigquery_client`.
+    columns : sequence of str, optional
+        Columns to return in addition to ``athlete_name``, ``age_at_test``
+        and ``best_by``. Defaults to every column in the table.
+    best_by : str, optional
+        Keep only the row with the highest value of this column for each
+        ``partition_by`` group (one row per athlete by default). Rows with
+        equal values are ordered by the other returned columns, so the same
+        row wins on every pull. The dedupe runs in BigQuery, so the other rows
+        are never transferred.
+    partition_by : sequence of str
+        Columns identifying a group for ``best_by``.
 
     Returns
     -------
     pandas.DataFrame
-        DataFrame containing the requested reference data.
+        DataFrame containing the requested reference data, best rows first
+        when ``best_by`` is given.
     """
+    if (min_age is None) != (max_age is None):
+        raise ValueError("Pass both min_age and max_age, or neither")
+
+    from google.cloud import bigquery
+
     # Connect to BigQuery
-    creds = service_account.Credentials.from_service_account_file(GCP_CREDENTIALS_PATH)
-    client = bigquery.Client(credentials=creds, project=GCP_PROJECT_ID)
+    if client is None:
+        client = get_bigquery_client()
 
     # Build and run query
-    sql = f"""
-        SELECT *
-        FROM `{test_type}`
-        WHERE age_at_test BETWEEN @min_age AND @max_age
-    """
-    job_config = bigquery.QueryJobConfig(
-        query_parameters=[
+    filter_ages = min_age is not None or max_age is not None
+    query_parameters = []
+    if filter_ages:
+        query_parameters = [
             bigquery.ScalarQueryParameter("min_age", "INT64", min_age),
             bigquery.ScalarQueryParameter("max_age", "INT64", max_age),
         ]
-    )
+    sql = build_ref_query(test_type, filter_ages, columns, best_by, partition_by)
+    job_config = bigquery.QueryJobConfig(query_parameters=query_parameters)
     query_job = client.query(sql, job_config=job_config)
-    return query_job.result().to_dataframe()
\ No newline at end of file
+    df = query_job.result().to_dataframe()
+    if _RANK_COLUMN in df.columns:
+        df = df.drop(columns=_RANK_COLUMN).reset_index(drop=True)
+    return df
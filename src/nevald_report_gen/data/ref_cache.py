@@ -0,0 +1,183 @@
+# =================================================================================
+# Local on-disk store for the BigQuery reference tables
+# The reference tables change slowly, so each table is pulled once in full, saved
+# to disk and reused until it is older than the configured TTL (or an explicit
+# refresh is requested). Age windows are sliced from the full table in memory and
+# kept, so every report for a band scores against the same frame.
+# A table may be pulled with a column projection and one row per athlete and age,
+# which is all any age window needs; each projection is cached separately.
+# =================================================================================
+
+# -- IMPORTS ----------------------------------------------------------------------
+import hashlib
+import os
+import re
+import threading
+import time
+from datetime import timedelta
+from pathlib import Path
+from typing import Callable, Dict, Optional, Sequence, Tuple, Union
+
+import pandas as pd
+
+from nevald_report_gen import spans
+from nevald_report_gen.config import REF_CACHE_DIR, REF_CACHE_TTL_HOURS
+from nevald_report_gen.data.pull_ref_data import KEY_COLUMNS, pull_ref
+
+# Called as fetch(table, min_age, max_age[, columns=..., best_by=..., partition_by=...])
+FetchFn = Callable[..., pd.DataFrame]
+
+
+# -- CACHE ------------------------------------------------------------------------
+class ReferenceCache:
+    """Disk-backed cache of full reference tables keyed by table name.
+
+    Each table is pulled once without an age filter and stored as a pickled
+    DataFrame, which preserves the dtypes returned by BigQuery and loads in
+    milliseconds. Loaded tables are also kept in memory, so any
+    ``(min_age, max_age)`` window (HS, College, Pro, ...) is served by filtering
+    ``age_at_test`` locally. Entries older than ``ttl`` are re-pulled on next
+    access.
+
+    Passing ``columns`` and ``best_by`` pulls only those columns and, for each
+    athlete and age, only the row with the highest ``best_by``. Every age
+    window still contains each athlete's best test within the window, while
+    the pull, the file and the in-memory copy shrink to a fraction of the
+    table.
+
+    Windows are kept until their table is reloaded and the same frame is
+    returned for repeated requests, so statistics cached per frame (see
+    :func:`~nevald_report_gen.data.ref_stats.get_distribution`) are reused.
+    Treat returned frames as read-only.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Union[str, Path, None] = None,
+        ttl: Optional[timedelta] = None,
+        fetch: FetchFn = pull_ref,
+    ):
+        self.cache_dir = Path(cache_dir or REF_CACHE_DIR)
+        self.ttl = ttl if ttl is not None else timedelta(hours=REF_CACHE_TTL_HOURS)
+        self.fetch = fetch
+        # (table, projection key) -> (time the data was pulled, full table)
+        self._tables: Dict[Tuple[str, Optional[str]], Tuple[float, pd.DataFrame]] = {}
+        # (table, projection key, min_age, max_age) -> (full table it was cut from, window)
+        self._windows: Dict[Tuple[str, Optional[str], int, int], Tuple[pd.DataFrame, pd.DataFrame]] = {}
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Internal helpers
+    def _path(self, table: str, query_key: Optional[str] = None) -> Path:
+        safe_table = re.sub(r"[^A-Za-z0-9_-]", "_", table)
+        suffix = f"-{query_key}" if query_key else ""
+        return self.cache_dir / f"{safe_table}{suffix}.pkl"
+
+    @staticmethod
+    def _query_key(columns: Optional[Sequence[str]], best_by: Optional[str]) -> Optional[str]:
+        """Short stable name for a projection; ``None`` for the whole table."""
+        if columns is None and best_by is None:
+            return None
+        spec = repr((sorted(columns) if columns is not None else None, best_by))
+        return hashlib.sha1(spec.encode()).hexdigest()[:12]
+
+    def _is_fresh(self, pulled_at: float) -> bool:
+        return time.time() - pulled_at < self.ttl.total_seconds()
+
+    def _read(self, path: Path) -> Optional[Tuple[float, pd.DataFrame]]:
+        try:
+            pulled_at = path.stat().st_mtime
+            if not self._is_fresh(pulled_at):
+                return None
+            return pulled_at, pd.read_pickle(path)
+        except FileNotFoundError:
+            return None
+        except Exception:
+            return None  # Corrupt or incompatible entry, re-pull it
+
+    def _write(self, path: Path, df: pd.DataFrame) -> None:
+        # Write to a temporary file first so concurrent readers never see a
+        # partially written entry
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        df.to_pickle(tmp_path)
+        os.replace(tmp_path, path)
+
+    # ------------------------------------------------------------------
+    # Public API
+    def get_table(
+        self,
+        table: str,
+        refresh: bool = False,
+        columns: Optional[Sequence[str]] = None,
+        best_by: Optional[str] = None,
+    ) -> pd.DataFrame:
+        """Return the reference table (or its projection), pulling it only when needed."""
+        query_key = self._query_key(columns, best_by)
+        with self._lock, spans.span("reference.table", table=table) as stage:
+            source = "memory"
+            entry = None if refresh else self._tables.get((table, query_key))
+            if entry is None or not self._is_fresh(entry[0]):
+                source = "disk"
+                path = self._path(table, query_key)
+                entry = None if refresh else self._read(path)
+                if entry is None:
+                    source = "bigquery"
+                    if query_key is None:
+                        df = self.fetch(table, None, None)
+                    else:
+                        df = self.fetch(table, None, None, columns=columns, best_by=best_by,
+                                        partition_by=KEY_COLUMNS)
+                    self._write(path, df)
+                    entry = (time.time(), df)
+                self._tables[(table, query_key)] = entry
+            stage.set(source=source, cache_hit=source != "bigquery", rows=len(entry[1]))
+            return entry[1]
+
+    def get(
+        self,
+        table: str,
+        min_age: int,
+        max_age: int,
+        refresh: bool = False,
+        columns: Optional[Sequence[str]] = None,
+        best_by: Optional[str] = None,
+    ) -> pd.DataFrame:
+        """Return the rows of ``table`` with ``min_age <= age_at_test <= max_age``.
+
+        With ``best_by`` only each athlete's best test within the window is
+        kept, highest ``best_by`` first.
+        """
+        df = self.get_table(table, refresh=refresh, columns=columns, best_by=best_by)
+        key = (table, self._query_key(columns, best_by), min_age, max_age)
+        with self._lock:
+            cached = self._windows.get(key)
+            if cached is not None and cached[0] is df:
+                return cached[1]
+            window = df[df["age_at_test"].between(min_age, max_age)]
+            if best_by is not None:
+                window = window.sort_values(by=best_by, ascending=False, kind="stable")
+                window = window.drop_duplicates(subset=["athlete_name"], keep="first")
+            self._windows[key] = (df, window)
+            return window
+
+    def clear(self) -> None:
+        """Remove every cached entry so the next access pulls fresh data."""
+        with self._lock:
+            self._tables.clear()
+            self._windows.clear()
+            if not self.cache_dir.exists():
+                return
+            for path in self.cache_dir.glob("*.pkl"):
+                path.unlink(missing_ok=True)
+
+
+_default_cache: Optional[ReferenceCache] = None
+
+
+def get_reference_cache() -> ReferenceCache:
+    """Return the process-wide reference cache using the configured location."""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = ReferenceCache()
+    return _default_cache
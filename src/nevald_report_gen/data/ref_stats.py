@@ -0,0 +1,83 @@
+# =================================================================================
+# Precomputed statistics over the reference distributions
+# Every report scores the athlete against the same reference columns, so each
+# column is summarised once per reference frame (one frame per table and age
+# band): percentile queries become binary searches over the sorted values and
+# z-scores reuse the stored mean and standard deviation.
+# =================================================================================
+
+# -- IMPORTS ----------------------------------------------------------------------
+import threading
+import weakref
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+
+# -- DISTRIBUTIONS ----------------------------------------------------------------
+class ReferenceDistribution:
+    """Sorted values and moments of one reference metric for one cohort.
+
+    ``count``, ``mean`` and ``std`` (sample standard deviation) describe the
+    non-missing values, as ``Series.dropna()`` would. Percentiles match
+    ``scipy.stats.percentileofscore(values, score, kind='rank')``, including its
+    NaN handling: a NaN score gives NaN, and so does every score if the
+    reference itself contains NaN.
+    """
+
+    def __init__(self, values):
+        arr = pd.to_numeric(pd.Series(values), errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+        missing = np.isnan(arr)
+        present = arr[~missing]
+        self.n_missing = int(missing.sum())
+        self.count = len(present)
+        self.mean = float(present.mean()) if self.count else np.nan
+        self.std = float(present.std(ddof=1)) if self.count > 1 else np.nan
+        self.sorted_values = np.sort(present)
+
+    def __len__(self) -> int:
+        return len(self.sorted_values)
+
+    def percentiles(self, scores) -> np.ndarray:
+        """Return the percentile rank of each score in ``scores``."""
+        scores = np.asarray(scores, dtype=float)
+        n = len(self.sorted_values)
+        if n == 0 or self.n_missing:
+            return np.full(scores.shape, np.nan)
+        left = np.searchsorted(self.sorted_values, scores, side="left")
+        right = np.searchsorted(self.sorted_values, scores, side="right")
+        result = (left + right + (left < right)) * (50.0 / n)
+        return np.where(np.isnan(scores), np.nan, result)
+
+    def percentile(self, score: float) -> float:
+        """Return the percentile rank of a single score."""
+        return float(self.percentiles(score))
+
+
+# -- CACHE ------------------------------------------------------------------------
+# id(reference frame) -> column -> distribution. Entries are dropped when the
+# frame is garbage collected, so ids are never reused while cached.
+_distributions: Dict[int, Dict[str, ReferenceDistribution]] = {}
+_lock = threading.Lock()
+
+
+def get_distribution(ref_df: pd.DataFrame, column: str) -> ReferenceDistribution:
+    """Return the cached :class:`ReferenceDistribution` for ``ref_df[column]``.
+
+    Reference frames are treated as read-only once loaded; a frame that is
+    modified in place keeps serving the distribution built before the change.
+    :class:`~nevald_report_gen.data.ref_cache.ReferenceCache` returns the same
+    frame for every request for a table and age band, so the columns are
+    sorted once per band rather than once per report.
+    """
+    key = id(ref_df)
+    with _lock:
+        columns = _distributions.get(key)
+        if columns is None:
+            columns = _distributions[key] = {}
+            weakref.finalize(ref_df, _distributions.pop, key, None)
+        dist = columns.get(column)
+        if dist is None:
+            dist = columns[column] = ReferenceDistribution(ref_df[column])
+    return dist
@@ -13,10 +13,6 @@ from tkinter import messagebox
 from datetime import datetime
 from pathlib import Path
 import sys
-import os
-
-import matplotlib
-matplotlib.use('Agg')
 
 # Handle imports for both direct execution and module execution
 if __name__ == "__main__":
@@ -26,15 +22,20 @@ if __name__ == "__main__":
     sys.path.insert(0, str(project_root))
     # Also add the src directory to make nevald_report_gen importable
     sys.path.insert(0, str(project_root / "src"))
-    # Use absolute imports
-    from nevald_report_gen.api.vald_client import ValdClient
-    from nevald_report_gen.reports.data_loader import DataLoader
-    from nevald_report_gen.reports.FD_PDF_V1 import generate_athlete_pdf
-else:
-    # When running as a module, use relative imports
-    from .api.vald_client import ValdClient
-    from .reports.data_loader import DataLoader
-    from .reports.FD_PDF_V1 import generate_athlete_pdf
+
+# The VALD client, report and reference modules pull in pandas, matplotlib,
+# reportlab and BigQuery. They are imported by the background threads that use
+# them, so the window appears without waiting for those imports.
+
+# Age band selected when the app opens; its reference data is prefetched
+DEFAULT_AGE_RANGE = "College (18-22)"
+
+
+def downloads_report_path(athlete_name, test_date):
+    """Return the file in the user's Downloads folder a report is saved to."""
+    downloads_path = Path.home() / "Downloads"
+    downloads_path.mkdir(exist_ok=True)
+    return downloads_path / f"{athlete_name.replace(' ', '_')}_{test_date:%Y%m%d}.pdf"
 
 
 class DesktopApp(tk.Tk):
@@ -44,10 +45,9 @@ class DesktopApp(tk.Tk):
         super().__init__()
         self.title("VALD Report Generator")
         self.geometry("500x500")
-        self.client = ValdClient()
-        # Cache all profiles so we can provide auto-complete suggestions
-        self.profiles = self.client.get_profiles()
-        self.current_profiles = self.profiles
+        self.client = None
+        self.profile_index = None
+        self.current_profiles = []
         self.current_dates = []
         self.age_ranges = {
             "HS (14-18)": (14, 18),
@@ -55,8 +55,44 @@ class DesktopApp(tk.Tk):
             "Pro (21-35)": (21, 35),
         }
         self._build_widgets()
-        # Populate list with all athlete names on start
+        # Connect and load profiles in the background; the window is usable
+        # for typing straight away and fills in once the profiles arrive
+        self.generate_button.config(state=tk.DISABLED)
+        self.status_label.config(text="Connecting to VALD...")
+        threading.Thread(target=self._warm_up, daemon=True).start()
+
+    # ------------------------------------------------------------------
+    def _warm_up(self):
+        """Connect, index the profiles and prefetch report inputs off the UI thread."""
+        try:
+            from nevald_report_gen.api.vald_client import ValdClient
+
+            client = ValdClient()
+            self.after(0, lambda: self.status_label.config(text="Loading athlete profiles..."))
+            profile_index = client.get_profile_index()
+        except Exception as exc:  # pragma: no cover - UI thread
+            def handle_error(error=exc):
+                self.status_label.config(text=f"Could not load athletes: {error}")
+            self.after(0, handle_error)
+            return
+        self.after(0, lambda: self._on_profiles_loaded(client, profile_index))
+
+        # Warm the reference cache for the default band and import the report
+        # modules, so the first report does not wait for either
+        try:
+            from nevald_report_gen.data.pull_all import pull_all_ref
+            import nevald_report_gen.reports.FD_PDF_V1  # noqa: F401
+
+            pull_all_ref(*self.age_ranges[DEFAULT_AGE_RANGE])
+        except Exception:  # pragma: no cover - retried when a report is generated
+            pass
+
+    def _on_profiles_loaded(self, client, profile_index):
+        self.client = client
+        self.profile_index = profile_index
         self._update_athlete_list()
+        self.generate_button.config(state=tk.NORMAL)
+        self.status_label.config(text=f"Loaded {len(profile_index)} athletes.")
 
     # ------------------------------------------------------------------
     def _build_widgets(self):
@@ -79,7 +115,7 @@ class DesktopApp(tk.Tk):
         age_frame = tk.Frame(self)
         age_frame.pack(fill="x", padx=10, pady=5)
         tk.Label(age_frame, text="Reference Age Range:").pack(side="left")
-        self.age_var = tk.StringVar(value="College (18-22)")
+        self.age_var = tk.StringVar(value=DEFAULT_AGE_RANGE)
         tk.OptionMenu(age_frame, self.age_var, *self.age_ranges.keys()).pack(
             side="left", padx=5
         )
@@ -94,17 +130,16 @@ class DesktopApp(tk.Tk):
     # ------------------------------------------------------------------
     def _update_athlete_list(self):
         """Refresh the athlete list based on the current search query."""
-        query = self.search_var.get().strip().lower()
+        if self.profile_index is None:
+            return
+        matches = self.profile_index.search(self.search_var.get())
+        if matches == self.current_profiles:
+            return
+        self.current_profiles = matches
         self.athlete_listbox.delete(0, tk.END)
         self.date_listbox.delete(0, tk.END)
-        if query:
-            matches = self.profiles[self.profiles["fullName"].str.contains(query, case=False)]
-        else:
-            matches = self.profiles
-        self.current_profiles = matches.reset_index(drop=True)
-        for name in self.current_profiles["fullName"]:
-            # Display athlete names with capitalized first and last names
-            self.athlete_listbox.insert(tk.END, name.title())
+        # Display athlete names with capitalized first and last names
+        self.athlete_listbox.insert(tk.END, *(name.title() for name, _ in matches))
 
     # ------------------------------------------------------------------
     def on_athlete_select(self, _event):
@@ -113,7 +148,7 @@ class DesktopApp(tk.Tk):
             return
         index = sel[0]
         athlete_name = self.athlete_listbox.get(index)
-        profile_id = self.current_profiles.iloc[index]["profileId"]
+        profile_id = self.current_profiles[index][1]
         first_date = datetime(2020, 1, 1)
         tests = self.client.get_tests_by_profile(first_date, profile_id)
         self.date_listbox.delete(0, tk.END)
@@ -141,19 +176,17 @@ class DesktopApp(tk.Tk):
 
         def worker():
             try:
+                from nevald_report_gen.reports.data_loader import DataLoader
+                from nevald_report_gen.reports.FD_PDF_V1 import generate_athlete_pdf
+
                 loader = DataLoader()
                 min_age, max_age = self.age_ranges[self.age_var.get()]
                 athlete_df, ref_data = loader.load(
                     athlete_name, test_date, min_age, max_age, client=self.client
                 )
-                # Ensure Downloads folder exists and create the output path
-                downloads_path = Path.home() / "Downloads"
-                downloads_path.mkdir(exist_ok=True)
-                output_path = (
-                    downloads_path
-                    / f"{athlete_name.replace(' ', '_')}_{test_date:%Y%m%d}.pdf"
-                )
-                # Generate the PDF and get the actual saved path
+                # The Downloads folder is this app's sink; generate_athlete_pdf
+                # also accepts any writable binary stream
+                output_path = downloads_report_path(athlete_name, test_date)
                 saved_path = generate_athlete_pdf(
                     athlete_name, test_date, output_path, athlete_df, ref_data
                 )
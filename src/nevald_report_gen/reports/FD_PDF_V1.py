@@ -10,37 +10,29 @@
 # -- IMPORTS ----------------------------------------------------------------------
 import io  # For image conversion
 import math  # For mathematical operations
+import os  # For output file sizes
 from datetime import datetime  # For date operations
+from functools import lru_cache  # For caching shared resources
 from pathlib import Path  # For file operations
 
-import matplotlib
-import matplotlib.pyplot as plt  # Matplotlib for plotting
 import numpy as np  # Numpy for numerical operations
 import pandas as pd  # For data manipulation
-from matplotlib.patches import Circle, RegularPolygon, Wedge  # Matplotlib for plotting
-from matplotlib.projections import register_projection  # Matplotlib for plotting
-from matplotlib.projections.polar import PolarAxes  # Matplotlib for plotting
-from matplotlib.spines import Spine  # Matplotlib for plotting
-from matplotlib.transforms import Affine2D  # Matplotlib for plotting
 from reportlab.lib import colors  # Reportlab for colors
 from reportlab.lib.colors import white  # Reportlab for black color
 from reportlab.lib.pagesizes import letter, landscape, portrait  # Reportlab for PDF generation
 from reportlab.lib.utils import ImageReader  # Reportlab for image conversion
 from reportlab.pdfgen import canvas  # Reportlab for PDF generation
 from reportlab.platypus import Table, TableStyle  # Reportlab for tables
-from scipy import stats  # For statistical operations
 import textwrap  # For wrapping text
 
-matplotlib.use("Agg")
-
+from nevald_report_gen import spans  # For per-stage timing
 from nevald_report_gen.config import MEDIA_DIR
-from nevald_report_gen.reports.charts import (
-    composite_score_chart,
-    radar_factory,
+from nevald_report_gen.reports.vector_charts import (
+    composite_chart_drawing,
+    draw_drawing,
+    spider_chart_drawing,
 )
-from nevald_report_gen.data.pull_all import pull_all_ref
-from nevald_report_gen.api.ind_ath_data import get_athlete_data
-from nevald_report_gen.api.vald_client import ValdClient
+from nevald_report_gen.data.ref_stats import get_distribution
 
 # -- CONSTANTS --------------------------------------------------------------------
 # Centralized styling constants for easy layout tweaks
@@ -59,9 +51,43 @@ LOGO_PATH = str(Path(MEDIA_DIR) / "horizontal throwing.png")
 LOGO_SIZE = (72 * 2, 72 / 2)  # width, height
 SPIDER_CHART_SIZE = (270, 180)
 COMPOSITE_CHART_SIZE = (200, 200)
+# Spider chart axes, in drawing order
+SPIDER_LABELS = (
+    "CMJ Peak Power",
+    "CMJ Con. Imp.",
+    "CMJ Ecc. Braking RFD",
+    "PPU Peak Con. Force",
+    "PPU Ecc. Braking RFD",
+    "IMTP Peak Force",
+    "HJ RSI",
+)
+# "png" rasterises the matplotlib charts; "vector" draws them as PDF paths
+CHART_BACKENDS = ("png", "vector")
+
+# Composite score weights: athlete metric -> (reference table, reference column, weight)
+COMPOSITE_WEIGHTS = {
+    'CMJ_BODY_WEIGHT_LBS_Trial_lb': ('cmj', 'BODY_WEIGHT_LBS_Trial_lb', 0.1),
+    'CMJ_PEAK_TAKEOFF_POWER_Trial_W': ('cmj', 'PEAK_TAKEOFF_POWER_Trial_W', 0.3),
+    'CMJ_CONCENTRIC_IMPULSE_Trial_Ns': ('cmj', 'CONCENTRIC_IMPULSE_Trial_Ns', 0.15),
+    'CMJ_ECCENTRIC_BRAKING_RFD_Trial_N/s': ('cmj', 'ECCENTRIC_BRAKING_RFD_Trial_N_s', 0.15),
+    'PPU_PEAK_CONCENTRIC_FORCE_Trial_N': ('ppu', 'PEAK_CONCENTRIC_FORCE_Trial_N', 0.1),
+    'IMTP_PEAK_VERTICAL_FORCE_Trial_N': ('imtp', 'PEAK_VERTICAL_FORCE_Trial_N', 0.1),
+    'HJ_AVJ_RSI_Trial_': ('hj', 'hop_rsi_avg_best_5', 0.1),
+}
 
 
 # -- DRAWING HELPERS --------------------------------------------------------------
+@lru_cache(maxsize=4)
+def load_logo(path):
+    """Read the logo once per process; each PDF then embeds it as one shared image."""
+    return ImageReader(path)
+
+
+def _check_chart_backend(backend):
+    if backend not in CHART_BACKENDS:
+        raise ValueError(f"Unsupported chart backend: {backend}")
+
+
 def draw_header(c, athlete_name, test_date_formatted, width, height,
                 fonts=None, colors=None, name_coords=(25, 45),
                 desc_coords=(25, 80)):
@@ -90,39 +116,45 @@ def draw_header(c, athlete_name, test_date_formatted, width, height,
     logo_w, logo_h = LOGO_SIZE
     logo_x = width - logo_w - 25
     logo_y = 18
-    c.drawImage(LOGO_PATH, logo_x, logo_y, width=logo_w, height=logo_h, mask='auto')
+    c.drawImage(load_logo(LOGO_PATH), logo_x, logo_y, width=logo_w, height=logo_h, mask='auto')
+
+
+def _place_chart(c, chart, chart_coords, chart_size):
+    """Draw a chart built by one of the ``build_*_chart`` helpers onto ``c``."""
+    if isinstance(chart, ImageReader):
+        c.drawImage(chart, chart_coords[0], chart_coords[1],
+                    width=chart_size[0], height=chart_size[1], mask='auto')
+    else:
+        draw_drawing(c, chart, *chart_coords)
+
+
+def build_spider_chart(spider_data, labels, chart_size=SPIDER_CHART_SIZE,
+                       line_color="cornflowerblue", fill_color="cornflowerblue", backend="png"):
+    """Build the spider chart without touching a canvas (image or ``Drawing``)."""
+    _check_chart_backend(backend)
+    with spans.span("report.spider_chart", backend=backend):
+        if backend == "vector":
+            return spider_chart_drawing(spider_data, labels, chart_size,
+                                        line_color=line_color, fill_color=fill_color)
+        # matplotlib is only imported once a PNG chart is needed
+        from nevald_report_gen.reports.charts import get_spider_renderer
+
+        renderer = get_spider_renderer(tuple(labels), line_color=line_color, fill_color=fill_color)
+        return renderer.render(spider_data)
 
 
 def draw_spider_chart(c, width, height, spider_data, labels,
                       chart_size=SPIDER_CHART_SIZE,
                       line_color="cornflowerblue", fill_color="cornflowerblue",
-                      chart_coords=None):
-    """Draw the radar/spider chart representing percentile data."""
-    chart_coords = chart_coords or (width / 2 - 25, height - 300)
-    N = len(labels)
-    theta = radar_factory(N, frame='polygon')
-    fig, ax = plt.subplots(figsize=(8, 8), subplot_kw=dict(projection='radar'))
-    ax.set_ylim(0, 100)
-    for r in [25, 50, 75, 100]:
-        points = [(angle, r) for angle in theta] + [(theta[0], r)]
-        ax.plot([p[0] for p in points], [p[1] for p in points],
-                color='gray', lw=2, alpha=0.3)
-    for angle in theta:
-        ax.plot([angle, angle], [0, 100], color='gray', lw=2, alpha=0.3)
-    ax.plot(theta, spider_data, color=line_color, linewidth=5,
-            marker='o', markersize=10)
-    ax.fill(theta, spider_data, color=fill_color, alpha=0.2)
-    ax.set_varlabels(labels)
-    ax.set_yticks([0, 25, 50, 75, 100])
-    ax.set_yticklabels(["0", "25", "50", "75", "100"], fontsize=12)
-    plt.tight_layout(pad=0.5)
+                      chart_coords=None, backend="png", chart=None):
+    """Draw the radar/spider chart representing percentile data.
 
-    buf = io.BytesIO()
-    fig.savefig(buf, format='png', bbox_inches='tight')
-    buf.seek(0)
-    img = ImageReader(buf)
-    c.drawImage(img, chart_coords[0], chart_coords[1],
-                chart_size[0], chart_size[1], mask='auto')
+    Pass ``chart`` from :func:`build_spider_chart` to draw a chart built earlier.
+    """
+    chart_coords = chart_coords or (width / 2 - 25, height - 300)
+    if chart is None:
+        chart = build_spider_chart(spider_data, labels, chart_size, line_color, fill_color, backend)
+    _place_chart(c, chart, chart_coords, chart_size)
 
 
 def draw_textbox(c, x, y, width, height, text,
@@ -139,63 +171,103 @@ def draw_textbox(c, x, y, width, height, text,
         text_obj.textLine(line)
     c.drawText(text_obj)
 
+def composite_weights(ref_data, weights=COMPOSITE_WEIGHTS):
+    """Map each composite metric to its cached reference statistics and weight."""
+    return {
+        metric: (get_distribution(ref_data[table], col), weight)
+        for metric, (table, col, weight) in weights.items()
+    }
+
+
+# Standard normal CDF, Phi(z) = erfc(-z / sqrt(2)) / 2, as scipy.stats.norm.cdf
+# computes it; the stdlib erfc avoids importing scipy.stats for one function
+_erfc = np.vectorize(math.erfc, otypes=[float])
+
+
+def norm_cdf(z):
+    """Standard normal cumulative distribution function, elementwise."""
+    return 0.5 * _erfc(-np.asarray(z, dtype=float) / math.sqrt(2))
+
+
+def zscore_composite_scores(values, ref_stats, weights, present=None):
+    """Composite percentile scores for many athletes at once.
+
+    ``values`` is an (athletes x metrics) array aligned with ``ref_stats`` and
+    ``weights``. ``present`` marks the metrics each athlete has a row for and
+    defaults to the non-NaN values. Weights are normalised over the present
+    metrics; metrics with a NaN value, an empty reference or a zero spread add
+    nothing to the composite. Athletes with no present metric score 0.
+    """
+    values = np.atleast_2d(np.asarray(values, dtype=float))
+    present = ~np.isnan(values) if present is None else np.atleast_2d(np.asarray(present, dtype=bool))
+    weights = np.asarray(weights, dtype=float)
+    means = np.array([s.mean for s in ref_stats], dtype=float)
+    stds = np.array([s.std for s in ref_stats], dtype=float)
+    usable = np.array([s.count > 0 and s.std != 0 for s in ref_stats], dtype=bool)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        z_scores = np.clip((values - means) / stds, -3, 3)
+    counted = present & usable & ~np.isnan(values)
+    weighted = np.where(counted, z_scores * weights, 0.0).sum(axis=1)
+    total_weight = present @ weights
+    composite_z = np.divide(weighted, total_weight, out=np.zeros_like(weighted), where=total_weight != 0)
+
+    scores = np.round(norm_cdf(composite_z) * 100, 2)
+    return np.where(present.any(axis=1), scores, 0)
+
+
 def calculate_zscore_composite(athlete_data, weights):
     """Calculate a composite percentile score using weighted z-scores.
 
     Each metric in ``weights`` contributes a z-score that is multiplied by its
     respective weight. The weighted z-scores are summed and converted to a
-    0–100 percentile scale."""
-
-    valid_metrics = set(weights.keys())
-    athlete_data = athlete_data[athlete_data["metric_id"].isin(valid_metrics)]
+    0–100 percentile scale. ``weights`` maps metrics to
+    ``(ReferenceDistribution, weight)`` as built by :func:`composite_weights`;
+    ``(ref_df, ref_col, weight)`` tuples are still accepted."""
+
+    metrics = list(weights)
+    ref_stats, metric_weights = [], []
+    for info in weights.values():
+        if len(info) == 3:
+            ref_df, ref_col, weight = info
+            info = (get_distribution(ref_df, ref_col), weight)
+        ref_stats.append(info[0])
+        metric_weights.append(info[1])
+
+    athlete_values = athlete_data.drop_duplicates("metric_id").set_index("metric_id")["Value"]
+    present = np.array([metric in athlete_values.index for metric in metrics], dtype=bool)
+    if not present.any():
+        return 0
+    values = pd.to_numeric(athlete_values.reindex(metrics), errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+    return zscore_composite_scores(values, ref_stats, metric_weights, present)[0]
 
-    used_weights = {
-        metric: info
-        for metric, info in weights.items()
-        if metric in athlete_data["metric_id"].values
-    }
+def build_composite_chart(percentile_score, chart_size=COMPOSITE_CHART_SIZE, backend="png"):
+    """Build the composite score gauge without touching a canvas (image or ``Drawing``)."""
+    _check_chart_backend(backend)
+    with spans.span("report.composite_chart", backend=backend):
+        if backend == "vector":
+            return composite_chart_drawing(percentile_score, chart_size)
+        from nevald_report_gen.reports.charts import composite_score_chart
 
-    if not used_weights:
-        return 0
+        return composite_score_chart(percentile_score)
 
-    total_weight = sum(w for (_, _, w) in used_weights.values())
-    composite_z = 0.0
-
-    for metric, (ref_df, ref_col, weight) in used_weights.items():
-        norm_weight = weight / total_weight if total_weight else 0
-        ref_series = pd.to_numeric(ref_df[ref_col], errors="coerce").dropna()
-        if ref_series.empty:
-            continue
-        ref_mean = ref_series.mean()
-        ref_std = ref_series.std()
-        if ref_std == 0:
-            continue
-        row = athlete_data.loc[athlete_data["metric_id"] == metric, "Value"]
-        if row.empty:
-            continue
-        temp_val = pd.to_numeric(row.iloc[0], errors="coerce")
-        if pd.isna(temp_val):
-            continue
-        z_score = (float(temp_val) - ref_mean) / ref_std
-        z_score = max(min(z_score, 3), -3)
-        composite_z += z_score * norm_weight
-
-    percentile_score = stats.norm.cdf(composite_z) * 100
-    return round(percentile_score, 2)
 
 def draw_composite_score(c, width, percentile_score,
                          chart_coords=None,
                          chart_size=COMPOSITE_CHART_SIZE,
-                         fonts=None, text_box=None):
-    """Draw the composite score gauge and descriptive text."""
+                         fonts=None, text_box=None, backend="png", chart=None):
+    """Draw the composite score gauge and descriptive text.
+
+    Pass ``chart`` from :func:`build_composite_chart` to draw a gauge built earlier.
+    """
     fonts = fonts or {"title": ("Helvetica-Bold", 10),
                       "body": ("Helvetica", 10)}
     chart_coords = chart_coords or (width / 2 + 25, 250)
     text_box = text_box or (20, 380, 300, 300)
 
-    composite_figure = composite_score_chart(percentile_score)
-    c.drawImage(composite_figure, chart_coords[0], chart_coords[1],
-                width=chart_size[0], height=chart_size[1], mask='auto')
+    if chart is None:
+        chart = build_composite_chart(percentile_score, chart_size, backend)
+    _place_chart(c, chart, chart_coords, chart_size)
 
     c.setFont(*fonts["title"])
     c.drawString(25, 390, f"Composite Score: {percentile_score}")
@@ -208,35 +280,27 @@ def draw_composite_score(c, width, percentile_score,
 
 
 # -- PDF GENERATION FUNCTIONS ------------------------------------------------------
-def generate_athlete_pdf(
+def draw_athlete_report(
+    c,
     athlete_name,
     test_date,
-    output_path,
     athlete_df,
     ref_data,
-    composite_method="z_score"
+    composite_method="z_score",
+    chart_backend="png",
 ):
+    """Draw one athlete's report onto the current page of canvas ``c``.
+
+    The athlete's metrics, the composite score and both charts are computed
+    before anything is drawn, so an athlete with missing or unusable data
+    raises without leaving a half-drawn page behind.
+    """
     #0.0 format the date into a string
     test_date_formatted = test_date.strftime("%B %d, %Y")
-
-    # 1.1) Set up the PDF canvas
-    c = canvas.Canvas(str(output_path), pagesize=portrait(letter))
     width, height = portrait(letter)
 
-    # 1.2) Page Formatting
-    draw_header(c, athlete_name, test_date_formatted, width, height)
-
-
     # 1.3.0) Drawing in the athlete spider chart (right side of page)
-    athlete_name = athlete_name.lower().strip()
-    labels = [
-        "CMJ Peak Power", 
-        "CMJ Con. Imp.", 
-        "CMJ Ecc. Braking RFD", 
-        "PPU Peak Con. Force", 
-        "PPU Ecc. Braking RFD", 
-        "IMTP Peak Force", 
-        "HJ RSI"]
+    labels = list(SPIDER_LABELS)
     # 1.3.1) Reading all of the athlete data and reference data
     athlete_data = athlete_df
     imtp_ref_data = ref_data["imtp"]
@@ -250,39 +314,52 @@ def generate_athlete_pdf(
     # 1.3.2.0) CMJ metrics
         #Peak Power
     athlete_cmj_peak = round(athlete_data[athlete_data['metric_id'] == 'CMJ_PEAK_TAKEOFF_POWER_Trial_W']['Value'].values[0], 2)
-    cmj_pp_percentile = round(stats.percentileofscore(cmj_ref_data['PEAK_TAKEOFF_POWER_Trial_W'], athlete_cmj_peak), 2)
+    cmj_pp_percentile = round(get_distribution(cmj_ref_data, 'PEAK_TAKEOFF_POWER_Trial_W').percentile(athlete_cmj_peak), 2)
         #Concentric Impulse
     athlete_cmj_con_imp = round(athlete_data[athlete_data['metric_id'] == 'CMJ_CONCENTRIC_IMPULSE_Trial_Ns']['Value'].values[0], 2)
-    cmj_con_imp_percentile = round(stats.percentileofscore(cmj_ref_data['CONCENTRIC_IMPULSE_Trial_Ns'], athlete_cmj_con_imp), 2)
+    cmj_con_imp_percentile = round(get_distribution(cmj_ref_data, 'CONCENTRIC_IMPULSE_Trial_Ns').percentile(athlete_cmj_con_imp), 2)
         #Eccentric Braking RFD
     athlete_cmj_eb_rfd = round(athlete_data[athlete_data['metric_id'] == 'CMJ_ECCENTRIC_BRAKING_RFD_Trial_N/s']['Value'].values[0], 2)
-    cmj_eb_rfd_percentile = round(stats.percentileofscore(cmj_ref_data['ECCENTRIC_BRAKING_RFD_Trial_N_s'], athlete_cmj_eb_rfd), 2)
+    cmj_eb_rfd_percentile = round(get_distribution(cmj_ref_data, 'ECCENTRIC_BRAKING_RFD_Trial_N_s').percentile(athlete_cmj_eb_rfd), 2)
         #Body Mass Relative Takeoff Power
     athlete_cmj_bm_rel_peak = round(athlete_data[athlete_data['metric_id'] == 'CMJ_BODYMASS_RELATIVE_TAKEOFF_POWER_Trial_W/kg']['Value'].values[0], 2)
-    cmj_bm_rel_peak_percentile = round(stats.percentileofscore(cmj_ref_data['BODYMASS_RELATIVE_TAKEOFF_POWER_Trial_W_kg'], athlete_cmj_bm_rel_peak), 2)
+    cmj_bm_rel_peak_percentile = round(get_distribution(cmj_ref_data, 'BODYMASS_RELATIVE_TAKEOFF_POWER_Trial_W_kg').percentile(athlete_cmj_bm_rel_peak), 2)
     
     # 1.3.2.1) Second is PPU metrics
         #Peak Concentric Force
     athlete_ppu_peak = round(athlete_data[athlete_data['metric_id'] == 'PPU_PEAK_CONCENTRIC_FORCE_Trial_N']['Value'].values[0], 2)
-    ppu_percentile = round(stats.percentileofscore(ppu_ref_data['PEAK_CONCENTRIC_FORCE_Trial_N'], athlete_ppu_peak), 2)
+    ppu_percentile = round(get_distribution(ppu_ref_data, 'PEAK_CONCENTRIC_FORCE_Trial_N').percentile(athlete_ppu_peak), 2)
         #Eccentric Braking RFD
     athlete_ppu_eb_rfd = round(athlete_data[athlete_data['metric_id'] == 'PPU_ECCENTRIC_BRAKING_RFD_Trial_N/s']['Value'].values[0], 2)
-    ppu_eb_rfd_percentile = round(stats.percentileofscore(ppu_ref_data['ECCENTRIC_BRAKING_RFD_Trial_N_s_'], athlete_ppu_eb_rfd), 2)
+    ppu_eb_rfd_percentile = round(get_distribution(ppu_ref_data, 'ECCENTRIC_BRAKING_RFD_Trial_N_s_').percentile(athlete_ppu_eb_rfd), 2)
     
     # 1.3.2.2) Third is IMTP metrics
         #Peak Vertical Force
     athlete_imtp_peak = round(athlete_data[athlete_data['metric_id'] == 'IMTP_PEAK_VERTICAL_FORCE_Trial_N']['Value'].values[0], 2)  
-    imtp_percentile = round(stats.percentileofscore(imtp_ref_data['PEAK_VERTICAL_FORCE_Trial_N'], athlete_imtp_peak), 2)
+    imtp_percentile = round(get_distribution(imtp_ref_data, 'PEAK_VERTICAL_FORCE_Trial_N').percentile(athlete_imtp_peak), 2)
    
     # 1.3.2.4) Fourth is HJ metrics
 
     athlete_hj_rsi = round(athlete_data[athlete_data['metric_id'] == 'HJ_AVJ_RSI_Trial_']['Value'].values[0], 2)
-    hj_percentile = round(stats.percentileofscore(hj_ref_data['hop_rsi_avg_best_5'], athlete_hj_rsi), 2)
+    hj_percentile = round(get_distribution(hj_ref_data, 'hop_rsi_avg_best_5').percentile(athlete_hj_rsi), 2)
    
     # 1.3.3) Compiling all percentile values together
     spider_data = [cmj_pp_percentile, cmj_con_imp_percentile, cmj_eb_rfd_percentile, ppu_percentile, ppu_eb_rfd_percentile, imtp_percentile, hj_percentile]
-    # 1.3.4) Creating and displaying the spider chart
-    draw_spider_chart(c, width, height, spider_data, labels)
+
+    # 1.3.5) Composite score and both charts, before anything is drawn
+    weights = composite_weights(ref_data)
+    if composite_method == "z_score":
+        percentile_score = calculate_zscore_composite(athlete_data, weights)
+    else:
+        raise ValueError(f"Unsupported composite method: {composite_method}")
+    spider_chart = build_spider_chart(spider_data, labels, backend=chart_backend)
+    composite_chart = build_composite_chart(percentile_score, backend=chart_backend)
+
+    # 1.2) Page Formatting
+    draw_header(c, athlete_name, test_date_formatted, width, height)
+
+    # 1.3.4) Displaying the spider chart
+    draw_spider_chart(c, width, height, spider_data, labels, chart=spider_chart)
 
     # 1.4) Displaying individual metric data
     spacing = 17
@@ -312,19 +389,7 @@ def generate_athlete_pdf(
     c.drawString(25, top - 14 * spacing, f"HJ Reactive Strength Index: {athlete_hj_rsi} - {hj_percentile}%")
 
     # 1.6) Displaying the athlete's composite score work in progress
- 
-    weights = {'CMJ_BODY_WEIGHT_LBS_Trial_lb': (cmj_ref_data, 'BODY_WEIGHT_LBS_Trial_lb', 0.1),
-               'CMJ_PEAK_TAKEOFF_POWER_Trial_W': (cmj_ref_data, 'PEAK_TAKEOFF_POWER_Trial_W', 0.3),
-               'CMJ_CONCENTRIC_IMPULSE_Trial_Ns': (cmj_ref_data, 'CONCENTRIC_IMPULSE_Trial_Ns', 0.15),
-               'CMJ_ECCENTRIC_BRAKING_RFD_Trial_N/s': (cmj_ref_data, 'ECCENTRIC_BRAKING_RFD_Trial_N_s', 0.15),
-               'PPU_PEAK_CONCENTRIC_FORCE_Trial_N': (ppu_ref_data, 'PEAK_CONCENTRIC_FORCE_Trial_N', 0.1),
-               'IMTP_PEAK_VERTICAL_FORCE_Trial_N': (imtp_ref_data, 'PEAK_VERTICAL_FORCE_Trial_N', 0.1),
-               'HJ_AVJ_RSI_Trial_': (hj_ref_data, 'hop_rsi_avg_best_5', 0.1)}
-    if composite_method == "z_score":
-        percentile_score = calculate_zscore_composite(athlete_data, weights)
-    else:
-        raise ValueError(f"Unsupported composite method: {composite_method}")
-    draw_composite_score(c, width, percentile_score)
+    draw_composite_score(c, width, percentile_score, chart=composite_chart)
 
     # 1.7) Coaches Notes
     c.setFont("Helvetica-Bold", 10)
@@ -335,16 +400,74 @@ def generate_athlete_pdf(
         c.line(25, i, width - 25, i)
 
 
-    # Saving the PDF
+def is_stream(output):
+    """Return True if ``output`` is a writable binary stream rather than a path."""
+    return hasattr(output, "write")
+
+
+def _stream_position(output):
+    """Current position of a seekable stream, or None."""
     try:
-        c.save()
-        print(f"PDF successfully saved to: {output_path}")
-    except Exception as e:
-        print(f"Error saving PDF: {e}")
-        raise e
-    
+        return output.tell()
+    except (AttributeError, OSError):
+        return None
+
+
+def generate_athlete_pdf(
+    athlete_name,
+    test_date,
+    output_path,
+    athlete_df,
+    ref_data,
+    composite_method="z_score",
+    chart_backend="png",
+):
+    """Render an athlete's report to ``output_path``.
+
+    ``output_path`` is either a file path or a writable binary stream (an open
+    file, ``io.BytesIO``, an HTTP response body, ...). Nothing is written until
+    the page is complete. Returns the path as a string, or the stream itself.
+    """
+    with spans.span("report", backend=chart_backend):
+        # 1.1) Set up the PDF canvas
+        target = output_path if is_stream(output_path) else str(output_path)
+        c = canvas.Canvas(target, pagesize=portrait(letter))
+        with spans.span("report.draw"):
+            draw_athlete_report(c, athlete_name, test_date, athlete_df, ref_data,
+                                composite_method=composite_method, chart_backend=chart_backend)
+
+        # Saving the PDF
+        with spans.span("report.save") as stage:
+            start = _stream_position(output_path) if is_stream(output_path) else None
+            try:
+                c.save()
+                if not is_stream(output_path):
+                    print(f"PDF successfully saved to: {output_path}")
+            except Exception as e:
+                print(f"Error saving PDF: {e}")
+                raise e
+            if not is_stream(output_path):
+                stage.set(bytes=os.path.getsize(output_path))
+            elif start is not None:
+                stage.set(bytes=output_path.tell() - start)
+
     # Return the output path for confirmation
-    return str(output_path)
+    return output_path if is_stream(output_path) else str(output_path)
+
+
+def render_athlete_pdf(
+    athlete_name,
+    test_date,
+    athlete_df,
+    ref_data,
+    composite_method="z_score",
+    chart_backend="png",
+):
+    """Render an athlete's report in memory and return the PDF bytes."""
+    buf = io.BytesIO()
+    generate_athlete_pdf(athlete_name, test_date, buf, athlete_df, ref_data,
+                         composite_method=composite_method, chart_backend=chart_backend)
+    return buf.getvalue()
 
 # -- CALLING/TESTING PDF GENERATION -----------------------------------------------
 # Calling an example with good data (Ace Kelly) (uncomment to run)
@@ -0,0 +1,403 @@
+"""Batch generation of athlete reports for a whole roster.
+
+A testing day can produce reports for a hundred or more athletes. Rather than
+running every athlete through :class:`DataLoader` one at a time, the batch
+engine fetches the inputs that are shared by every report (the tenant profile
+list and the reference data for the chosen age range) once, then fans the
+per-athlete VALD fetches and PDF rendering out over a process pool. With
+``--packet`` the reports are written as pages of a single PDF instead; workers
+only fetch the athlete data and pages are drawn in roster order as it arrives.
+``--trace`` writes a JSON line per timed stage (token, profiles, trial
+downloads, reference tables, charts, save) from every process.
+
+Example
+-------
+    vald-report-batch roster.csv --date 2025-09-08 --min-age 18 --max-age 22
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import os
+from contextlib import nullcontext
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from nevald_report_gen import spans
+from nevald_report_gen.config import PDF_OUTPUT_DIR
+from nevald_report_gen.api.vald_client import ValdClient
+from nevald_report_gen.api.ind_ath_data import get_athlete_data
+from nevald_report_gen.data.pull_all import pull_all_ref
+from nevald_report_gen.reports.FD_PDF_V1 import generate_athlete_pdf
+from nevald_report_gen.reports.document import ReportDocument
+
+SUMMARY_FILENAME = "batch_summary.csv"
+# Requests per second allowed across the whole batch; split between workers
+BATCH_RATE_LIMIT_PER_SEC = 5
+
+
+@dataclass(frozen=True)
+class BatchJob:
+    """A single athlete/test date pair to generate a report for."""
+
+    athlete_name: str
+    test_date: date
+
+
+@dataclass
+class BatchResult:
+    """Outcome of a single :class:`BatchJob`."""
+
+    athlete_name: str
+    test_date: date
+    output_path: Optional[str] = None
+    error: Optional[str] = None
+    # Spans recorded for this job in a worker process, when tracing
+    spans: List[dict] = field(default_factory=list, repr=False)
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def report_filename(athlete_name: str, test_date: date) -> str:
+    """Return the file name used for an athlete's report."""
+    return f"{athlete_name.replace(' ', '_')}_{test_date:%Y%m%d}.pdf"
+
+
+def build_jobs(athletes: Iterable[str], test_dates: Sequence[date]) -> List[BatchJob]:
+    """Return a job for every athlete on every test date."""
+    return [BatchJob(name.strip(), d) for name in athletes if name.strip() for d in test_dates]
+
+
+def load_roster(path: Path, test_dates: Sequence[date] = ()) -> List[BatchJob]:
+    """Read a roster file and return the jobs it describes.
+
+    The roster is a CSV file with an ``athlete_name`` column and an optional
+    ``test_date`` column (``YYYY-MM-DD``). Rows without a date are generated for
+    every date in ``test_dates``. A file without a header row is treated as a
+    plain list of athlete names, one per line.
+    """
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        rows = [row for row in csv.reader(f) if row and row[0].strip()]
+    if not rows:
+        return []
+
+    header = [col.strip().lower() for col in rows[0]]
+    if "athlete_name" not in header:
+        return build_jobs((row[0] for row in rows), test_dates)
+
+    name_idx = header.index("athlete_name")
+    date_idx = header.index("test_date") if "test_date" in header else None
+    jobs: List[BatchJob] = []
+    for row in rows[1:]:
+        name = row[name_idx]
+        raw_date = row[date_idx].strip() if date_idx is not None and date_idx < len(row) else ""
+        if raw_date:
+            jobs.extend(build_jobs([name], [_parse_date(raw_date)]))
+        else:
+            jobs.extend(build_jobs([name], test_dates))
+    return jobs
+
+
+def _parse_date(value: str) -> date:
+    return datetime.strptime(value, "%Y-%m-%d").date()
+
+
+# -- PER-ATHLETE WORK -------------------------------------------------------------
+def _fetch_athlete(job: BatchJob, client: ValdClient) -> Tuple[BatchResult, Optional[pd.DataFrame]]:
+    """Fetch one athlete's data, capturing any error in the result."""
+    result = BatchResult(job.athlete_name, job.test_date)
+    try:
+        athlete_df = get_athlete_data(job.athlete_name, job.test_date, client)
+    except Exception as exc:
+        result.error = f"{type(exc).__name__}: {exc}"
+        return result, None
+    if athlete_df is None:
+        result.error = "No complete test session found for this date"
+    return result, athlete_df
+
+
+def _build_report(
+    job: BatchJob,
+    output_dir: Path,
+    client: ValdClient,
+    ref_data: Dict[str, pd.DataFrame],
+) -> BatchResult:
+    """Fetch one athlete's data and render their report, capturing any error."""
+    with spans.span("batch.job", athlete=job.athlete_name):
+        result, athlete_df = _fetch_athlete(job, client)
+        if athlete_df is None:
+            return result
+        try:
+            output_path = output_dir / report_filename(job.athlete_name, job.test_date)
+            result.output_path = generate_athlete_pdf(
+                job.athlete_name, job.test_date, output_path, athlete_df, ref_data
+            )
+        except Exception as exc:
+            result.error = f"{type(exc).__name__}: {exc}"
+        return result
+
+
+# Per-process state for pool workers, set once by ``_init_worker``
+_worker_client: Optional[ValdClient] = None
+_worker_ref_data: Optional[Dict[str, pd.DataFrame]] = None
+
+
+def _init_worker(
+    profiles: pd.DataFrame,
+    ref_data: Dict[str, pd.DataFrame],
+    rate_limit_per_sec: float,
+    use_tenant_index: bool,
+    trace: bool = False,
+) -> None:
+    """Create the worker's client and store the shared batch inputs."""
+    global _worker_client, _worker_ref_data
+    if trace:
+        spans.enable()
+    _worker_client = ValdClient(rate_limit_per_sec=rate_limit_per_sec, burst=1)
+    _worker_client.set_profiles(profiles)
+    if use_tenant_index:
+        # The parent has just synced the on-disk index; this only picks up
+        # tests modified since then
+        _worker_client.sync_tenant_tests()
+    _worker_ref_data = ref_data
+
+
+def _collect_spans(result: BatchResult) -> BatchResult:
+    """Move the worker's recorded spans onto ``result`` for the parent to write."""
+    recorder = spans.get_recorder()
+    if recorder is not None:
+        result.spans = recorder.spans()
+        recorder.clear()
+    return result
+
+
+def _run_job(job: BatchJob, output_dir: Path) -> BatchResult:
+    assert _worker_client is not None and _worker_ref_data is not None
+    return _collect_spans(_build_report(job, output_dir, _worker_client, _worker_ref_data))
+
+
+def _run_fetch(job: BatchJob) -> Tuple[BatchResult, Optional[pd.DataFrame]]:
+    assert _worker_client is not None
+    with spans.span("batch.job", athlete=job.athlete_name):
+        result, athlete_df = _fetch_athlete(job, _worker_client)
+    return _collect_spans(result), athlete_df
+
+
+def _failed(job: BatchJob, exc: Exception) -> BatchResult:
+    """Result for a job whose worker crashed before producing one."""
+    return BatchResult(job.athlete_name, job.test_date, error=f"{type(exc).__name__}: {exc}")
+
+
+def _write_packet(
+    fetched: Iterable[Tuple[BatchResult, Optional[pd.DataFrame]]],
+    packet_path: Path,
+    ref_data: Dict[str, pd.DataFrame],
+) -> List[BatchResult]:
+    """Draw every fetched athlete as a page of one PDF, in the order given."""
+    results: List[BatchResult] = []
+    document = ReportDocument(packet_path)
+    for result, athlete_df in fetched:
+        if athlete_df is not None:
+            try:
+                document.add_report(result.athlete_name, result.test_date, athlete_df, ref_data)
+                result.output_path = str(packet_path)
+            except Exception as exc:
+                result.error = f"{type(exc).__name__}: {exc}"
+        results.append(result)
+    if document.pages:
+        document.close()
+    else:
+        document.discard()
+    return results
+
+
+# -- BATCH API --------------------------------------------------------------------
+def run_batch(
+    jobs: Sequence[BatchJob],
+    min_age: int,
+    max_age: int,
+    output_dir: Optional[Path] = None,
+    max_workers: Optional[int] = None,
+    client: Optional[ValdClient] = None,
+    refresh_reference: bool = False,
+    packet_name: Optional[str] = None,
+    trace_path: Optional[Path] = None,
+) -> List[BatchResult]:
+    """Generate reports for every job and return a result per job.
+
+    Profiles and reference data are fetched once in the calling process and
+    handed to each worker when it starts. The tenant's test list is synced
+    into the local session index with a few paginated requests, so workers
+    look up each athlete's sessions without a per-athlete request. ``max_workers=1`` runs every job in
+    the calling process, which is convenient for debugging. Set
+    ``refresh_reference`` to re-pull the reference tables instead of using the
+    local cache. Pass ``packet_name`` to write every report into that single
+    PDF in ``output_dir`` rather than one file per athlete. A summary CSV is
+    written alongside the reports. With ``trace_path`` every timed stage, from
+    the calling process and the workers, is appended to that file as JSON lines.
+    """
+    with spans.recording() if trace_path is not None else nullcontext() as recorder:
+        results = _run_batch(jobs, min_age, max_age, output_dir, max_workers, client,
+                             refresh_reference, packet_name, trace_path is not None)
+        if recorder is not None:
+            spans.write_jsonl(recorder.spans() + [s for r in results for s in r.spans], trace_path)
+    return results
+
+
+def _run_batch(
+    jobs: Sequence[BatchJob],
+    min_age: int,
+    max_age: int,
+    output_dir: Optional[Path],
+    max_workers: Optional[int],
+    client: Optional[ValdClient],
+    refresh_reference: bool,
+    packet_name: Optional[str],
+    trace: bool,
+) -> List[BatchResult]:
+    output_dir = Path(output_dir or PDF_OUTPUT_DIR)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    if client is None:
+        client = ValdClient()
+
+    profiles = client.get_profiles()
+    ref_data = pull_all_ref(min_age, max_age, refresh=refresh_reference)
+    use_tenant_index = client.session_index is not None
+    if use_tenant_index:
+        client.sync_tenant_tests()
+
+    packet_path = output_dir / packet_name if packet_name else None
+    results: List[BatchResult] = []
+    if max_workers == 1:
+        if packet_path is not None:
+            results = _write_packet((_fetch_athlete(job, client) for job in jobs), packet_path, ref_data)
+        else:
+            for job in jobs:
+                results.append(_build_report(job, output_dir, client, ref_data))
+    else:
+        # Each worker gets an equal share of the API rate limit
+        workers = max_workers or os.cpu_count() or 1
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(profiles, ref_data, BATCH_RATE_LIMIT_PER_SEC / workers, use_tenant_index, trace),
+        ) as pool:
+            if packet_path is not None:
+                futures = [pool.submit(_run_fetch, job) for job in jobs]
+
+                def fetched():
+                    # Pages follow roster order; each is drawn as soon as its data arrives
+                    for job, future in zip(jobs, futures):
+                        try:
+                            yield future.result()
+                        except Exception as exc:  # worker crashed before producing a result
+                            yield _failed(job, exc), None
+
+                results = _write_packet(fetched(), packet_path, ref_data)
+            else:
+                futures = {pool.submit(_run_job, job, output_dir): job for job in jobs}
+                by_job: Dict[BatchJob, BatchResult] = {}
+                for future in as_completed(futures):
+                    job = futures[future]
+                    try:
+                        by_job[job] = future.result()
+                    except Exception as exc:  # worker crashed before producing a result
+                        by_job[job] = _failed(job, exc)
+                results = [by_job[job] for job in jobs]
+
+    write_summary(results, output_dir / SUMMARY_FILENAME)
+    return results
+
+
+def write_summary(results: Iterable[BatchResult], path: Path) -> None:
+    """Write a per-athlete success/failure summary as CSV."""
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["athlete_name", "test_date", "status", "output_path", "error"])
+        for r in results:
+            writer.writerow(
+                [
+                    r.athlete_name,
+                    r.test_date.isoformat(),
+                    "ok" if r.ok else "failed",
+                    r.output_path or "",
+                    r.error or "",
+                ]
+            )
+
+
+# -- COMMAND LINE -----------------------------------------------------------------
+def _parse_args(argv: Optional[Sequence[str]]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Generate ForceDecks PDF reports for a roster of athletes."
+    )
+    parser.add_argument("roster", type=Path, help="CSV roster (athlete_name[,test_date]) or list of names")
+    parser.add_argument(
+        "--date",
+        dest="dates",
+        action="append",
+        type=_parse_date,
+        default=[],
+        help="Test date (YYYY-MM-DD) for roster rows without one; may be repeated",
+    )
+    parser.add_argument("--min-age", type=int, default=18, help="Reference minimum age")
+    parser.add_argument("--max-age", type=int, default=22, help="Reference maximum age")
+    parser.add_argument("--output", type=Path, default=None, help="Output directory for PDFs")
+    parser.add_argument("--workers", type=int, default=None, help="Number of worker processes")
+    parser.add_argument(
+        "--refresh-reference",
+        action="store_true",
+        help="Re-pull reference data from BigQuery instead of using the local cache",
+    )
+    parser.add_argument(
+        "--packet",
+        default=None,
+        metavar="FILENAME",
+        help="Write all reports into this single PDF in the output directory",
+    )
+    parser.add_argument(
+        "--trace",
+        type=Path,
+        default=None,
+        metavar="FILE",
+        help="Append per-stage timings to this file as JSON lines",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Command line entry point for batch report generation."""
+    args = _parse_args(argv)
+    jobs = load_roster(args.roster, args.dates)
+    if not jobs:
+        print("No athletes to process. Check the roster file and --date options.")
+        return 1
+
+    results = run_batch(
+        jobs,
+        args.min_age,
+        args.max_age,
+        args.output,
+        args.workers,
+        refresh_reference=args.refresh_reference,
+        packet_name=args.packet,
+        trace_path=args.trace,
+    )
+    failed = [r for r in results if not r.ok]
+    for r in results:
+        status = r.output_path if r.ok else f"FAILED - {r.error}"
+        print(f"{r.athlete_name} ({r.test_date:%Y-%m-%d}): {status}")
+    print(f"{len(results) - len(failed)} of {len(results)} reports generated.")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,26 +1,36 @@
 # =================================================================================
 # This script is used to generate the charts needed for the PDF report
 # Spider Chart - Overall display of FD metrics (using percentiles)
+# Composite Chart - Donut gauge of the composite score
+# Each chart's static background is built once and reused; rendering a report
+# only updates the athlete's data artists before saving. Figures are created
+# directly on an Agg canvas rather than through pyplot, so nothing is kept in
+# pyplot's global figure registry and their lifetime is owned by the renderers.
 # =================================================================================
 
 # -- IMPORTS ----------------------------------------------------------------------
-import numpy as np
 import io
+import threading
+from functools import lru_cache
+
+import matplotlib
+import numpy as np
 from reportlab.lib.utils import ImageReader
-from matplotlib.patches import Circle, RegularPolygon, Wedge # Matplotlib for plotting
+from matplotlib.backends.backend_agg import FigureCanvasAgg # Matplotlib for plotting
+from matplotlib.figure import Figure # Matplotlib for plotting
+from matplotlib.patches import Circle, RegularPolygon # Matplotlib for plotting
 from matplotlib.projections.polar import PolarAxes # Matplotlib for plotting
 from matplotlib.projections import register_projection # Matplotlib for plotting
 from matplotlib.spines import Spine # Matplotlib for plotting
 from matplotlib.transforms import Affine2D # Matplotlib for plotting
 from matplotlib.path import Path # Matplotlib for plotting
-import matplotlib
-matplotlib.use('Agg')
-import matplotlib.pyplot as plt # Matplotlib for plotting
 import textwrap # For wrapping text
 
 # -- FUNCTIONS --------------------------------------------------------------------
-# Spider Chart (Change how this returns/works)
-def radar_factory(num_vars, frame='polygon'):
+# Spider Chart projection
+@lru_cache(maxsize=None)
+def _radar_axes_class(num_vars, frame='polygon'):
+    """Build and register the radar projection for ``num_vars`` axes once."""
     # Evenly spaced angles for each axis
     theta = np.linspace(0, 2 * np.pi, num_vars, endpoint=False)
     # Generating polygonal grid lines (not circular)
@@ -31,7 +41,7 @@ def radar_factory(num_vars, frame='polygon'):
             return Path(self.transform(path.vertices), path.codes)
     # Custom axis for the chart and sets first axis to the top
     class RadarAxes(PolarAxes):
-        name = 'radar'
+        name = f'radar-{frame}-{num_vars}'
         PolarTransform = RadarTransform
         def __init__(self, *args, **kwargs):
             super().__init__(*args, **kwargs)
@@ -44,6 +54,7 @@ def radar_factory(num_vars, frame='polygon'):
             lines = super().plot(*args, **kwargs)
             for line in lines:
                 self._close_line(line)
+            return lines
         # Helper function to close the polygon
         def _close_line(self, line):
             x, y = line.get_data()
@@ -81,36 +92,194 @@ def radar_factory(num_vars, frame='polygon'):
                 return {'polar': spine}
             else:
                 raise ValueError("Unknown value for 'frame': %s" % frame)
-    # Registers the projection and returns the angles
     register_projection(RadarAxes)
-    return theta
+    return RadarAxes
 
-# Composite Score Chart
-def composite_score_chart(score):
-    # Initializing values
-    cmap_primary ="cornflowerblue"
-    cmap_bg="lightgrey"
-    size=(4,4)
-    width=0.3
-    fontsize=24
-    if score == -1:
-        values = [0, 100]
-    else:
-        values = [score, 100 - score]
-    colors = [cmap_primary, cmap_bg]
-    # Building figure
-    fig, ax = plt.subplots(figsize=size)
-    wedges, _ = ax.pie(values, colors=colors, startangle=90, counterclock=False, wedgeprops=dict(width=width, edgecolor='white'))
-    ax.set_aspect("equal")
-    ax.axis("off")
-    # Placing score in the middle
-    if score.round(0) == 45 or score == -1:
-        ax.text(0, 0, "NA", ha="center", va="center", fontsize=fontsize, fontweight="bold")
-    else:
-        ax.text(0, 0, f"{score:.0f}", ha="center", va="center", fontsize=fontsize, fontweight="bold")
-    # Saving figure to buffer and converting to image
+
+@lru_cache(maxsize=None)
+def _radar_alias(num_vars, frame='polygon'):
+    return type('RadarAxes', (_radar_axes_class(num_vars, frame),), {'name': 'radar'})
+
+
+def radar_factory(num_vars, frame='polygon'):
+    """Point the ``'radar'`` projection at ``num_vars`` axes and return the angles.
+
+    The projection classes are built once per ``(num_vars, frame)``.
+    """
+    register_projection(_radar_alias(num_vars, frame))
+    return np.linspace(0, 2 * np.pi, num_vars, endpoint=False)
+
+
+def _new_figure(figsize):
+    """Create a figure bound to its own Agg canvas, outside pyplot."""
+    fig = Figure(figsize=figsize)
+    FigureCanvasAgg(fig)
+    return fig
+
+
+def _tight_bbox(fig):
+    """Return the padded bounding box ``bbox_inches='tight'`` would crop ``fig`` to.
+
+    The charts' outer extent is set by their static labels and frame, so the
+    box is computed once per template instead of on every save, which would
+    otherwise draw the figure twice.
+    """
+    bbox = fig.get_tightbbox(fig.canvas.get_renderer())
+    return bbox.padded(matplotlib.rcParams['savefig.pad_inches'])
+
+
+def _png(fig, bbox):
+    """Save ``fig`` cropped to ``bbox`` as a PNG and wrap it for ReportLab."""
     buf = io.BytesIO()
-    fig.savefig(buf, format='png', bbox_inches='tight')
-    plt.close(fig)
+    fig.savefig(buf, format='png', bbox_inches=bbox)
     buf.seek(0)
-    return ImageReader(buf)
\ No newline at end of file
+    return ImageReader(buf)
+
+
+# Shared renderers, one per chart configuration, reused by every report in the
+# process until close_renderers() is called
+_renderers = {}
+_renderers_lock = threading.Lock()
+
+
+def _shared_renderer(key, factory):
+    with _renderers_lock:
+        renderer = _renderers.get(key)
+        if renderer is None:
+            renderer = _renderers[key] = factory()
+    return renderer
+
+
+def close_renderers():
+    """Close every shared renderer; later reports build fresh ones on demand."""
+    with _renderers_lock:
+        renderers = list(_renderers.values())
+        _renderers.clear()
+    for renderer in renderers:
+        renderer.close()
+
+
+# Spider Chart
+class SpiderChartRenderer:
+    """Reusable spider chart for a fixed set of labels.
+
+    The figure, grid polygons, spokes and labels are drawn once; :meth:`render`
+    only moves the athlete's line and filled area before saving. A lock keeps
+    concurrent renders from interleaving their updates. Call :meth:`close`
+    to release the figure.
+    """
+
+    def __init__(self, labels, frame='polygon', line_color="cornflowerblue",
+                 fill_color="cornflowerblue", figsize=(8, 8)):
+        self.labels = tuple(labels)
+        self.theta = radar_factory(len(self.labels), frame=frame)
+        self._lock = threading.Lock()
+        self.fig = _new_figure(figsize)
+        ax = self.fig.add_subplot(projection=_radar_axes_class(len(self.labels), frame).name)
+        ax.set_ylim(0, 100)
+        for r in [25, 50, 75, 100]:
+            ax.plot(np.append(self.theta, self.theta[0]), [r] * (len(self.theta) + 1),
+                    color='gray', lw=2, alpha=0.3)
+        for angle in self.theta:
+            ax.plot([angle, angle], [0, 100], color='gray', lw=2, alpha=0.3)
+        empty = np.zeros(len(self.theta))
+        self._line, = ax.plot(self.theta, empty, color=line_color, linewidth=5,
+                              marker='o', markersize=10)
+        self._area, = ax.fill(self.theta, empty, color=fill_color, alpha=0.2)
+        ax.set_varlabels(self.labels)
+        ax.set_yticks([0, 25, 50, 75, 100])
+        ax.set_yticklabels(["0", "25", "50", "75", "100"], fontsize=12)
+        self.fig.tight_layout(pad=0.5)
+        self.ax = ax
+        # Crop box measured with the data at its outer limit
+        self._update(np.full(len(self.theta), 100.))
+        self._bbox = _tight_bbox(self.fig)
+
+    def _update(self, values):
+        closed_theta = np.append(self.theta, self.theta[0])
+        closed_values = np.append(values, values[0])
+        self._line.set_data(closed_theta, closed_values)
+        self._area.set_xy(np.column_stack([closed_theta, closed_values]))
+
+    def render(self, values):
+        """Draw ``values`` (one percentile per label) and return an ``ImageReader``."""
+        values = np.asarray(values, dtype=float)
+        if values.shape != self.theta.shape:
+            raise ValueError(f"Expected {len(self.theta)} values, got {values.size}")
+        with self._lock:
+            self._update(values)
+            return _png(self.fig, self._bbox)
+
+    def close(self):
+        """Release the figure and its artists; the renderer is unusable afterwards."""
+        with self._lock:
+            if self.fig is not None:
+                self.fig.clear()
+                self.fig = self.ax = None
+
+
+def get_spider_renderer(labels, frame='polygon', line_color="cornflowerblue",
+                        fill_color="cornflowerblue"):
+    """Return the shared :class:`SpiderChartRenderer` for ``labels``."""
+    key = ('spider', tuple(labels), frame, line_color, fill_color)
+    return _shared_renderer(key, lambda: SpiderChartRenderer(
+        labels, frame=frame, line_color=line_color, fill_color=fill_color))
+
+
+# Composite Score Chart
+class CompositeChartRenderer:
+    """Reusable donut gauge for the composite score.
+
+    The pie is built once; :meth:`render` sets the wedge angles and the centre
+    text for each score. Call :meth:`close` to release the figure.
+    """
+
+    # Fraction of a turn where the first wedge starts (12 o'clock)
+    _START = 0.25
+
+    def __init__(self, cmap_primary="cornflowerblue", cmap_bg="lightgrey",
+                 size=(4, 4), width=0.3, fontsize=24):
+        self._lock = threading.Lock()
+        self.fig = _new_figure(size)
+        ax = self.fig.subplots()
+        (self._score_wedge, self._rest_wedge), _ = ax.pie(
+            [0, 100], colors=[cmap_primary, cmap_bg], startangle=90, counterclock=False,
+            wedgeprops=dict(width=width, edgecolor='white'))
+        ax.set_aspect("equal")
+        ax.axis("off")
+        self._text = ax.text(0, 0, "", ha="center", va="center", fontsize=fontsize, fontweight="bold")
+        self.ax = ax
+        self._bbox = _tight_bbox(self.fig)
+
+    def render(self, score):
+        """Draw ``score`` (0-100, or -1 when unavailable) and return an ``ImageReader``."""
+        frac = 0 if score == -1 else score / 100
+        # Same angles ax.pie uses for a clockwise pie starting at the top
+        split = 360. * (self._START - frac)
+        with self._lock:
+            self._score_wedge.set_theta1(min(split, 90.))
+            self._score_wedge.set_theta2(90.)
+            self._rest_wedge.set_theta1(-270.)
+            self._rest_wedge.set_theta2(max(split, -270.))
+            # Placing score in the middle
+            if round(score) == 45 or score == -1:
+                self._text.set_text("NA")
+            else:
+                self._text.set_text(f"{score:.0f}")
+            return _png(self.fig, self._bbox)
+
+    def close(self):
+        """Release the figure and its artists; the renderer is unusable afterwards."""
+        with self._lock:
+            if self.fig is not None:
+                self.fig.clear()
+                self.fig = self.ax = None
+
+
+def get_composite_renderer():
+    """Return the shared :class:`CompositeChartRenderer`."""
+    return _shared_renderer(('composite',), CompositeChartRenderer)
+
+
+def composite_score_chart(score):
+    return get_composite_renderer().render(score)
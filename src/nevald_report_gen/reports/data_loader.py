@@ -14,6 +14,7 @@ from typing import Dict, Tuple
 import pandas as pd
 
 
+from nevald_report_gen import spans
 from nevald_report_gen.config import OUTPUT_DIR
 from nevald_report_gen.api.vald_client import ValdClient
 from nevald_report_gen.api.ind_ath_data import get_athlete_data
@@ -37,12 +38,13 @@ class DataLoader:
     ) -> Tuple[pd.DataFrame, Dict[str, pd.DataFrame]]:
         """Fetch athlete and reference data and return them in memory."""
 
-        if client is None:
-            client = ValdClient()
+        with spans.span("load"):
+            if client is None:
+                client = ValdClient()
 
-        athlete_df = get_athlete_data(athlete_name, test_date, client)
-        ref_data = pull_all_ref(min_age, max_age)
-        return athlete_df, ref_data
+            athlete_df = get_athlete_data(athlete_name, test_date, client)
+            ref_data = pull_all_ref(min_age, max_age)
+            return athlete_df, ref_data
 
 
 def load_athlete_and_reference_data(
@@ -0,0 +1,93 @@
+"""Multi-athlete report documents.
+
+A team packet used to be assembled by generating one PDF per athlete and
+merging the files by hand, with the logo embedded again in every file.
+:class:`ReportDocument` draws each athlete's report as a page of a single
+canvas instead. ReportLab stores an image once per document and reuses it by
+reference, so the logo is written a single time however many pages follow, and
+the standard fonts are declared once for the whole file.
+
+Example
+-------
+    with ReportDocument("team_packet.pdf") as packet:
+        for name, test_date, athlete_df in athletes:
+            packet.add_report(name, test_date, athlete_df, ref_data)
+"""
+
+from pathlib import Path
+from typing import BinaryIO, Dict, Optional, Union
+
+import pandas as pd
+from reportlab.lib.pagesizes import letter, portrait
+from reportlab.pdfgen import canvas
+
+from nevald_report_gen.reports.FD_PDF_V1 import draw_athlete_report, is_stream
+
+
+class ReportDocument:
+    """A PDF with one report page per athlete.
+
+    Each :meth:`add_report` draws and finishes a page; only the page content
+    and images are kept until :meth:`close` writes the file. A report that
+    fails raises before anything is drawn (see :func:`draw_athlete_report`),
+    so the next report still starts on a clean page. When used as a
+    context manager the file is written on a clean exit and discarded if the
+    block raises. ``output`` is a file path or a writable binary stream.
+    ``chart_backend="vector"`` keeps large packets small, since PNG charts are
+    the only per-page images.
+    """
+
+    def __init__(
+        self,
+        output: Union[str, Path, BinaryIO],
+        composite_method: str = "z_score",
+        chart_backend: str = "png",
+    ):
+        self.output = output if is_stream(output) else Path(output)
+        self.composite_method = composite_method
+        self.chart_backend = chart_backend
+        self.pages = 0
+        target = self.output if is_stream(self.output) else str(self.output)
+        self._canvas = canvas.Canvas(target, pagesize=portrait(letter))
+
+    def add_report(
+        self,
+        athlete_name: str,
+        test_date,
+        athlete_df: pd.DataFrame,
+        ref_data: Dict[str, pd.DataFrame],
+    ) -> None:
+        """Draw one athlete's report as the next page."""
+        if self._canvas is None:
+            raise RuntimeError("Document is already closed")
+        draw_athlete_report(
+            self._canvas,
+            athlete_name,
+            test_date,
+            athlete_df,
+            ref_data,
+            composite_method=self.composite_method,
+            chart_backend=self.chart_backend,
+        )
+        self._canvas.showPage()
+        self.pages += 1
+
+    def close(self) -> Optional[str]:
+        """Write the document and return its path (``None`` for a stream)."""
+        if self._canvas is not None:
+            self._canvas.save()
+            self._canvas = None
+        return None if is_stream(self.output) else str(self.output)
+
+    def discard(self) -> None:
+        """Drop the document without writing it."""
+        self._canvas = None
+
+    def __enter__(self) -> "ReportDocument":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()
@@ -0,0 +1,120 @@
+# =================================================================================
+# Vector versions of the report charts, drawn with reportlab.graphics
+# The spider and composite charts are built as ReportLab Drawings and written to
+# the PDF as native vector paths and text, so no PNG has to be rasterised and
+# embedded. Layout mirrors the matplotlib charts in charts.py.
+# =================================================================================
+
+# -- IMPORTS ----------------------------------------------------------------------
+import math
+
+from reportlab.graphics import renderPDF
+from reportlab.graphics.shapes import Circle, Drawing, Line, Polygon, String, Wedge
+from reportlab.lib import colors
+from reportlab.pdfbase.pdfmetrics import stringWidth
+
+# -- CONSTANTS --------------------------------------------------------------------
+GRID_COLOR = colors.Color(0.5, 0.5, 0.5, alpha=0.3)
+BACKGROUND_COLOR = colors.Color(*colors.lightgrey.rgb(), alpha=0.3)
+RINGS = (25, 50, 75, 100)
+
+
+# -- SPIDER CHART -----------------------------------------------------------------
+def _axis_point(cx, cy, radius, angle):
+    """Point at ``radius`` along an axis; angle 0 is straight up, counter-clockwise."""
+    return cx - radius * math.sin(angle), cy + radius * math.cos(angle)
+
+
+def _label_radius_factor(angle):
+    # Labels on the vertical axis sit closer in, as in the matplotlib chart
+    return 1.1 if angle == 0 or angle == math.pi else 1.3
+
+
+def spider_chart_drawing(values, labels, size, line_color="cornflowerblue",
+                         fill_color="cornflowerblue", font_size=7):
+    """Build the radar/spider chart of percentile ``values`` as a ``Drawing``.
+
+    A missing (NaN) percentile is drawn at the centre.
+    """
+    width, height = size
+    n = len(labels)
+    angles = [2 * math.pi * i / n for i in range(n)]
+    cx, cy = width / 2, height / 2
+
+    # Largest radius that keeps every label inside the drawing
+    radius = min(width, height) / 2
+    for label, angle in zip(labels, angles):
+        factor = _label_radius_factor(angle)
+        half_w = stringWidth(label, "Helvetica", font_size) / 2
+        if abs(math.sin(angle)) > 1e-9:
+            radius = min(radius, (width / 2 - half_w) / (factor * abs(math.sin(angle))))
+        if abs(math.cos(angle)) > 1e-9:
+            radius = min(radius, (height / 2 - font_size / 2) / (factor * abs(math.cos(angle))))
+    scale = radius / 100
+
+    def ring(r):
+        points = []
+        for angle in angles:
+            points.extend(_axis_point(cx, cy, r * scale, angle))
+        return points
+
+    d = Drawing(width, height)
+    d.add(Polygon(ring(100), fillColor=BACKGROUND_COLOR, strokeColor=None))
+    for r in RINGS:
+        d.add(Polygon(ring(r), fillColor=None, strokeColor=GRID_COLOR, strokeWidth=1))
+    for angle in angles:
+        d.add(Line(cx, cy, *_axis_point(cx, cy, radius, angle), strokeColor=GRID_COLOR, strokeWidth=1))
+    d.add(Polygon(ring(100), fillColor=None, strokeColor=colors.black, strokeWidth=0.5))
+    # Ring values sit just left of the top axis, like matplotlib's radial labels
+    for r in RINGS:
+        x, y = _axis_point(cx, cy, r * scale, math.pi / 8)
+        d.add(String(x, y - font_size / 3, str(r), fontName="Helvetica", fontSize=font_size - 1,
+                     textAnchor="middle"))
+
+    line = colors.toColor(line_color)
+    points = []
+    for value, angle in zip(values, angles):
+        points.extend(_axis_point(cx, cy, (0 if math.isnan(value) else max(value, 0)) * scale, angle))
+    fill = colors.Color(*colors.toColor(fill_color).rgb(), alpha=0.2)
+    d.add(Polygon(points, fillColor=fill, strokeColor=line, strokeWidth=2.5, strokeLineJoin=1))
+    for i in range(0, len(points), 2):
+        d.add(Circle(points[i], points[i + 1], 2.5, fillColor=line, strokeColor=None))
+
+    for label, angle in zip(labels, angles):
+        x, y = _axis_point(cx, cy, _label_radius_factor(angle) * radius, angle)
+        d.add(String(x, y - font_size / 3, label, fontName="Helvetica", fontSize=font_size,
+                     textAnchor="middle"))
+    return d
+
+
+# -- COMPOSITE SCORE CHART --------------------------------------------------------
+def composite_chart_drawing(score, size, cmap_primary="cornflowerblue",
+                            cmap_bg="lightgrey", width=0.3, font_size=20):
+    """Build the composite score donut gauge as a ``Drawing``.
+
+    ``score`` is 0-100, or -1 (or NaN) when unavailable.
+    """
+    if math.isnan(score):
+        score = -1
+    w, h = size
+    cx, cy = w / 2, h / 2
+    outer = min(w, h) / 2 * 0.9
+    inner = outer * (1 - width)
+    frac = 0 if score == -1 else min(max(score / 100, 0), 1)
+    split = 90 - 360 * frac
+
+    d = Drawing(w, h)
+    wedge_style = dict(radius1=inner, strokeColor=colors.white, strokeWidth=1)
+    if frac < 1:
+        d.add(Wedge(cx, cy, outer, -270, split, fillColor=colors.toColor(cmap_bg), **wedge_style))
+    if frac > 0:
+        d.add(Wedge(cx, cy, outer, split, 90, fillColor=colors.toColor(cmap_primary), **wedge_style))
+    text = "NA" if score == -1 or round(score) == 45 else f"{score:.0f}"
+    d.add(String(cx, cy - font_size / 3, text, fontName="Helvetica-Bold", fontSize=font_size,
+                 textAnchor="middle"))
+    return d
+
+
+def draw_drawing(c, drawing, x, y):
+    """Render ``drawing`` onto canvas ``c`` with its lower-left corner at (x, y)."""
+    renderPDF.draw(drawing, c, x, y)
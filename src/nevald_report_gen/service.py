@@ -0,0 +1,392 @@
+"""Local HTTP service for athlete lookups and report generation.
+
+Every copy of the desktop app fetches its own token, downloads the full profile
+list and pulls the reference tables before it can build a report. The report
+service keeps one warm :class:`ValdClient` and one set of reference data per age
+band for the whole facility and answers lookups and report requests over HTTP.
+Identical report requests (same athlete, date, band and chart backend) that
+arrive while a build is running wait for that build instead of starting another.
+
+Endpoints
+---------
+    GET /health
+    GET /metrics
+    GET /athletes?q=<part of a name>
+    GET /athletes/<profileId>/dates
+    GET /report?athlete=<name>&date=YYYY-MM-DD&band=hs|college|pro[&chart_backend=vector]
+
+``/report`` also accepts ``min_age`` and ``max_age`` in place of ``band``.
+``/metrics`` returns per-stage timings in the Prometheus text format when the
+service was given a :class:`~nevald_report_gen.spans.Recorder`.
+
+Example
+-------
+    vald-report-service --port 8765
+    curl -o report.pdf "http://127.0.0.1:8765/report?athlete=Ace%20Kelly&date=2025-09-08&band=college"
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from http import HTTPStatus
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Sequence, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import pandas as pd
+
+from nevald_report_gen import spans
+from nevald_report_gen.config import REF_CACHE_TTL_HOURS, SERVICE_HOST, SERVICE_PORT
+from nevald_report_gen.api.vald_client import FIRST_VALD_DATE, ValdClient
+from nevald_report_gen.api.ind_ath_data import SESSION_TESTS, get_athlete_data
+from nevald_report_gen.data.pull_all import pull_all_ref
+from nevald_report_gen.reports.FD_PDF_V1 import CHART_BACKENDS, render_athlete_pdf
+
+# Age bands offered by the desktop app, by short name
+AGE_BANDS = {
+    "hs": (14, 18),
+    "college": (18, 22),
+    "pro": (21, 35),
+}
+# Longest request line or header accepted from a client
+MAX_LINE_BYTES = 8192
+DEFAULT_SEARCH_LIMIT = 50
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class HTTPError(Exception):
+    """An error answered to the client with ``status`` and a JSON message."""
+
+    def __init__(self, status: HTTPStatus, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+# -- REQUEST COALESCING -----------------------------------------------------------
+class Coalescer:
+    """Share one in-flight build between concurrent callers with the same key.
+
+    The first caller for a key starts the build; callers arriving before it
+    finishes await the same result (or exception). Nothing is kept once the
+    build completes, so a later request starts a fresh one. A caller that is
+    cancelled does not cancel the build for the others.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self.started = 0
+        self.coalesced = 0
+
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+    async def run(self, key: Hashable, build: Callable[[], Awaitable[Any]]) -> Any:
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(build())
+            self._inflight[key] = future
+            self.started += 1
+            future.add_done_callback(lambda f: self._finished(key, f))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(future)
+
+    def _finished(self, key: Hashable, future: asyncio.Future) -> None:
+        if self._inflight.get(key) is future:
+            del self._inflight[key]
+        # Mark the exception as retrieved even if every caller has gone away
+        if not future.cancelled():
+            future.exception()
+
+
+# -- SERVICE ----------------------------------------------------------------------
+class ReportService:
+    """Serve athlete lookups and PDF reports from a shared, warm client.
+
+    Blocking work (VALD requests, reference pulls, PDF rendering) runs on a
+    thread pool of ``max_workers`` threads; the client and its rate limiter are
+    shared by all of them. Reference data for each age range is loaded once
+    and reused for ``reference_ttl``, so repeated reports score against the
+    same frames and reuse their precomputed distributions. Athletes' test
+    lists are re-checked once they are older than the client's
+    ``test_list_ttl``, so sessions uploaded while the service runs show up
+    without a restart. ``reference`` and
+    ``athlete_loader`` default to :func:`pull_all_ref` and
+    :func:`get_athlete_data`. Passing ``recorder`` starts span recording into
+    it and serves the totals on ``/metrics``.
+    """
+
+    def __init__(
+        self,
+        client: Optional[ValdClient] = None,
+        reference: Callable[[int, int], Dict[str, pd.DataFrame]] = pull_all_ref,
+        athlete_loader: Callable[[str, date, ValdClient], Optional[pd.DataFrame]] = get_athlete_data,
+        max_workers: int = 4,
+        reference_ttl: Optional[timedelta] = None,
+        recorder: Optional[spans.Recorder] = None,
+    ):
+        if client is None:
+            # Every worker may be downloading a whole session at once
+            client = ValdClient(max_connections=max_workers * SESSION_TESTS)
+        self.client = client
+        self.reference = reference
+        self.athlete_loader = athlete_loader
+        self.reference_ttl = reference_ttl if reference_ttl is not None else timedelta(hours=REF_CACHE_TTL_HOURS)
+        self.coalescer = Coalescer()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="report-service")
+        # (min_age, max_age) -> (loaded at, reference data)
+        self._reference_data: Dict[Tuple[int, int], Tuple[float, Dict[str, pd.DataFrame]]] = {}
+        self.reports_built = 0
+        self.recorder = recorder
+        if recorder is not None:
+            spans.enable(recorder)
+
+    async def _run(self, func, *args):
+        # Bound so spans opened by ``func`` nest under the request's span
+        return await asyncio.get_running_loop().run_in_executor(self._executor, spans.bind(func, *args))
+
+    # ------------------------------------------------------------------
+    # Lookups
+    async def search_athletes(self, query: str = "", limit: int = DEFAULT_SEARCH_LIMIT) -> list:
+        """Return ``{"name", "profileId"}`` for profiles whose name contains ``query``."""
+        index = await self.coalescer.run(("profiles",), lambda: self._run(self.client.get_profile_index))
+        return [{"name": name, "profileId": profile_id} for name, profile_id in index.search(query, limit)]
+
+    async def test_dates(self, profile_id: str) -> list:
+        """Return the dates with a complete test session for ``profile_id``, newest first."""
+        tests = await self.coalescer.run(
+            ("tests", profile_id),
+            lambda: self._run(self.client.get_tests_by_profile, FIRST_VALD_DATE, profile_id),
+        )
+        if tests is None:
+            return []
+        return [d.isoformat() for d in sorted(tests["modifiedDateUtc"].unique(), reverse=True)]
+
+    async def reference_data(self, min_age: int, max_age: int) -> Dict[str, pd.DataFrame]:
+        """Return the reference data for an age range, loading it at most once per TTL."""
+        key = (min_age, max_age)
+        cached = self._reference_data.get(key)
+        if cached is not None and time.monotonic() - cached[0] < self.reference_ttl.total_seconds():
+            return cached[1]
+
+        async def load():
+            ref_data = await self._run(self.reference, min_age, max_age)
+            self._reference_data[key] = (time.monotonic(), ref_data)
+            return ref_data
+
+        return await self.coalescer.run(("reference",) + key, load)
+
+    # ------------------------------------------------------------------
+    # Reports
+    async def report(
+        self,
+        athlete_name: str,
+        test_date: date,
+        min_age: int,
+        max_age: int,
+        chart_backend: str = "png",
+    ) -> bytes:
+        """Build an athlete's report and return the PDF bytes.
+
+        Raises :class:`HTTPError` (404) when the athlete has no complete
+        session on ``test_date``.
+        """
+        athlete_name = " ".join(athlete_name.split())
+        key = ("report", athlete_name.lower(), test_date, min_age, max_age, chart_backend)
+
+        async def build():
+            with spans.span("service.report", backend=chart_backend) as stage:
+                athlete_df, ref_data = await asyncio.gather(
+                    self._run(self.athlete_loader, athlete_name, test_date, self.client),
+                    self.reference_data(min_age, max_age),
+                )
+                if athlete_df is None:
+                    raise HTTPError(HTTPStatus.NOT_FOUND, "No complete test session found for this athlete and date")
+                pdf = await self._run(
+                    render_athlete_pdf, athlete_name, test_date, athlete_df, ref_data, "z_score", chart_backend
+                )
+                stage.set(bytes=len(pdf))
+                self.reports_built += 1
+                return pdf
+
+        return await self.coalescer.run(key, build)
+
+    # ------------------------------------------------------------------
+    # HTTP
+    async def handle(self, method: str, target: str) -> Tuple[HTTPStatus, str, bytes]:
+        """Answer one request and return ``(status, content type, body)``."""
+        if method != "GET":
+            raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED, "Only GET is supported")
+        url = urlsplit(target)
+        params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        parts = [unquote(p) for p in url.path.strip("/").split("/") if p]
+
+        if parts == ["health"]:
+            return _json({"status": "ok", "inflight": len(self.coalescer), "reports_built": self.reports_built})
+        if parts == ["metrics"]:
+            if self.recorder is None:
+                raise HTTPError(HTTPStatus.NOT_FOUND, "Metrics are not being recorded")
+            return HTTPStatus.OK, PROMETHEUS_CONTENT_TYPE, self.metrics().encode()
+        if parts == ["athletes"]:
+            limit = _int_param(params, "limit", DEFAULT_SEARCH_LIMIT)
+            return _json(await self.search_athletes(params.get("q", ""), limit))
+        if len(parts) == 3 and parts[0] == "athletes" and parts[2] == "dates":
+            return _json(await self.test_dates(parts[1]))
+        if parts == ["report"]:
+            athlete_name, test_date, min_age, max_age, chart_backend = _report_params(params)
+            pdf = await self.report(athlete_name, test_date, min_age, max_age, chart_backend)
+            return HTTPStatus.OK, "application/pdf", pdf
+        raise HTTPError(HTTPStatus.NOT_FOUND, f"Unknown path: {url.path}")
+
+    def metrics(self) -> str:
+        """Return stage timings and service counters in the Prometheus text format."""
+        counters = [
+            ("reports_built", self.reports_built, "Reports rendered by the service."),
+            ("builds_started", self.coalescer.started, "Builds started for lookups, reference data and reports."),
+            ("requests_coalesced", self.coalescer.coalesced, "Requests answered by a build already running."),
+        ]
+        transport = self.client.transport.stats.snapshot()
+        counters += [
+            ("vald_requests", transport["requests"], "Attempts sent to the VALD API."),
+            ("vald_retries", transport["retries"], "VALD requests retried after throttling or transient errors."),
+            ("vald_failures", transport["failures"], "VALD requests still failing after every retry."),
+        ]
+        lines = []
+        for name, value, help_text in counters:
+            lines += [f"# HELP nevald_service_{name}_total {help_text}",
+                      f"# TYPE nevald_service_{name}_total counter",
+                      f"nevald_service_{name}_total {value}"]
+        return self.recorder.prometheus() + "\n".join(lines) + "\n"
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            try:
+                method, target = await _read_request(reader)
+                status, content_type, body = await self.handle(method, target)
+            except HTTPError as exc:
+                status, content_type, body = _json({"error": exc.message}, exc.status)
+            except Exception as exc:
+                status, content_type, body = _json(
+                    {"error": f"{type(exc).__name__}: {exc}"}, HTTPStatus.INTERNAL_SERVER_ERROR
+                )
+            writer.write(_response(status, content_type, body))
+            await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass  # client went away
+        finally:
+            writer.close()
+
+    async def start(self, host: str = SERVICE_HOST, port: int = SERVICE_PORT) -> asyncio.AbstractServer:
+        """Start listening and return the server (``port=0`` picks a free port)."""
+        return await asyncio.start_server(self._handle_connection, host, port, limit=MAX_LINE_BYTES)
+
+    async def serve(self, host: str = SERVICE_HOST, port: int = SERVICE_PORT) -> None:
+        """Serve until cancelled, fetching the profile list up front."""
+        await self.search_athletes(limit=0)
+        server = await self.start(host, port)
+        print(f"Serving reports on http://{host}:{port}")
+        async with server:
+            await server.serve_forever()
+
+    def close(self) -> None:
+        """Stop the worker threads once their current work finishes."""
+        self._executor.shutdown(wait=True)
+        if self.recorder is not None and spans.get_recorder() is self.recorder:
+            spans.disable()
+
+
+# -- HTTP HELPERS -----------------------------------------------------------------
+async def _read_request(reader: asyncio.StreamReader) -> Tuple[str, str]:
+    """Read the request line and headers; request bodies are not used."""
+    try:
+        request_line = await reader.readuntil(b"\r\n")
+        while await reader.readuntil(b"\r\n") != b"\r\n":
+            pass
+    except (asyncio.LimitOverrunError, ValueError):
+        raise HTTPError(HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE, "Request header too large")
+    parts = request_line.decode("latin-1").split()
+    if len(parts) != 3 or not parts[2].startswith("HTTP/"):
+        raise HTTPError(HTTPStatus.BAD_REQUEST, "Malformed request line")
+    return parts[0], parts[1]
+
+
+def _response(status: HTTPStatus, content_type: str, body: bytes) -> bytes:
+    head = (
+        f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+        f"Content-Type: {content_type}\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        "Connection: close\r\n\r\n"
+    )
+    return head.encode("latin-1") + body
+
+
+def _json(payload, status: HTTPStatus = HTTPStatus.OK) -> Tuple[HTTPStatus, str, bytes]:
+    return status, "application/json", json.dumps(payload).encode()
+
+
+def _int_param(params: Dict[str, str], name: str, default: Optional[int] = None) -> int:
+    value = params.get(name)
+    if value is None:
+        if default is None:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, f"Missing parameter: {name}")
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise HTTPError(HTTPStatus.BAD_REQUEST, f"{name} must be an integer")
+
+
+def _report_params(params: Dict[str, str]) -> Tuple[str, date, int, int, str]:
+    """Validate the ``/report`` query parameters."""
+    athlete_name = params.get("athlete", "").strip()
+    if not athlete_name:
+        raise HTTPError(HTTPStatus.BAD_REQUEST, "Missing parameter: athlete")
+    try:
+        test_date = datetime.strptime(params.get("date", ""), "%Y-%m-%d").date()
+    except ValueError:
+        raise HTTPError(HTTPStatus.BAD_REQUEST, "date must be given as YYYY-MM-DD")
+    band = params.get("band")
+    if band is not None:
+        if band.lower() not in AGE_BANDS:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, f"band must be one of: {', '.join(AGE_BANDS)}")
+        min_age, max_age = AGE_BANDS[band.lower()]
+    else:
+        min_age, max_age = _int_param(params, "min_age"), _int_param(params, "max_age")
+    chart_backend = params.get("chart_backend", "png")
+    if chart_backend not in CHART_BACKENDS:
+        raise HTTPError(HTTPStatus.BAD_REQUEST, f"chart_backend must be one of: {', '.join(CHART_BACKENDS)}")
+    return athlete_name, test_date, min_age, max_age, chart_backend
+
+
+# -- COMMAND LINE -----------------------------------------------------------------
+def _parse_args(argv: Optional[Sequence[str]]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Serve athlete lookups and ForceDecks PDF reports over HTTP.")
+    parser.add_argument("--host", default=SERVICE_HOST, help="Interface to listen on")
+    parser.add_argument("--port", type=int, default=SERVICE_PORT, help="Port to listen on")
+    parser.add_argument("--workers", type=int, default=4, help="Threads for VALD requests and rendering")
+    parser.add_argument("--no-metrics", action="store_true", help="Do not record stage timings for /metrics")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Command line entry point for the report service."""
+    args = _parse_args(argv)
+    # Only totals are kept, so memory stays flat however long the service runs
+    recorder = None if args.no_metrics else spans.Recorder(max_spans=0)
+    service = ReportService(max_workers=args.workers, recorder=recorder)
+    try:
+        asyncio.run(service.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
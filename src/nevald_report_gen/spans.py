@@ -0,0 +1,285 @@
+"""Per-stage timing for the report pipeline.
+
+Each stage of a report (token, profiles, test lists, trial downloads, reference
+tables, charts, PDF save) runs inside a named span:
+
+    with span("vald.trials", test_type="CMJ") as s:
+        payload = download()
+        s.set(cache_hit=False)
+
+Spans nest: a span opened while another is running records it as its parent,
+and :func:`current` returns the innermost one so lower layers can add to it
+(every VALD request adds its response size to the running stage). Work handed
+to a thread pool keeps its parent when wrapped with :func:`bind`.
+
+Recording is off by default. While it is off :func:`span` and :func:`current`
+return a shared no-op object, so instrumented code costs a global lookup per
+stage. Turn it on with :func:`enable` or the :func:`recording` context manager
+and export what a :class:`Recorder` collected as JSON lines
+(:meth:`Recorder.write_jsonl`) or Prometheus text (:meth:`Recorder.prometheus`).
+"""
+
+import contextvars
+import functools
+import itertools
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO, Any, Dict, Iterable, Iterator, List, Optional, Union
+
+# Innermost open span in the current thread or task
+_current: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("nevald_span", default=None)
+_ids = itertools.count(1)
+
+
+class Span:
+    """One timed stage. Use as a context manager; attributes go in :attr:`attrs`."""
+
+    __slots__ = ("name", "attrs", "span_id", "parent_id", "start", "duration_s", "_recorder", "_token", "_t0")
+
+    def __init__(self, recorder: "Recorder", name: str, attrs: Dict[str, Any]):
+        self.name = name
+        self.attrs = attrs
+        self.span_id = next(_ids)
+        self.parent_id: Optional[int] = None
+        self.start = 0.0
+        self.duration_s = 0.0
+        self._recorder = recorder
+
+    def set(self, **attrs: Any) -> "Span":
+        """Set attributes, replacing earlier values."""
+        self.attrs.update(attrs)
+        return self
+
+    def add(self, **counts: float) -> "Span":
+        """Add to numeric attributes such as ``bytes`` or ``requests``."""
+        for key, value in counts.items():
+            self.attrs[key] = self.attrs.get(key, 0) + value
+        return self
+
+    def __enter__(self) -> "Span":
+        parent = _current.get()
+        self.parent_id = parent.span_id if parent is not None else None
+        self._token = _current.set(self)
+        self.start = time.time()
+        self._t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        self.duration_s = time.perf_counter() - self._t0
+        _current.reset(self._token)
+        if exc_type is not None:
+            self.attrs["error"] = exc_type.__name__
+        self._recorder.record(self)
+        return False
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "pid": os.getpid(),
+            "id": self.span_id,
+            "parent": self.parent_id,
+            "start": round(self.start, 6),
+            "duration_s": round(self.duration_s, 6),
+            **self.attrs,
+        }
+
+
+class _NoopSpan:
+    """Stand-in returned while recording is off; every method does nothing."""
+
+    __slots__ = ()
+
+    def set(self, **attrs: Any) -> "_NoopSpan":
+        return self
+
+    def add(self, **counts: float) -> "_NoopSpan":
+        return self
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        return False
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+# -- RECORDER ---------------------------------------------------------------------
+class StageStats:
+    """Running totals for every span recorded under one name."""
+
+    __slots__ = ("count", "total_s", "max_s", "bytes", "cache_hits", "cache_misses", "errors")
+
+    def __init__(self):
+        self.count = 0
+        self.total_s = 0.0
+        self.max_s = 0.0
+        self.bytes = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.errors = 0
+
+    def update(self, span: Span) -> None:
+        self.count += 1
+        self.total_s += span.duration_s
+        self.max_s = max(self.max_s, span.duration_s)
+        self.bytes += span.attrs.get("bytes", 0)
+        cache_hit = span.attrs.get("cache_hit")
+        if cache_hit is not None:
+            if cache_hit:
+                self.cache_hits += 1
+            else:
+                self.cache_misses += 1
+        if "error" in span.attrs:
+            self.errors += 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+
+# (metric suffix, StageStats attribute, Prometheus type, help text)
+_PROMETHEUS_METRICS = [
+    ("stage_duration_seconds_sum", "total_s", None, None),
+    ("stage_duration_seconds_count", "count", None, None),
+    ("stage_duration_seconds_max", "max_s", "gauge", "Longest single run of each stage."),
+    ("stage_bytes_total", "bytes", "counter", "Bytes transferred or written by each stage."),
+    ("stage_cache_hits_total", "cache_hits", "counter", "Stage runs answered from a cache."),
+    ("stage_cache_misses_total", "cache_misses", "counter", "Stage runs that missed their cache."),
+    ("stage_errors_total", "errors", "counter", "Stage runs that raised an exception."),
+]
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Recorder:
+    """Thread-safe collector of finished spans.
+
+    Totals per span name are kept for the recorder's lifetime; individual
+    spans are kept for the most recent ``max_spans`` (``0`` keeps totals
+    only, which suits a long-running service).
+    """
+
+    def __init__(self, max_spans: Optional[int] = 10000):
+        self._spans: deque = deque(maxlen=max_spans)
+        self._stats: Dict[str, StageStats] = {}
+        self._lock = threading.Lock()
+
+    def record(self, span: Span) -> None:
+        with self._lock:
+            self._spans.append(span)
+            stats = self._stats.get(span.name)
+            if stats is None:
+                stats = self._stats[span.name] = StageStats()
+            stats.update(span)
+
+    def spans(self) -> List[Dict[str, Any]]:
+        """Return the kept spans as dictionaries, in the order they finished."""
+        with self._lock:
+            return [s.to_dict() for s in self._spans]
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Return the totals per span name."""
+        with self._lock:
+            return {name: stats.to_dict() for name, stats in sorted(self._stats.items())}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._spans.clear()
+            self._stats.clear()
+
+    def write_jsonl(self, target: Union[str, Path, IO[str]]) -> None:
+        """Append the kept spans to ``target``; see :func:`write_jsonl`."""
+        write_jsonl(self.spans(), target)
+
+    def prometheus(self, prefix: str = "nevald") -> str:
+        """Return the totals in the Prometheus text exposition format."""
+        stats = self.stats()
+        lines = [
+            f"# HELP {prefix}_stage_duration_seconds Time spent in each report pipeline stage.",
+            f"# TYPE {prefix}_stage_duration_seconds summary",
+        ]
+        for suffix, attr, kind, help_text in _PROMETHEUS_METRICS:
+            metric = f"{prefix}_{suffix}"
+            if kind is not None:
+                lines.append(f"# HELP {metric} {help_text}")
+                lines.append(f"# TYPE {metric} {kind}")
+            for name, values in stats.items():
+                lines.append(f'{metric}{{stage="{_label(name)}"}} {values[attr]}')
+        return "\n".join(lines) + "\n"
+
+
+def write_jsonl(records: Iterable[Dict[str, Any]], target: Union[str, Path, IO[str]]) -> None:
+    """Append span dictionaries to ``target`` (a path or text stream), one JSON object per line."""
+    lines = "".join(json.dumps(record, default=str) + "\n" for record in records)
+    if hasattr(target, "write"):
+        target.write(lines)
+    else:
+        with open(target, "a", encoding="utf-8") as f:
+            f.write(lines)
+
+
+# -- MODULE API -------------------------------------------------------------------
+_recorder: Optional[Recorder] = None
+
+
+def span(name: str, **attrs: Any) -> Union[Span, _NoopSpan]:
+    """Return a span named ``name`` to use as a context manager."""
+    recorder = _recorder
+    if recorder is None:
+        return NOOP_SPAN
+    return Span(recorder, name, attrs)
+
+
+def current() -> Union[Span, _NoopSpan]:
+    """Return the innermost running span, or a no-op span if there is none."""
+    if _recorder is None:
+        return NOOP_SPAN
+    return _current.get() or NOOP_SPAN
+
+
+def bind(func, *args, **kwargs):
+    """Return ``func(*args, **kwargs)`` as a call that runs under the caller's spans.
+
+    Thread pools do not carry context variables into their workers; binding
+    each task before submitting it keeps its spans attached to the caller's.
+    """
+    return functools.partial(contextvars.copy_context().run, func, *args, **kwargs)
+
+
+def enable(recorder: Optional[Recorder] = None) -> Recorder:
+    """Start recording spans into ``recorder`` (a new one by default) and return it."""
+    global _recorder
+    _recorder = recorder if recorder is not None else Recorder()
+    return _recorder
+
+
+def disable() -> Optional[Recorder]:
+    """Stop recording and return the recorder that was in use."""
+    global _recorder
+    recorder, _recorder = _recorder, None
+    return recorder
+
+
+def get_recorder() -> Optional[Recorder]:
+    """Return the active recorder, or ``None`` while recording is off."""
+    return _recorder
+
+
+@contextmanager
+def recording(recorder: Optional[Recorder] = None) -> Iterator[Recorder]:
+    """Record spans for the duration of a ``with`` block."""
+    global _recorder
+    previous = _recorder
+    active = enable(recorder)
+    try:
+        yield active
+    finally:
+        _recorder = previous
@@ -0,0 +1,81 @@
+import sqlite3
+
+import numpy as np
+import pandas as pd
+import pytest
+from PIL import Image
+
+
+class FakeBigQuery:
+    """Local stand-in for ``bigquery.Client`` backed by an in-memory SQLite DB.
+
+    Queries are executed as-is: SQLite accepts backtick-quoted identifiers and
+    ``@name`` parameters, so the SQL built by ``pull_ref`` runs unchanged.
+    """
+
+    def __init__(self):
+        self.conn = sqlite3.connect(":memory:")
+        self.queries = []
+
+    def load_table(self, table, df):
+        df.to_sql(table, self.conn, index=False, if_exists="replace")
+
+    def query(self, sql, job_config=None):
+        self.queries.append(sql)
+        params = {p.name: p.value for p in getattr(job_config, "query_parameters", [])}
+        df = pd.read_sql_query(sql, self.conn, params=params)
+        return _FakeJob(df)
+
+
+class _FakeJob:
+    def __init__(self, df):
+        self._df = df
+
+    def result(self):
+        return self
+
+    def to_dataframe(self):
+        return self._df
+
+
+@pytest.fixture
+def fake_bigquery():
+    return FakeBigQuery()
+
+
+# Reference columns and athlete metrics read by ``generate_athlete_pdf``
+REPORT_REF_COLUMNS = {
+    "cmj": ["BODY_WEIGHT_LBS_Trial_lb", "PEAK_TAKEOFF_POWER_Trial_W", "CONCENTRIC_IMPULSE_Trial_Ns",
+            "ECCENTRIC_BRAKING_RFD_Trial_N_s", "BODYMASS_RELATIVE_TAKEOFF_POWER_Trial_W_kg"],
+    "ppu": ["PEAK_CONCENTRIC_FORCE_Trial_N", "ECCENTRIC_BRAKING_RFD_Trial_N_s_"],
+    "imtp": ["PEAK_VERTICAL_FORCE_Trial_N"],
+    "hj": ["hop_rsi_avg_best_5"],
+}
+REPORT_METRICS = [
+    "CMJ_BODY_WEIGHT_LBS_Trial_lb", "CMJ_PEAK_TAKEOFF_POWER_Trial_W", "CMJ_CONCENTRIC_IMPULSE_Trial_Ns",
+    "CMJ_ECCENTRIC_BRAKING_RFD_Trial_N/s", "CMJ_BODYMASS_RELATIVE_TAKEOFF_POWER_Trial_W/kg",
+    "PPU_PEAK_CONCENTRIC_FORCE_Trial_N", "PPU_ECCENTRIC_BRAKING_RFD_Trial_N/s",
+    "IMTP_PEAK_VERTICAL_FORCE_Trial_N", "HJ_AVJ_RSI_Trial_",
+]
+
+
+@pytest.fixture
+def report_inputs(tmp_path, monkeypatch):
+    """Synthetic ``(athlete_df, ref_data)`` for report generation.
+
+    The Media logo is not part of the repository, so a blank one is written to
+    ``tmp_path`` and patched in.
+    """
+    from nevald_report_gen.reports import FD_PDF_V1
+
+    logo = tmp_path / "logo.png"
+    Image.new("RGB", (144, 36), "white").save(logo)
+    monkeypatch.setattr(FD_PDF_V1, "LOGO_PATH", str(logo))
+
+    rng = np.random.default_rng(0)
+    ref_data = {
+        table: pd.DataFrame({col: rng.normal(1000, 150, 100) for col in cols})
+        for table, cols in REPORT_REF_COLUMNS.items()
+    }
+    athlete_df = pd.DataFrame({"metric_id": REPORT_METRICS, "Value": rng.normal(1000, 200, len(REPORT_METRICS))})
+    return athlete_df, ref_data
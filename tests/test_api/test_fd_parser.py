@@ -0,0 +1,63 @@
+import json
+import random
+
+import pandas as pd
+import pytest
+
+from nevald_report_gen.api.fd_parser import parse_fd_results, parse_fd_results_reference
+from nevald_report_gen.api.metric_vars import METRICS_OF_INTEREST
+
+# (result, limb, unit) triples that map onto metrics of interest, plus noise
+_RESULTS = [
+    ("PEAK_CONCENTRIC_FORCE", "Trial", "Newton"),
+    ("CONCENTRIC_IMPULSE", "Trial", "Newton Second"),
+    ("CONCENTRIC_IMPULSE", "Asym", "Newton Second"),
+    ("RSI_MODIFIED", "Trial", "RSIModified"),
+    ("BODY_WEIGHT_LBS", "Trial", "Pound"),
+    ("PEAK_VERTICAL_FORCE", "Trial", "Newton"),
+    ("HOP_RSI", "Trial", "No Unit"),
+    ("FLIGHT_TIME", "Trial", "Millisecond"),
+    ("JUMP_HEIGHT", "Left", "Centimeter"),
+    ("LANDING_RFD", "Right", "Newton Per Second"),
+]
+
+
+def _payload(n_trials, seed, missing=0.1):
+    rng = random.Random(seed)
+    trials = []
+    for _ in range(n_trials):
+        results = []
+        for result, limb, unit in _RESULTS:
+            value = None if rng.random() < missing else round(rng.uniform(0, 5000), 3)
+            results.append({"value": value, "limb": limb, "definition": {"result": result, "unit": unit}})
+        trials.append({"id": rng.random(), "results": results})
+    return trials
+
+
+@pytest.mark.parametrize("test_type", sorted(METRICS_OF_INTEREST))
+@pytest.mark.parametrize("seed", range(5))
+def test_parser_matches_reference(test_type, seed):
+    payload = _payload(6, seed)
+    expected = parse_fd_results_reference(payload, test_type)
+    result = parse_fd_results(json.dumps(payload).encode(), test_type)
+
+    pd.testing.assert_frame_equal(
+        result, expected.reset_index(drop=True), check_dtype=False
+    )
+
+
+def test_parser_handles_empty_payloads():
+    assert parse_fd_results(b"[]", "CMJ") is None
+    assert parse_fd_results(b'[{"results": []}]', "CMJ") is None
+    assert parse_fd_results(b"{}", "CMJ") is None
+
+
+def test_parser_drops_empty_trials_like_pivot_table():
+    payload = _payload(3, seed=0, missing=0)
+    for res in payload[1]["results"]:
+        res["value"] = None
+    expected = parse_fd_results_reference(payload, "CMJ")
+    result = parse_fd_results(json.dumps(payload), "CMJ")
+
+    assert list(result.columns) == ["metric_id", "trial 1", "trial 3"]
+    pd.testing.assert_frame_equal(result, expected.reset_index(drop=True), check_dtype=False)
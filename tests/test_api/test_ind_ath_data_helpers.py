@@ -1,7 +1,14 @@
+import threading
+import time
+
+import numpy as np
 import pandas as pd
 
+from nevald_report_gen.api.VALDapiHelpers import cmj_z_score
 from nevald_report_gen.api.ind_ath_data import (
+    fetch_session_results,
     select_best_cmj_trial,
+    select_best_cmj_trials,
     select_best_hj_trial,
     select_best_imtp_trial,
     select_best_ppu_trial,
@@ -40,6 +47,37 @@ def test_select_best_cmj_trial():
     pd.testing.assert_frame_equal(result.reset_index(drop=True), expected)
 
 
+def test_select_best_cmj_trials_matches_single_session():
+    rng = np.random.default_rng(0)
+    metrics = [
+        "CONCENTRIC_IMPULSE_Trial_Ns",
+        "ECCENTRIC_BRAKING_RFD_Trial_N/s",
+        "PEAK_CONCENTRIC_FORCE_Trial_N",
+        "BODYMASS_RELATIVE_TAKEOFF_POWER_Trial_W/kg",
+        "RSI_MODIFIED_Trial_RSI_mod",
+        "ECCENTRIC_BRAKING_IMPULSE_Trial_Ns",
+        "JUMP_HEIGHT_IMP_MOM_Trial_cm",
+    ]
+    frames = []
+    for n_trials in (2, 3, 5):
+        data = {"metric_id": metrics}
+        for t in range(1, n_trials + 1):
+            data[f"trial {t}"] = rng.uniform(1, 100, len(metrics))
+        frames.append(pd.DataFrame(data))
+
+    batch = select_best_cmj_trials(frames)
+
+    assert len(batch) == 3
+    for df, result in zip(frames, batch):
+        # Reference: score each trial one at a time
+        indexed = df.set_index("metric_id")
+        trials = [c for c in df.columns if c.startswith("trial")]
+        scores = [round(float(cmj_z_score(*indexed.loc[metrics[:6], t])), 5) for t in trials]
+        best = trials[scores.index(max(scores))]
+        assert list(result["Value"]) == list(df[best])
+        pd.testing.assert_frame_equal(result, select_best_cmj_trial(df))
+
+
 def test_select_best_hj_trial():
     df = pd.DataFrame(
         {
@@ -102,3 +140,30 @@ def test_select_best_ppu_trial():
         }
     )
     pd.testing.assert_frame_equal(result.reset_index(drop=True), expected)
+
+
+def test_fetch_session_results_runs_concurrently():
+    class SlowClient:
+        def __init__(self):
+            self.active = 0
+            self.peak = 0
+            self.lock = threading.Lock()
+
+        def get_fd_results(self, test_id, test_type):
+            with self.lock:
+                self.active += 1
+                self.peak = max(self.peak, self.active)
+            time.sleep(0.05)
+            with self.lock:
+                self.active -= 1
+            return None if test_type == "HJ" else pd.DataFrame({"metric_id": [test_id]})
+
+    sessions = pd.DataFrame(
+        {"testType": ["CMJ", "HJ", "IMTP", "PPU"], "testId": ["t1", "t2", "t3", "t4"]}
+    )
+    client = SlowClient()
+    results = fetch_session_results(client, sessions)
+
+    assert sorted(results) == ["CMJ", "IMTP", "PPU"]
+    assert results["PPU"]["metric_id"].iloc[0] == "t4"
+    assert client.peak > 1
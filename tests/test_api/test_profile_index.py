@@ -0,0 +1,48 @@
+import random
+import string
+
+import pandas as pd
+import pytest
+
+from nevald_report_gen.api.profile_index import ProfileIndex
+
+
+def _profiles(n, seed=0):
+    rng = random.Random(seed)
+    first = ["".join(rng.choices("aeiklmnorst", k=rng.randint(2, 6))) for _ in range(40)]
+    last = ["".join(rng.choices("aeiklmnorst", k=rng.randint(3, 8))) for _ in range(60)]
+    names = [f"{rng.choice(first)} {rng.choice(last)}".title() for _ in range(n)]
+    return pd.DataFrame({"fullName": names, "profileId": [f"p{i}" for i in range(n)]})
+
+
+def test_search_matches_substring_scan():
+    profiles = _profiles(2000)
+    index = ProfileIndex(profiles)
+    rng = random.Random(1)
+    queries = ["", "a", "Ke", "kel", "son", "an s", "zz", "tt"]
+    queries += ["".join(rng.choices(string.ascii_lowercase[:20] + " ", k=rng.randint(1, 6))) for _ in range(200)]
+    queries += [name[i:i + 5] for name in profiles["fullName"].sample(50, random_state=2) for i in (0, 2)]
+
+    for query in queries:
+        expected = profiles[profiles["fullName"].str.contains(query.strip(), case=False, regex=False)]
+        assert index.search(query) == list(zip(expected["fullName"], expected["profileId"])), query
+
+
+def test_lookup_ignores_case_and_spacing_and_prefers_first():
+    profiles = pd.DataFrame({"fullName": ["Ann Lee", "Bo Diaz", "Ann Lee"], "profileId": ["p1", "p2", "p3"]})
+    index = ProfileIndex(profiles)
+
+    assert index.lookup("  ann   LEE ") == "p1"
+    assert index.lookup("bo diaz") == "p2"
+    assert index.lookup("ann") is None
+    assert index.search("ann", limit=1) == [("Ann Lee", "p1")]
+
+
+@pytest.mark.parametrize("profiles", [None, pd.DataFrame()])
+def test_empty_profile_list(profiles):
+    index = ProfileIndex(profiles)
+
+    assert len(index) == 0
+    assert index.search("") == []
+    assert index.search("ann lee") == []
+    assert index.lookup("ann lee") is None
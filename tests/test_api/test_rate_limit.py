@@ -0,0 +1,64 @@
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+
+from nevald_report_gen.api.rate_limit import TokenBucket, parse_retry_after
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_bucket_allows_burst_then_paces():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=5, burst=3, clock=clock)
+
+    waits = [bucket._reserve() for _ in range(5)]
+
+    assert waits[:3] == [0, 0, 0]
+    assert waits[3] == pytest.approx(0.2)
+    assert waits[4] == pytest.approx(0.4)
+
+
+def test_bucket_refills_up_to_burst():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=5, burst=2, clock=clock)
+    bucket._reserve()
+    bucket._reserve()
+
+    clock.now += 10
+    assert [bucket._reserve() for _ in range(3)] == [0, 0, pytest.approx(0.2)]
+
+
+def test_pause_delays_queued_requests():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=5, burst=5, clock=clock)
+
+    bucket.pause(2.0)
+
+    assert bucket._reserve() == pytest.approx(2.0)
+    assert bucket._reserve() == pytest.approx(2.2)
+
+
+def test_acquire_async_shares_the_bucket():
+    bucket = TokenBucket(rate=1000, burst=1)
+
+    async def run():
+        return await asyncio.gather(*(bucket.acquire_async() for _ in range(3)))
+
+    waits = asyncio.run(run())
+    assert waits[0] == 0
+    assert sorted(waits)[-1] > 0
+
+
+def test_parse_retry_after():
+    now = datetime(2025, 1, 1, 12, 0, 0, tzinfo=timezone.utc)
+    assert parse_retry_after("3") == 3
+    assert parse_retry_after("Wed, 01 Jan 2025 12:00:05 GMT", now=now) == 5
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("soon") is None
@@ -0,0 +1,27 @@
+import os
+
+from nevald_report_gen.api.response_cache import TrialCache
+
+
+def test_round_trip_and_persistence(tmp_path):
+    path = tmp_path / "trials.sqlite"
+    cache = TrialCache(path)
+    cache.put("t1", b'[{"results": []}]')
+    cache.close()
+
+    assert TrialCache(path).get("t1") == b'[{"results": []}]'
+    assert TrialCache(path).get("missing") is None
+
+
+def test_evicts_least_recently_used(tmp_path):
+    payload = os.urandom(2000)  # incompressible, ~2 KB stored
+    cache = TrialCache(tmp_path / "trials.sqlite", max_bytes=5000)
+    cache.put("a", payload)
+    cache.put("b", payload)
+    cache.get("a")  # "b" is now the least recently used entry
+    cache.put("c", payload)
+
+    assert len(cache) == 2
+    assert cache.get("b") is None
+    assert cache.get("a") == payload
+    assert cache.get("c") == payload
@@ -0,0 +1,184 @@
+import json
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import pytest
+
+from nevald_report_gen.api.token_gen import TokenManager
+
+
+class FakeAuth:
+    """Stand-in for the auth server handing out numbered tokens."""
+
+    def __init__(self, expires_in=3600, delay=0.0):
+        self.expires_in = expires_in
+        self.delay = delay
+        self.calls = 0
+        self.fail = False
+        self.lock = threading.Lock()
+
+    def __call__(self):
+        time.sleep(self.delay)
+        if self.fail:
+            raise ConnectionError("auth server down")
+        with self.lock:
+            self.calls += 1
+            return f"token-{self.calls}", self.expires_in
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = time.time()
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def cache_file(tmp_path):
+    return tmp_path / "token.json"
+
+
+def test_token_is_kept_in_memory_until_the_refresh_margin(cache_file):
+    auth, clock = FakeAuth(expires_in=3600), FakeClock()
+    manager = TokenManager(cache_file, fetch=auth, refresh_margin=300, clock=clock)
+
+    assert [manager.get() for _ in range(100)] == ["token-1"] * 100
+    cache_file.unlink()  # memory hits do not touch the file
+    clock.now += 3600 - 60 - 301
+    assert manager.get() == "token-1"
+    clock.now += 2
+    assert manager.get() == "token-2"
+    assert auth.calls == 2
+
+
+def test_cache_file_is_shared_and_stays_compatible(cache_file):
+    expires_at = (datetime.now() + timedelta(hours=1)).isoformat()
+    cache_file.write_text(json.dumps({"access_token": "from-file", "expires_at": expires_at}))
+    auth = FakeAuth()
+
+    assert TokenManager(cache_file, fetch=auth).get() == "from-file"
+    assert auth.calls == 0
+
+    cache_file.write_text("{not json")
+    assert TokenManager(cache_file, fetch=auth).get() == "token-1"
+    data = json.loads(cache_file.read_text())
+    assert data["access_token"] == "token-1"
+    assert datetime.fromisoformat(data["expires_at"]) > datetime.now()
+
+
+def test_concurrent_callers_share_one_fetch(cache_file):
+    auth = FakeAuth(delay=0.1)
+    manager = TokenManager(cache_file, fetch=auth)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        tokens = list(pool.map(lambda _: manager.get(), range(8)))
+
+    assert tokens == ["token-1"] * 8
+    assert auth.calls == 1
+
+
+def test_invalidated_token_is_replaced_once(cache_file):
+    auth = FakeAuth()
+    manager = TokenManager(cache_file, fetch=auth)
+    other_process = TokenManager(cache_file, fetch=auth)
+    assert manager.get() == other_process.get() == "token-1"
+
+    manager.invalidate("token-1")
+    manager.invalidate("token-1")
+    assert manager.get() == "token-2"
+    # A stale rejection is ignored once the token has been replaced
+    manager.invalidate("token-1")
+    assert manager.get() == "token-2"
+    other_process.invalidate("token-1")
+    assert other_process.get() == "token-2"
+    assert auth.calls == 2
+
+
+def test_valid_token_survives_auth_outage(cache_file):
+    auth, clock = FakeAuth(expires_in=3600), FakeClock()
+    manager = TokenManager(cache_file, fetch=auth, refresh_margin=300, clock=clock)
+    manager.get()
+    auth.fail = True
+
+    clock.now += 3600 - 60 - 100  # inside the margin but not yet expired
+    assert manager.get() == "token-1"
+    clock.now += 200
+    with pytest.raises(ConnectionError):
+        manager.get()
+
+
+def test_background_refresh_replaces_token_before_expiry(cache_file):
+    auth = FakeAuth(expires_in=60 + 1.5)
+    manager = TokenManager(cache_file, fetch=auth, refresh_margin=0, background_refresh=True)
+    try:
+        assert manager.get() == "token-1"
+        deadline = time.monotonic() + 5
+        while auth.calls < 2 and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert auth.calls >= 2
+        assert manager.get() != "token-1"
+    finally:
+        manager.stop()
+
+
+def _get_token_in_process(cache_file, calls_file, start):
+    def fetch():
+        with open(calls_file, "a") as f:
+            f.write("fetch\n")
+        time.sleep(0.2)
+        return "shared-token", 3600
+
+    start.wait()
+    print(TokenManager(cache_file, fetch=fetch).get())
+
+
+@pytest.mark.skipif("fork" not in multiprocessing.get_all_start_methods(), reason="needs fork")
+def test_processes_fetch_one_token_under_the_file_lock(cache_file, tmp_path):
+    calls_file = tmp_path / "calls.txt"
+    ctx = multiprocessing.get_context("fork")
+    start = ctx.Event()
+    workers = [ctx.Process(target=_get_token_in_process, args=(cache_file, calls_file, start)) for _ in range(4)]
+    for p in workers:
+        p.start()
+    start.set()
+    for p in workers:
+        p.join(10)
+
+    assert [p.exitcode for p in workers] == [0] * 4
+    assert calls_file.read_text() == "fetch\n"
+    assert json.loads(cache_file.read_text())["access_token"] == "shared-token"
+
+
+def _report_manager_state(manager, conn):
+    inherited_thread = manager._thread
+    lock_free = manager._lock.acquire(timeout=1)
+    manager._lock.release()
+    token = manager.get()
+    conn.send((inherited_thread is None, lock_free, token, manager._thread.is_alive()))
+    manager.stop()
+    conn.close()
+
+
+@pytest.mark.skipif("fork" not in multiprocessing.get_all_start_methods(), reason="needs fork")
+def test_forked_child_gets_a_fresh_lock_and_refresh_thread(cache_file):
+    auth = FakeAuth()
+    manager = TokenManager(cache_file, fetch=auth, background_refresh=True)
+    ctx = multiprocessing.get_context("fork")
+    try:
+        assert manager.get() == "token-1"
+        parent_conn, child_conn = ctx.Pipe()
+        # Fork while the parent is in the middle of a refresh
+        with manager._lock:
+            child = ctx.Process(target=_report_manager_state, args=(manager, child_conn))
+            child.start()
+        child.join(10)
+
+        assert child.exitcode == 0
+        assert parent_conn.recv() == (True, True, "token-1", True)
+        assert auth.calls == 1
+    finally:
+        manager.stop()
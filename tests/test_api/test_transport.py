@@ -0,0 +1,180 @@
+import gzip
+import json
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from nevald_report_gen.api import vald_client
+from nevald_report_gen.api.transport import Transport
+
+
+class FakeServer(ThreadingHTTPServer):
+    """Local HTTP/1.1 server whose paths misbehave a set number of times.
+
+    ``/status/<code>/<n>/<name>`` answers ``code`` for the first ``n`` requests,
+    ``/drop/<n>/<name>`` closes the connection without answering for the first
+    ``n``; after that (and for any other path) a gzip-encoded JSON body is sent
+    when the client accepts it.
+    """
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.hits = Counter()
+        self.connections = set()
+        self.gzipped = 0
+        self.lock = threading.Lock()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.hits[self.path] += 1
+            hit = server.hits[self.path]
+            server.connections.add(self.client_address)
+        parts = self.path.strip("/").split("/")
+        if parts[0] == "status" and hit <= int(parts[2]):
+            return self._send(int(parts[1]), b"{}", {"Retry-After": "0"} if parts[1] == "503" else {})
+        if parts[0] == "drop" and hit <= int(parts[1]):
+            self.close_connection = True
+            return
+        body = json.dumps({"path": self.path, "hit": hit}).encode()
+        headers = {"Content-Type": "application/json"}
+        if "gzip" in self.headers.get("Accept-Encoding", ""):
+            body = gzip.compress(body)
+            headers["Content-Encoding"] = "gzip"
+            with server.lock:
+                server.gzipped += 1
+        self._send(200, body, headers)
+
+    do_POST = do_GET
+
+    def _send(self, status, body, headers):
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def server():
+    srv = FakeServer()
+    thread = threading.Thread(target=srv.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    yield srv
+    srv.shutdown()
+    srv.server_close()
+
+
+@pytest.fixture
+def make_transport():
+    def factory(**kwargs):
+        delays = []
+        kwargs.setdefault("rng", lambda: 1.0)
+        transport = Transport(sleep=delays.append, timeout=5, **kwargs)
+        transport.delays = delays
+        return transport
+    return factory
+
+
+def test_server_errors_are_retried_with_backoff(server, make_transport):
+    transport = make_transport(max_retries=3, backoff_base=0.5)
+
+    response = transport.request("GET", f"{server.url}/status/502/2/a")
+
+    assert response.status_code == 200
+    assert response.json() == {"path": "/status/502/2/a", "hit": 3}
+    assert transport.delays == [0.5, 1.0]
+    stats = transport.stats.snapshot()
+    assert (stats["requests"], stats["retries"], stats["server_errors"], stats["failures"]) == (3, 2, 2, 0)
+
+
+def test_retry_after_overrides_backoff(server, make_transport):
+    transport = make_transport()
+
+    assert transport.request("GET", f"{server.url}/status/503/1/a").status_code == 200
+    assert transport.delays == [0.0]
+
+
+def test_exhausted_retries_return_the_last_error(server, make_transport):
+    transport = make_transport(max_retries=2, backoff_max=0.75)
+
+    response = transport.request("GET", f"{server.url}/status/500/5/a")
+
+    assert response.status_code == 500
+    assert server.hits["/status/500/5/a"] == 3
+    assert transport.delays == [0.5, 0.75]
+    assert transport.stats.failures == 1
+
+
+def test_dropped_connections_are_retried(server, make_transport):
+    transport = make_transport()
+
+    response = transport.request("GET", f"{server.url}/drop/1/a")
+
+    assert response.json()["hit"] == 2
+    assert transport.stats.connection_errors == 1
+    assert transport.stats.retries == 1
+
+    with pytest.raises(requests.ConnectionError):
+        make_transport(max_retries=1).request("GET", f"{server.url}/drop/5/b")
+
+
+def test_non_idempotent_requests_are_not_retried(server, make_transport):
+    transport = make_transport()
+
+    assert transport.request("POST", f"{server.url}/status/502/1/a").status_code == 502
+    assert transport.delays == []
+
+
+def test_jitter_stays_within_the_backoff_window(make_transport):
+    low = make_transport(rng=lambda: 0.0, backoff_base=1.0, backoff_max=5.0)
+    high = make_transport(rng=lambda: 1.0, backoff_base=1.0, backoff_max=5.0)
+
+    assert [low.backoff(n) for n in range(4)] == [0.5, 1.0, 2.0, 2.5]
+    assert [high.backoff(n) for n in range(4)] == [1.0, 2.0, 4.0, 5.0]
+
+
+def test_connections_are_pooled_and_reused(server, make_transport):
+    transport = make_transport(pool_size=2)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        responses = list(pool.map(lambda i: transport.request("GET", f"{server.url}/ok/{i}"), range(40)))
+
+    assert all(r.status_code == 200 for r in responses)
+    assert len(server.connections) <= 2
+    assert server.gzipped == 40
+    assert responses[0].headers["Content-Encoding"] == "gzip"
+
+
+def test_client_retries_transient_errors(server, monkeypatch):
+    monkeypatch.setattr(vald_client, "get_vald_token", lambda: "test-token")
+    monkeypatch.setattr(vald_client, "PROFILE_URL", f"{server.url}/status/504/1")
+    transport = Transport(sleep=lambda delay: None, timeout=5)
+    client = vald_client.ValdClient(rate_limit_per_sec=1000, transport=transport,
+                                    use_trial_cache=False, use_session_index=False)
+
+    client._request("GET", f"{vald_client.PROFILE_URL}/profiles")
+
+    assert transport.rate_limiter is client.rate_limiter
+    assert transport.stats.retries == 1
+    with pytest.raises(requests.HTTPError):
+        client.transport.max_retries = 0
+        client._request("GET", f"{server.url}/status/500/1/x")
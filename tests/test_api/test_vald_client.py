@@ -0,0 +1,273 @@
+import json
+import threading
+import time
+from datetime import datetime, timedelta
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+import pytest
+
+from nevald_report_gen.api import vald_client
+from nevald_report_gen.api.response_cache import TrialCache
+from nevald_report_gen.api.session_index import SessionIndex
+from nevald_report_gen.api.vald_client import ValdClient
+
+
+class FakeResponse:
+    def __init__(self, payload=None, status_code=200, headers=None):
+        self._payload = payload
+        self.status_code = status_code
+        self.headers = headers or {}
+
+    @property
+    def content(self):
+        return b"" if self._payload is None else json.dumps(self._payload).encode()
+
+    def json(self):
+        return self._payload
+
+    def raise_for_status(self):
+        pass
+
+
+@pytest.fixture
+def make_client(monkeypatch, tmp_path):
+    monkeypatch.setattr(vald_client, "get_vald_token", lambda: "test-token")
+
+    def factory(**kwargs):
+        kwargs.setdefault("trial_cache", TrialCache(tmp_path / "trials.sqlite"))
+        kwargs.setdefault("session_index", SessionIndex(tmp_path / "tests.sqlite"))
+        return ValdClient(**kwargs)
+
+    return factory
+
+
+def test_rate_limit_is_shared_across_threads(make_client):
+    client = make_client(rate_limit_per_sec=20, burst=1)
+    sent = []
+    lock = threading.Lock()
+
+    def fake_request(method, url, **kwargs):
+        with lock:
+            sent.append(time.monotonic())
+        return FakeResponse({})
+
+    client.session.request = fake_request
+    threads = [threading.Thread(target=client._request, args=("GET", "http://x")) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    # Eight requests at 20/s need at least seven intervals between them
+    assert len(sent) == 8
+    assert max(sent) - min(sent) >= 7 * 0.05 * 0.9
+
+
+def test_throttled_request_honors_retry_after(make_client):
+    client = make_client(rate_limit_per_sec=100)
+    pauses = []
+    client.rate_limiter.pause = pauses.append
+    responses = [FakeResponse(status_code=429, headers={"Retry-After": "2"}), FakeResponse({"ok": 1})]
+    client.session.request = lambda method, url, **kwargs: responses.pop(0)
+
+    response = client._request("GET", "http://x")
+
+    assert response.json() == {"ok": 1}
+    assert pauses == [2.0]
+
+
+def test_rejected_token_is_replaced_and_request_retried(make_client, monkeypatch):
+    tokens = iter(["old", "old", "new"])
+    rejected = []
+    monkeypatch.setattr(vald_client, "get_vald_token", lambda: next(tokens))
+    monkeypatch.setattr(vald_client, "invalidate_vald_token", rejected.append)
+    client = make_client()
+    sent = []
+
+    def fake_request(method, url, headers=None, **kwargs):
+        sent.append(headers["Authorization"])
+        return FakeResponse(status_code=401) if headers["Authorization"] == "Bearer old" else FakeResponse({"ok": 1})
+
+    client.session.request = fake_request
+
+    assert client._request("GET", "http://x").json() == {"ok": 1}
+    assert sent == ["Bearer old", "Bearer new"]
+    assert rejected == ["old"]
+
+
+def _trial_payload():
+    return [
+        {
+            "results": [
+                {
+                    "value": 1000.0 + i,
+                    "limb": "Trial",
+                    "definition": {"result": "PEAK_VERTICAL_FORCE", "unit": "Newton"},
+                }
+            ]
+        }
+        for i in range(3)
+    ]
+
+
+def test_fd_results_are_served_from_trial_cache(make_client):
+    client = make_client()
+    calls = []
+
+    def fake_request(method, url, **kwargs):
+        calls.append(url)
+        return FakeResponse(_trial_payload())
+
+    client.session.request = fake_request
+    first = client.get_fd_results("t1", "IMTP")
+    second = client.get_fd_results("t1", "IMTP")
+
+    assert len(calls) == 1
+    assert list(first.columns) == ["metric_id", "trial 1", "trial 2", "trial 3"]
+    assert first.equals(second)
+
+
+def _session_rows(day, suffix=""):
+    return [
+        {"testId": f"{t}{day}{suffix}", "profileId": "p1", "testType": t,
+         "modifiedDateUtc": f"2025-09-{day:02d}T15:00:00.000Z"}
+        for t in ("CMJ", "HJ", "IMTP", "PPU")
+    ]
+
+
+def test_test_list_syncs_incrementally_from_watermark(make_client):
+    server_rows = _session_rows(1)
+    queried_from = []
+
+    def fake_request(method, url, **kwargs):
+        since = parse_qs(urlparse(url).query)["ModifiedFromUtc"][0]
+        queried_from.append(since)
+        rows = [r for r in server_rows if r["modifiedDateUtc"] >= since[:19]]
+        return FakeResponse({"tests": rows}) if rows else FakeResponse(status_code=204)
+
+    first = make_client()
+    first.session.request = fake_request
+    assert len(first.get_tests_by_profile(datetime(2020, 1, 1), "p1")) == 4
+
+    server_rows += _session_rows(8)
+    second = make_client()
+    second.session.request = fake_request
+    tests = second.get_tests_by_profile(datetime(2020, 1, 1), "p1")
+
+    assert queried_from[0].startswith("2020-01-01")
+    assert queried_from[1].startswith("2025-09-01T15:00:00")
+    assert len(tests) == 8
+    assert sorted(set(tests["modifiedDateUtc"].astype(str))) == ["2025-09-01", "2025-09-08"]
+
+
+def _tenant_rows(profile_id, day, minute=None):
+    """One session for ``profile_id``, one test per minute unless ``minute`` is fixed."""
+    return [
+        {"testId": f"{profile_id}-{t}{day}", "profileId": profile_id, "testType": t,
+         "modifiedDateUtc": f"2025-09-{day:02d}T15:{i if minute is None else minute:02d}:00.000Z"}
+        for i, t in enumerate(("CMJ", "HJ", "IMTP", "PPU"))
+    ]
+
+
+def _paged_server(server_rows, urls, page_size=3):
+    """Fake /tests endpoint answering ``page_size`` rows per request, oldest first."""
+
+    def fake_request(method, url, **kwargs):
+        urls.append(url)
+        query = parse_qs(urlparse(url).query)
+        since = query["ModifiedFromUtc"][0]
+        rows = sorted(
+            (r for r in server_rows
+             if r["modifiedDateUtc"] >= since[:23] and r["profileId"] in query.get("ProfileId", [r["profileId"]])),
+            key=lambda r: r["modifiedDateUtc"],
+        )
+        return FakeResponse({"tests": rows[:page_size]})
+
+    return fake_request
+
+
+def test_profile_history_longer_than_a_page_is_synced_in_full(make_client, monkeypatch):
+    monkeypatch.setattr(vald_client, "VALD_TESTS_PAGE_SIZE", 3)
+    urls = []
+    client = make_client()
+    client.session.request = _paged_server(_tenant_rows("p1", 1) + _tenant_rows("p1", 8), urls)
+
+    tests = client.get_tests_by_profile(datetime(2020, 1, 1), "p1")
+
+    assert len(tests) == 8
+    assert sorted(set(tests["modifiedDateUtc"].astype(str))) == ["2025-09-01", "2025-09-08"]
+    assert len(urls) > 1 and all("ProfileId=p1" in u for u in urls)
+
+
+def test_tenant_sync_pages_and_answers_profile_lookups(make_client, monkeypatch):
+    monkeypatch.setattr(vald_client, "VALD_TESTS_PAGE_SIZE", 3)
+    urls = []
+    fake_request = _paged_server(_tenant_rows("p1", 1) + _tenant_rows("p2", 2), urls)
+
+    client = make_client()
+    client.session.request = fake_request
+    client.sync_tenant_tests()
+    pages = len(urls)
+
+    assert all("ProfileId" not in u for u in urls)
+    assert pages > 1
+    assert len(client.get_tests_by_profile(datetime(2020, 1, 1), "p1")) == 4
+    assert len(client.get_tests_by_profile(datetime(2020, 1, 1), "p2")) == 4
+    assert len(urls) == pages
+
+
+def test_profile_index_is_built_once_per_profile_list(make_client):
+    client = make_client()
+    client.set_profiles(pd.DataFrame({"fullName": ["Ann Lee"], "profileId": ["p1"]}))
+    index = client.get_profile_index()
+
+    assert client.get_profile_index() is index
+    assert index.lookup("ann lee") == "p1"
+
+    client.set_profiles(pd.DataFrame({"fullName": ["Bo Diaz"], "profileId": ["p2"]}))
+    assert client.get_profile_index().lookup("bo diaz") == "p2"
+
+
+def test_tenant_sync_gets_past_a_full_page_at_one_timestamp(make_client, monkeypatch):
+    monkeypatch.setattr(vald_client, "VALD_TESTS_PAGE_SIZE", 5)
+    # A bulk re-upload stamps eight tests with the same modification time
+    server_rows = _tenant_rows("p1", 1, minute=0) + _tenant_rows("p2", 1, minute=0) + _tenant_rows("p3", 2)
+    urls = []
+    client = make_client()
+    client.session.request = _paged_server(server_rows, urls, page_size=5)
+    client.set_profiles(pd.DataFrame({"fullName": ["A", "B", "C"], "profileId": ["p1", "p2", "p3"]}))
+
+    client.sync_tenant_tests()
+
+    for profile_id in ("p1", "p2", "p3"):
+        assert len(client.get_tests_by_profile(datetime(2020, 1, 1), profile_id)) == 4
+
+
+def test_tenant_index_is_resynced_after_its_ttl(make_client, monkeypatch):
+    monkeypatch.setattr(vald_client, "VALD_TESTS_PAGE_SIZE", 3)
+    server_rows = _tenant_rows("p1", 1)
+    urls = []
+    client = make_client(test_list_ttl=timedelta(0))
+    client.session.request = _paged_server(server_rows, urls)
+    client.sync_tenant_tests()
+    assert len(client.get_tests_by_profile(datetime(2020, 1, 1), "p1")) == 4
+
+    server_rows += _tenant_rows("p1", 8)
+    tests = client.get_tests_by_profile(datetime(2025, 1, 1), "p1")
+
+    assert sorted(set(tests["modifiedDateUtc"].astype(str))) == ["2025-09-01", "2025-09-08"]
+    assert all("ProfileId" not in u for u in urls)
+
+
+def test_unsynced_tests_are_logged_not_printed(make_client, monkeypatch, caplog, capsys):
+    monkeypatch.setattr(vald_client, "VALD_TESTS_PAGE_SIZE", 3)
+    client = make_client()
+    client.session.request = _paged_server(_tenant_rows("p1", 1, minute=0), [])
+    client.set_profiles(pd.DataFrame({"fullName": ["A"], "profileId": ["p1"]}))
+
+    with caplog.at_level("WARNING", logger=vald_client.__name__):
+        client.sync_tenant_tests()
+
+    assert "profile p1" in caplog.text
+    assert capsys.readouterr().out == ""
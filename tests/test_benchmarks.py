@@ -0,0 +1,36 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+BENCHMARKS = Path(__file__).resolve().parent.parent / "benchmarks"
+
+
+def _run(*args):
+    return subprocess.run(
+        [sys.executable, str(BENCHMARKS / "run_benchmarks.py"), "--size", "small", "--repeat", "1", *args],
+        capture_output=True, text=True, cwd=BENCHMARKS,
+    )
+
+
+def test_benchmark_suite_emits_json(tmp_path):
+    output = tmp_path / "results.json"
+    result = _run("--only", "select_best", "--output", str(output))
+
+    assert result.returncode == 0, result.stderr
+    report = json.loads(output.read_text())
+    assert report == json.loads(result.stdout)
+    assert report["meta"]["size"] == "small"
+    assert sorted(report["benchmarks"]) == [
+        "select_best.CMJ", "select_best.CMJ_roster", "select_best.HJ", "select_best.IMTP", "select_best.PPU",
+    ]
+    assert all(r["median_s"] > 0 for r in report["benchmarks"].values())
+
+
+def test_benchmark_suite_flags_regressions(tmp_path):
+    baseline = tmp_path / "baseline.json"
+    baseline.write_text(json.dumps({"benchmarks": {"composite.athlete": {"median_s": 1e-9}}}))
+    result = _run("--only", "composite.athlete", "--baseline", str(baseline))
+
+    assert result.returncode == 1
+    assert json.loads(result.stdout)["regressions"][0]["name"] == "composite.athlete"
@@ -0,0 +1,206 @@
+import os
+import time
+from datetime import timedelta
+from functools import partial
+
+import pandas as pd
+import pytest
+
+from nevald_report_gen.config import CMJ_TABLE, HJ_TABLE, IMTP_TABLE, PPU_TABLE
+from nevald_report_gen.data.pull_all import REFERENCE_QUERIES, pull_all_ref
+from nevald_report_gen.data.pull_ref_data import build_ref_query, pull_ref
+from nevald_report_gen.data.ref_stats import get_distribution
+from nevald_report_gen.data.ref_cache import ReferenceCache
+
+from ..conftest import REPORT_REF_COLUMNS
+
+TABLE = "proj.athlete_performance_db.cmj_results"
+
+
+def _ref_frame():
+    return pd.DataFrame(
+        {
+            "athlete_name": ["a", "b", "c"],
+            "age_at_test": [15, 19, 25],
+            "PEAK_TAKEOFF_POWER_Trial_W": [3000.0, 4000.0, 5000.0],
+        }
+    )
+
+
+def test_cache_serves_repeat_pulls_from_disk(tmp_path, fake_bigquery):
+    fake_bigquery.load_table(TABLE, _ref_frame())
+    cache = ReferenceCache(tmp_path, fetch=partial(pull_ref, client=fake_bigquery))
+
+    first = cache.get(TABLE, 14, 20)
+    # A fresh cache instance reads the entry back from disk
+    second = ReferenceCache(tmp_path, fetch=partial(pull_ref, client=fake_bigquery)).get(TABLE, 14, 20)
+
+    assert len(fake_bigquery.queries) == 1
+    assert list(first["athlete_name"]) == ["a", "b"]
+    pd.testing.assert_frame_equal(first, second)
+
+
+def test_cache_refreshes_when_stale_or_requested(tmp_path, fake_bigquery):
+    fake_bigquery.load_table(TABLE, _ref_frame())
+    fetch = partial(pull_ref, client=fake_bigquery)
+    cache = ReferenceCache(tmp_path, ttl=timedelta(hours=1), fetch=fetch)
+
+    cache.get(TABLE, 14, 20)
+    cache.get(TABLE, 14, 20, refresh=True)
+    assert len(fake_bigquery.queries) == 2
+
+    # Age every cached entry past the TTL
+    old = time.time() - 2 * 3600
+    for path in tmp_path.glob("*.pkl"):
+        os.utime(path, (old, old))
+    ReferenceCache(tmp_path, ttl=timedelta(hours=1), fetch=fetch).get(TABLE, 14, 20)
+    assert len(fake_bigquery.queries) == 3
+
+
+def test_overlapping_age_bands_share_one_pull(tmp_path, fake_bigquery):
+    fake_bigquery.load_table(TABLE, _ref_frame())
+    cache = ReferenceCache(tmp_path, fetch=partial(pull_ref, client=fake_bigquery))
+
+    assert list(cache.get(TABLE, 14, 18)["athlete_name"]) == ["a"]
+    assert list(cache.get(TABLE, 18, 22)["athlete_name"]) == ["b"]
+    assert list(cache.get(TABLE, 21, 35)["athlete_name"]) == ["c"]
+    assert len(fake_bigquery.queries) == 1
+    assert "age_at_test BETWEEN" not in fake_bigquery.queries[0]
+
+
+def _with_report_columns(df, key):
+    for column in REPORT_REF_COLUMNS[key]:
+        if column not in df:
+            df[column] = range(len(df))
+    df["UNUSED_METRIC"] = 0.0
+    return df
+
+
+def test_pull_all_ref_dedupes_within_each_window(tmp_path, fake_bigquery):
+    # Athlete "a" tested at 19 and 25; the best overall test is outside the
+    # college window, so the college window must keep the age-19 test
+    frames = {
+        CMJ_TABLE: pd.DataFrame(
+            {"athlete_name": ["a", "a"], "age_at_test": [19, 25], "cmj_composite_score": [1.0, 2.0]}
+        ),
+        HJ_TABLE: pd.DataFrame(
+            {"athlete_name": ["a"], "age_at_test": [19], "hop_rsi_avg_best_5": [2.0]}
+        ),
+        IMTP_TABLE: pd.DataFrame(
+            {"athlete_name": ["a"], "age_at_test": [19], "ISO_BM_REL_FORCE_PEAK_Trial_N_kg": [30.0]}
+        ),
+        PPU_TABLE: pd.DataFrame(
+            {"athlete_name": ["a"], "age_at_test": [19], "PEAK_CONCENTRIC_FORCE_Trial_N": [900.0]}
+        ),
+    }
+    keys = {table: key for table, key, _, _ in REFERENCE_QUERIES}
+    for table, df in frames.items():
+        fake_bigquery.load_table(table, _with_report_columns(df, keys[table]))
+    cache = ReferenceCache(tmp_path, fetch=partial(pull_ref, client=fake_bigquery))
+
+    college = pull_all_ref(18, 22, cache=cache)
+    pro = pull_all_ref(21, 35, cache=cache)
+
+    assert list(college["cmj"]["age_at_test"]) == [19]
+    assert list(pro["cmj"]["age_at_test"]) == [25]
+    assert "UNUSED_METRIC" not in college["cmj"]
+    assert len(fake_bigquery.queries) == 4
+
+
+def test_reference_queries_cover_the_report_columns():
+    for _, key, sort_col, columns in REFERENCE_QUERIES:
+        assert set(REPORT_REF_COLUMNS[key]) <= {sort_col, *columns}
+
+
+def test_projected_pull_keeps_each_athletes_best_test_per_age(tmp_path, fake_bigquery):
+    full = pd.DataFrame(
+        {
+            "athlete_name": ["a", "a", "a", "b", "b", "c"],
+            "age_at_test": [19, 19, 25, 19, 20, 22],
+            "cmj_composite_score": [1.0, 3.0, 2.0, None, 4.0, 0.5],
+            "PEAK_TAKEOFF_POWER_Trial_W": [10.0, 30.0, 20.0, 5.0, 40.0, 1.0],
+            "UNUSED_METRIC": 0.0,
+        }
+    )
+    fake_bigquery.load_table(TABLE, full)
+    cache = ReferenceCache(tmp_path, fetch=partial(pull_ref, client=fake_bigquery))
+
+    projected = cache.get_table(TABLE, columns=["PEAK_TAKEOFF_POWER_Trial_W"], best_by="cmj_composite_score")
+
+    assert list(projected.columns) == [
+        "athlete_name", "age_at_test", "cmj_composite_score", "PEAK_TAKEOFF_POWER_Trial_W"
+    ]
+    assert sorted(zip(projected["athlete_name"], projected["age_at_test"], projected["PEAK_TAKEOFF_POWER_Trial_W"])) == [
+        ("a", 19, 30.0), ("a", 25, 20.0), ("b", 19, 5.0), ("b", 20, 40.0), ("c", 22, 1.0)
+    ]
+    # Any age window deduped per athlete matches the dedupe of the full table
+    for min_age, max_age in [(14, 19), (18, 22), (21, 35)]:
+        def best(df):
+            window = df[df["age_at_test"].between(min_age, max_age)]
+            return (window.sort_values("cmj_composite_score", ascending=False)
+                          .drop_duplicates(subset=["athlete_name"])
+                          .sort_values("athlete_name")[["athlete_name", "PEAK_TAKEOFF_POWER_Trial_W"]]
+                          .reset_index(drop=True))
+        pd.testing.assert_frame_equal(best(projected), best(full))
+
+
+def test_each_projection_is_cached_separately(tmp_path, fake_bigquery):
+    fake_bigquery.load_table(TABLE, _ref_frame().assign(cmj_composite_score=[1.0, 2.0, 3.0]))
+    cache = ReferenceCache(tmp_path, fetch=partial(pull_ref, client=fake_bigquery))
+
+    full = cache.get_table(TABLE)
+    projected = cache.get_table(TABLE, columns=[], best_by="cmj_composite_score")
+    cache.get_table(TABLE, columns=[], best_by="cmj_composite_score")
+
+    assert len(fake_bigquery.queries) == 2
+    assert "PEAK_TAKEOFF_POWER_Trial_W" in full and "PEAK_TAKEOFF_POWER_Trial_W" not in projected
+    assert len(list(tmp_path.glob("*.pkl"))) == 2
+
+
+def test_ref_query_rejects_unsafe_column_names():
+    with pytest.raises(ValueError):
+        build_ref_query(TABLE, columns=["x`; DROP TABLE t; --"])
+    with pytest.raises(ValueError):
+        build_ref_query(TABLE, best_by="score DESC, 1")
+
+
+def test_pull_ref_requires_both_age_bounds(fake_bigquery):
+    with pytest.raises(ValueError):
+        pull_ref(TABLE, 18, None, client=fake_bigquery)
+    with pytest.raises(ValueError):
+        pull_ref(TABLE, None, 22, client=fake_bigquery)
+    assert fake_bigquery.queries == []
+
+
+def test_windows_are_reused_until_the_table_is_reloaded(tmp_path, fake_bigquery):
+    fake_bigquery.load_table(TABLE, _ref_frame().assign(cmj_composite_score=[1.0, 2.0, 3.0]))
+    cache = ReferenceCache(tmp_path, fetch=partial(pull_ref, client=fake_bigquery))
+    column = "PEAK_TAKEOFF_POWER_Trial_W"
+
+    first = cache.get(TABLE, 18, 22, columns=[column], best_by="cmj_composite_score")
+    second = cache.get(TABLE, 18, 22, columns=[column], best_by="cmj_composite_score")
+    assert second is first
+    assert get_distribution(second, column) is get_distribution(first, column)
+
+    reloaded = cache.get(TABLE, 18, 22, refresh=True, columns=[column], best_by="cmj_composite_score")
+    assert reloaded is not first
+    pd.testing.assert_frame_equal(reloaded, first)
+
+
+def test_tied_best_scores_pick_the_same_row_on_every_pull(fake_bigquery):
+    rows = pd.DataFrame(
+        {
+            "athlete_name": ["a", "a", "a"],
+            "age_at_test": [19, 19, 19],
+            "cmj_composite_score": [2.0, 2.0, 1.0],
+            "PEAK_TAKEOFF_POWER_Trial_W": [30.0, 10.0, 50.0],
+        }
+    )
+    pulls = []
+    for order in ([0, 1, 2], [2, 1, 0]):
+        fake_bigquery.load_table(TABLE, rows.iloc[order])
+        pulls.append(pull_ref(TABLE, None, None, client=fake_bigquery, columns=["PEAK_TAKEOFF_POWER_Trial_W"],
+                              best_by="cmj_composite_score", partition_by=("athlete_name", "age_at_test")))
+
+    pd.testing.assert_frame_equal(pulls[0], pulls[1])
+    assert list(pulls[0]["PEAK_TAKEOFF_POWER_Trial_W"]) == [10.0]
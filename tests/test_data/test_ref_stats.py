@@ -0,0 +1,43 @@
+import gc
+
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import stats
+
+from nevald_report_gen.data import ref_stats
+from nevald_report_gen.data.ref_stats import ReferenceDistribution, get_distribution
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_percentiles_match_scipy_rank(seed):
+    rng = np.random.default_rng(seed)
+    # Rounded values give plenty of ties, the case ``kind='rank'`` is about
+    values = np.round(rng.normal(3000, 400, size=200), -1)
+    scores = np.concatenate([values[:20], rng.normal(3000, 600, size=20), [np.nan, np.inf, -np.inf]])
+    dist = ReferenceDistribution(pd.Series(values))
+
+    expected = stats.percentileofscore(values, scores, kind="rank")
+    np.testing.assert_array_equal(dist.percentiles(scores), expected)
+    for score in scores[:5]:
+        assert dist.percentile(score) == stats.percentileofscore(values, score, kind="rank")
+
+
+def test_missing_or_empty_reference_gives_nan():
+    assert np.isnan(ReferenceDistribution([1.0, np.nan, 3.0]).percentile(2.0))
+    assert np.isnan(ReferenceDistribution([]).percentile(2.0))
+    assert np.isnan(stats.percentileofscore([1.0, np.nan, 3.0], 2.0))
+
+
+def test_distribution_is_cached_per_frame():
+    ref_df = pd.DataFrame({"x": [3.0, 1.0, 2.0]})
+    dist = get_distribution(ref_df, "x")
+
+    assert get_distribution(ref_df, "x") is dist
+    assert list(dist.sorted_values) == [1.0, 2.0, 3.0]
+    assert get_distribution(ref_df.copy(), "x") is not dist
+
+    key = id(ref_df)
+    del ref_df
+    gc.collect()
+    assert key not in ref_stats._distributions
@@ -0,0 +1,84 @@
+import json
+from datetime import date
+
+import pandas as pd
+
+from nevald_report_gen import spans
+from nevald_report_gen.reports import batch
+
+
+class FakeClient:
+    def __init__(self):
+        self.profile_calls = 0
+        self.session_index = object()
+        self.tenant_syncs = 0
+
+    def sync_tenant_tests(self):
+        self.tenant_syncs += 1
+        return 0
+
+    def get_profiles(self):
+        self.profile_calls += 1
+        return pd.DataFrame({"fullName": ["Ann Lee", "Bo Diaz"], "profileId": ["p1", "p2"]})
+
+
+def test_load_roster_with_and_without_dates(tmp_path):
+    roster = tmp_path / "roster.csv"
+    roster.write_text("athlete_name,test_date\nAnn Lee,2025-09-08\nBo Diaz,\n")
+    jobs = batch.load_roster(roster, [date(2025, 9, 1)])
+    assert jobs == [
+        batch.BatchJob("Ann Lee", date(2025, 9, 8)),
+        batch.BatchJob("Bo Diaz", date(2025, 9, 1)),
+    ]
+
+    names = tmp_path / "names.txt"
+    names.write_text("Ann Lee\nBo Diaz\n")
+    assert len(batch.load_roster(names, [date(2025, 9, 1), date(2025, 9, 2)])) == 4
+
+
+def test_run_batch_fetches_shared_inputs_once(tmp_path, monkeypatch):
+    ref_calls = []
+    monkeypatch.setattr(
+        batch, "pull_all_ref", lambda lo, hi, refresh=False: ref_calls.append((lo, hi)) or {"cmj": pd.DataFrame()}
+    )
+
+    def fake_athlete_data(name, test_date, client):
+        return None if name == "Bo Diaz" else pd.DataFrame({"metric_id": ["x"], "Value": [1]})
+
+    def fake_pdf(name, test_date, output_path, athlete_df, ref_data):
+        output_path.write_bytes(b"%PDF")
+        return str(output_path)
+
+    monkeypatch.setattr(batch, "get_athlete_data", fake_athlete_data)
+    monkeypatch.setattr(batch, "generate_athlete_pdf", fake_pdf)
+
+    client = FakeClient()
+    jobs = batch.build_jobs(["Ann Lee", "Bo Diaz"], [date(2025, 9, 8)])
+    results = batch.run_batch(jobs, 18, 22, tmp_path, max_workers=1, client=client)
+
+    assert client.profile_calls == 1
+    assert client.tenant_syncs == 1
+    assert ref_calls == [(18, 22)]
+    assert [r.ok for r in results] == [True, False]
+    assert (tmp_path / "Ann_Lee_20250908.pdf").exists()
+    summary = pd.read_csv(tmp_path / batch.SUMMARY_FILENAME)
+    assert list(summary["status"]) == ["ok", "failed"]
+
+
+def test_run_batch_writes_trace(tmp_path, monkeypatch):
+    monkeypatch.setattr(batch, "pull_all_ref", lambda lo, hi, refresh=False: {"cmj": pd.DataFrame()})
+    monkeypatch.setattr(batch, "get_athlete_data",
+                        lambda name, test_date, client: pd.DataFrame({"metric_id": ["x"], "Value": [1]}))
+
+    def fake_pdf(name, test_date, output_path, athlete_df, ref_data):
+        output_path.write_bytes(b"%PDF")
+        return str(output_path)
+
+    monkeypatch.setattr(batch, "generate_athlete_pdf", fake_pdf)
+    jobs = batch.build_jobs(["Ann Lee", "Bo Diaz"], [date(2025, 9, 8)])
+    trace = tmp_path / "trace.jsonl"
+    batch.run_batch(jobs, 18, 22, tmp_path, max_workers=1, client=FakeClient(), trace_path=trace)
+
+    records = [json.loads(line) for line in trace.read_text().splitlines()]
+    assert [r["athlete"] for r in records if r["name"] == "batch.job"] == ["Ann Lee", "Bo Diaz"]
+    assert spans.get_recorder() is None
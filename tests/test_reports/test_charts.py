@@ -0,0 +1,32 @@
+import numpy as np
+
+from nevald_report_gen.reports.charts import (
+    CompositeChartRenderer,
+    SpiderChartRenderer,
+    get_spider_renderer,
+)
+
+LABELS = ("A", "B", "C", "D", "E")
+
+
+def test_spider_renderer_reuse_matches_fresh_figure():
+    shared = get_spider_renderer(LABELS)
+    shared.render([90, 10, 50, 100, 0])
+    reused = shared.render([20, 40, 60, 80, 30])
+
+    fresh = SpiderChartRenderer(LABELS).render([20, 40, 60, 80, 30])
+
+    assert get_spider_renderer(LABELS) is shared
+    assert reused.getSize() == fresh.getSize()
+    assert reused.getRGBData() == fresh.getRGBData()
+
+
+def test_composite_renderer_reuse_matches_fresh_figure():
+    shared = CompositeChartRenderer()
+    shared.render(np.float64(88.0))
+    reused = shared.render(np.float64(12.5))
+
+    fresh = CompositeChartRenderer().render(np.float64(12.5))
+
+    assert reused.getRGBData() == fresh.getRGBData()
+    assert shared.render(-1).getSize() == fresh.getSize()
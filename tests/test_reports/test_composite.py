@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import stats
+
+from nevald_report_gen.data.ref_stats import get_distribution
+from nevald_report_gen.reports.FD_PDF_V1 import (
+    COMPOSITE_WEIGHTS,
+    calculate_zscore_composite,
+    composite_weights,
+    zscore_composite_scores,
+)
+
+
+def _loop_composite(athlete_data, weights):
+    """Previous per-metric implementation, recomputing moments on every call."""
+    used = {m: info for m, info in weights.items() if m in athlete_data["metric_id"].values}
+    if not used:
+        return 0
+    total_weight = sum(w for (_, _, w) in used.values())
+    composite_z = 0.0
+    for metric, (ref_df, ref_col, weight) in used.items():
+        ref_series = pd.to_numeric(ref_df[ref_col], errors="coerce").dropna()
+        if ref_series.empty or ref_series.std() == 0:
+            continue
+        value = pd.to_numeric(athlete_data.loc[athlete_data["metric_id"] == metric, "Value"].iloc[0], errors="coerce")
+        if pd.isna(value):
+            continue
+        z_score = max(min((float(value) - ref_series.mean()) / ref_series.std(), 3), -3)
+        composite_z += z_score * weight / total_weight
+    return round(stats.norm.cdf(composite_z) * 100, 2)
+
+
+def _ref_data(rng):
+    ref_data = {}
+    for table, col, _ in COMPOSITE_WEIGHTS.values():
+        frame = ref_data.setdefault(table, pd.DataFrame(index=range(50)))
+        frame[col] = rng.normal(1000, 150, size=50)
+    ref_data["cmj"].loc[3, "PEAK_TAKEOFF_POWER_Trial_W"] = np.nan
+    return ref_data
+
+
+def _athletes(rng, n):
+    metrics = list(COMPOSITE_WEIGHTS)
+    values = rng.normal(1000, 250, size=(n, len(metrics)))
+    values[0, 2] = np.nan
+    frames = []
+    for i, row in enumerate(values):
+        keep = metrics if i % 3 else metrics[:-2]
+        frames.append(pd.DataFrame({"metric_id": keep, "Value": [row[metrics.index(m)] for m in keep]}))
+    return values, frames
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_composite_matches_loop_implementation(seed):
+    rng = np.random.default_rng(seed)
+    ref_data = _ref_data(rng)
+    _, frames = _athletes(rng, 6)
+    legacy_weights = {m: (ref_data[t], c, w) for m, (t, c, w) in COMPOSITE_WEIGHTS.items()}
+
+    for frame in frames:
+        expected = _loop_composite(frame, legacy_weights)
+        assert calculate_zscore_composite(frame, composite_weights(ref_data)) == pytest.approx(expected, abs=1e-9)
+        assert calculate_zscore_composite(frame, legacy_weights) == pytest.approx(expected, abs=1e-9)
+
+
+def test_composite_scores_for_many_athletes():
+    rng = np.random.default_rng(7)
+    ref_data = _ref_data(rng)
+    values, frames = _athletes(rng, 9)
+    weights = composite_weights(ref_data)
+    present = np.array([[m in set(f["metric_id"]) for m in COMPOSITE_WEIGHTS] for f in frames])
+
+    scores = zscore_composite_scores(values, [s for s, _ in weights.values()], [w for _, w in weights.values()], present)
+
+    expected = [calculate_zscore_composite(f, weights) for f in frames]
+    np.testing.assert_allclose(scores, expected)
+    assert get_distribution(ref_data["cmj"], "PEAK_TAKEOFF_POWER_Trial_W").count == 49
+    assert calculate_zscore_composite(pd.DataFrame({"metric_id": ["other"], "Value": [1.0]}), weights) == 0
@@ -0,0 +1,91 @@
+import re
+from datetime import date
+
+import pytest
+from reportlab import rl_config
+
+from nevald_report_gen.reports import FD_PDF_V1, batch
+from nevald_report_gen.reports.document import ReportDocument
+
+
+def _page_count(pdf_bytes):
+    return len(re.findall(rb"/Type /Page(?!s)", pdf_bytes))
+
+
+def test_packet_has_a_page_per_athlete_and_one_logo(tmp_path, report_inputs):
+    athlete_df, ref_data = report_inputs
+    path = tmp_path / "packet.pdf"
+
+    with ReportDocument(path, chart_backend="vector") as packet:
+        for i in range(3):
+            packet.add_report(f"Athlete {i}", date(2025, 1, 1), athlete_df, ref_data)
+
+    pdf = path.read_bytes()
+    assert _page_count(pdf) == 3
+    assert pdf.count(b"/Subtype /Image") == 1
+
+
+def test_packet_is_not_written_when_the_block_fails(tmp_path, report_inputs):
+    athlete_df, ref_data = report_inputs
+    path = tmp_path / "packet.pdf"
+
+    with pytest.raises(KeyError):
+        with ReportDocument(path) as packet:
+            packet.add_report("Athlete", date(2025, 1, 1), athlete_df, {})
+
+    assert not path.exists()
+
+
+def test_run_batch_writes_a_single_packet(tmp_path, report_inputs, monkeypatch):
+    athlete_df, ref_data = report_inputs
+    monkeypatch.setattr(batch, "pull_all_ref", lambda lo, hi, refresh=False: ref_data)
+    monkeypatch.setattr(
+        batch, "get_athlete_data", lambda name, d, client: None if name == "Bo Diaz" else athlete_df
+    )
+
+    class Client:
+        session_index = None
+
+        def get_profiles(self):
+            return None
+
+    jobs = batch.build_jobs(["Ann Lee", "Bo Diaz", "Cy Park"], [date(2025, 9, 8)])
+    out = tmp_path / "out"
+    results = batch.run_batch(jobs, 18, 22, out, max_workers=1, client=Client(), packet_name="team.pdf")
+
+    assert [r.ok for r in results] == [True, False, True]
+    assert results[0].output_path == str(out / "team.pdf")
+    assert _page_count((out / "team.pdf").read_bytes()) == 2
+    assert sorted(p.name for p in out.iterdir()) == [batch.SUMMARY_FILENAME, "team.pdf"]
+
+
+def test_failed_report_leaves_no_trace_on_the_next_page(tmp_path, report_inputs, monkeypatch):
+    athlete_df, ref_data = report_inputs
+    # Identical content gives identical bytes
+    monkeypatch.setattr(rl_config, "invariant", 1)
+    build_composite_chart = FD_PDF_V1.build_composite_chart
+    current = []
+
+    def build_or_fail(*args, **kwargs):
+        # The last step before drawing starts
+        if current[-1] == "Bo Diaz":
+            raise RuntimeError("composite chart failed")
+        return build_composite_chart(*args, **kwargs)
+
+    monkeypatch.setattr(FD_PDF_V1, "build_composite_chart", build_or_fail)
+
+    def packet(path, names):
+        with ReportDocument(path, chart_backend="vector") as document:
+            for name in names:
+                current.append(name)
+                try:
+                    document.add_report(name, date(2025, 1, 1), athlete_df, ref_data)
+                except RuntimeError:
+                    pass
+        return path.read_bytes()
+
+    with_failure = packet(tmp_path / "with_failure.pdf", ["Ann Lee", "Bo Diaz", "Cy Park"])
+    without = packet(tmp_path / "without.pdf", ["Ann Lee", "Cy Park"])
+
+    assert _page_count(with_failure) == 2
+    assert with_failure == without
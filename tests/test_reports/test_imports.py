@@ -0,0 +1,30 @@
+import os
+import subprocess
+import sys
+
+
+def _run(code, **env):
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True,
+        env={**os.environ, **env},
+    )
+    return result.stdout
+
+
+def test_report_module_does_not_import_heavy_dependencies():
+    out = _run(
+        "import sys\n"
+        "import nevald_report_gen.reports.FD_PDF_V1\n"
+        "print(sorted(m for m in ('scipy', 'matplotlib', 'google.cloud.bigquery') if m in sys.modules))\n"
+    )
+    assert out.strip() == "[]"
+
+
+def test_config_import_has_no_side_effects(tmp_path):
+    output_dir = tmp_path / "csv"
+    pdf_dir = tmp_path / "pdf"
+    out = _run("import nevald_report_gen.config", OUTPUT_DIR=str(output_dir), PDF_OUTPUT_DIR=str(pdf_dir))
+
+    assert out == ""
+    assert not output_dir.exists()
+    assert not pdf_dir.exists()
@@ -0,0 +1,71 @@
+import json
+import subprocess
+import sys
+import textwrap
+
+import pytest
+
+resource = pytest.importorskip("resource")
+
+# Runs in a fresh interpreter so ru_maxrss reflects only report generation
+_SCRIPT = textwrap.dedent(
+    """
+    import datetime, io, json, resource, sys
+
+    import numpy as np
+    import pandas as pd
+    from PIL import Image
+
+    import nevald_report_gen.reports.FD_PDF_V1 as pdf
+
+    logo = io.BytesIO()
+    Image.new("RGB", (144, 36), "white").save(logo, format="PNG")
+    logo_path = sys.argv[1] + "/logo.png"
+    with open(logo_path, "wb") as fh:
+        fh.write(logo.getvalue())
+    pdf.LOGO_PATH = logo_path
+
+    rng = np.random.default_rng(0)
+    columns = {
+        "cmj": ["BODY_WEIGHT_LBS_Trial_lb", "PEAK_TAKEOFF_POWER_Trial_W", "CONCENTRIC_IMPULSE_Trial_Ns",
+                "ECCENTRIC_BRAKING_RFD_Trial_N_s", "BODYMASS_RELATIVE_TAKEOFF_POWER_Trial_W_kg"],
+        "ppu": ["PEAK_CONCENTRIC_FORCE_Trial_N", "ECCENTRIC_BRAKING_RFD_Trial_N_s_"],
+        "imtp": ["PEAK_VERTICAL_FORCE_Trial_N"],
+        "hj": ["hop_rsi_avg_best_5"],
+    }
+    ref_data = {t: pd.DataFrame({c: rng.normal(1000, 150, 200) for c in cols}) for t, cols in columns.items()}
+    metrics = [
+        "CMJ_BODY_WEIGHT_LBS_Trial_lb", "CMJ_PEAK_TAKEOFF_POWER_Trial_W", "CMJ_CONCENTRIC_IMPULSE_Trial_Ns",
+        "CMJ_ECCENTRIC_BRAKING_RFD_Trial_N/s", "CMJ_BODYMASS_RELATIVE_TAKEOFF_POWER_Trial_W/kg",
+        "PPU_PEAK_CONCENTRIC_FORCE_Trial_N", "PPU_ECCENTRIC_BRAKING_RFD_Trial_N/s",
+        "IMTP_PEAK_VERTICAL_FORCE_Trial_N", "HJ_AVJ_RSI_Trial_",
+    ]
+
+    def render(n):
+        for i in range(n):
+            athlete_df = pd.DataFrame({"metric_id": metrics, "Value": rng.normal(1000, 200, len(metrics))})
+            pdf.generate_athlete_pdf(f"Athlete {i}", datetime.date(2025, 1, 1), sys.argv[1] + "/report.pdf",
+                                     athlete_df, ref_data)
+
+    render(int(sys.argv[2]))
+    warm = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    render(int(sys.argv[3]))
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    scale = 1 if sys.platform == "darwin" else 1024  # bytes on macOS, KiB elsewhere
+    print(json.dumps({"warm": warm * scale, "peak": peak * scale}))
+    """
+)
+
+
+def test_peak_rss_stays_flat_across_reports(tmp_path):
+    result = subprocess.run(
+        [sys.executable, "-c", _SCRIPT, str(tmp_path), "20", "200"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    rss = json.loads(result.stdout.strip().splitlines()[-1])
+
+    # A leaked 8x8 in figure costs several MB, so 200 leaks would add hundreds
+    growth_mb = (rss["peak"] - rss["warm"]) / 2**20
+    assert growth_mb < 20, f"peak RSS grew by {growth_mb:.1f} MB over 200 reports"
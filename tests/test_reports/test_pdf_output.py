@@ -0,0 +1,30 @@
+import io
+from datetime import date
+
+from nevald_report_gen.reports.document import ReportDocument
+from nevald_report_gen.reports.FD_PDF_V1 import generate_athlete_pdf, render_athlete_pdf
+
+
+def test_render_returns_pdf_bytes_without_touching_disk(tmp_path, report_inputs, monkeypatch):
+    athlete_df, ref_data = report_inputs
+    monkeypatch.chdir(tmp_path)
+    before = set(tmp_path.iterdir())
+
+    pdf = render_athlete_pdf("Jane Doe", date(2025, 1, 1), athlete_df, ref_data, chart_backend="vector")
+
+    assert pdf.startswith(b"%PDF") and pdf.rstrip().endswith(b"%%EOF")
+    assert set(tmp_path.iterdir()) == before
+
+
+def test_reports_write_into_caller_streams(report_inputs):
+    athlete_df, ref_data = report_inputs
+
+    single = io.BytesIO()
+    assert generate_athlete_pdf("Jane Doe", date(2025, 1, 1), single, athlete_df, ref_data) is single
+    assert single.getvalue().startswith(b"%PDF")
+
+    packet = io.BytesIO()
+    with ReportDocument(packet) as document:
+        document.add_report("Jane Doe", date(2025, 1, 1), athlete_df, ref_data)
+    assert packet.getvalue().startswith(b"%PDF")
+    assert not packet.closed
@@ -0,0 +1,42 @@
+import io
+import math
+from datetime import date
+
+import pytest
+from reportlab.pdfgen import canvas
+
+from nevald_report_gen.reports.FD_PDF_V1 import generate_athlete_pdf
+from nevald_report_gen.reports.vector_charts import composite_chart_drawing, draw_drawing, spider_chart_drawing
+
+
+def _render(tmp_path, report_inputs, backend):
+    athlete_df, ref_data = report_inputs
+    out = tmp_path / f"{backend}.pdf"
+    generate_athlete_pdf("Jane Doe", date(2025, 1, 1), out, athlete_df, ref_data, chart_backend=backend)
+    return out.read_bytes()
+
+
+def test_vector_backend_embeds_no_chart_images(tmp_path, report_inputs):
+    png = _render(tmp_path, report_inputs, "png")
+    vector = _render(tmp_path, report_inputs, "vector")
+
+    # The logo is the only raster image left in the vector report; PNG charts
+    # each add an image plus its alpha mask
+    assert png.count(b"/Subtype /Image") == 5
+    assert vector.count(b"/Subtype /Image") == 1
+    assert len(vector) < len(png)
+
+
+def test_unknown_chart_backend_is_rejected(tmp_path, report_inputs):
+    with pytest.raises(ValueError, match="chart backend"):
+        _render(tmp_path, report_inputs, "svg")
+
+
+def test_nan_percentiles_and_scores_render():
+    c = canvas.Canvas(io.BytesIO())
+    spider = spider_chart_drawing([50, math.nan, 20, 80, 10, 60], list("ABCDEF"), (200, 200))
+    draw_drawing(c, spider, 0, 0)
+    draw_drawing(c, composite_chart_drawing(math.nan, (100, 100)), 0, 0)
+
+    centre = [s for s in spider.contents if type(s).__name__ == "Circle"][1]
+    assert (centre.cx, centre.cy) == (100, 100)
@@ -0,0 +1,297 @@
+import asyncio
+import json
+import threading
+from datetime import timedelta
+
+import pytest
+
+from nevald_report_gen import spans
+from nevald_report_gen.api import vald_client
+from nevald_report_gen.api.metric_vars import METRICS_OF_INTEREST, unit_map
+from nevald_report_gen.api.vald_client import ValdClient
+from nevald_report_gen.service import Coalescer, ReportService
+
+# Long unit names as sent by the API, keyed by the short names in metric ids
+_UNITS = {unit_map(u): u for u in ["Centimeter", "Millisecond", "Newton", "Newton Per Kilo", "Newton Per Second",
+                                   "Newton Second", "Watt", "Watt Per Kilo", "Pound", "RSIModified", "No Unit"]}
+
+
+def _trials(test_type, n_trials=6):
+    """Trial payload containing every metric of interest for ``test_type``."""
+    trials = []
+    for t in range(n_trials):
+        results = []
+        for i, metric in enumerate(METRICS_OF_INTEREST[test_type]):
+            limb = "Asym" if "_Asym_" in metric else "Trial"
+            result, unit = metric.split(f"_{limb}_")
+            results.append({"value": 100.0 + 10 * i + t, "limb": limb,
+                            "definition": {"result": result, "unit": _UNITS[unit]}})
+        trials.append({"results": results})
+    return trials
+
+
+class FakeVald:
+    """Stand-in for the VALD endpoints, answering ``session.request`` calls."""
+
+    def __init__(self):
+        self.calls = []
+        self.hold_trials = threading.Event()
+        self.hold_trials.set()
+        self.lock = threading.Lock()
+        # Days in September 2025 with an uploaded session
+        self.days = [1, 8]
+
+    def request(self, method, url, **kwargs):
+        with self.lock:
+            self.calls.append(url)
+        if "/profiles" in url:
+            return _Response({"profiles": [
+                {"givenName": " ace", "familyName": "KELLY ", "profileId": "p1"},
+                {"givenName": "Lucas", "familyName": "Hall", "profileId": "p2"},
+            ]})
+        if "/trials" in url:
+            self.hold_trials.wait(10)
+            test_type = url.split("/tests/")[1].split("-")[0]
+            return _Response(_trials(test_type))
+        if "/tests?" in url:
+            if "ProfileId=p1" not in url:
+                return _Response(None, status_code=204)
+            return _Response({"tests": [
+                {"testId": f"{t}-{day}", "profileId": "p1", "testType": t,
+                 "modifiedDateUtc": f"2025-09-{day:02d}T15:00:00.000Z"}
+                for day in self.days for t in ("CMJ", "HJ", "IMTP", "PPU")
+            ]})
+        raise AssertionError(f"Unexpected request: {url}")
+
+    def count(self, fragment):
+        return sum(fragment in url for url in self.calls)
+
+
+class _Response:
+    def __init__(self, payload, status_code=200):
+        self._payload = payload
+        self.status_code = status_code
+        self.headers = {}
+
+    @property
+    def content(self):
+        return b"" if self._payload is None else json.dumps(self._payload).encode()
+
+    def json(self):
+        return self._payload
+
+    def raise_for_status(self):
+        pass
+
+
+@pytest.fixture
+def fake_vald():
+    return FakeVald()
+
+
+@pytest.fixture
+def make_service(monkeypatch, fake_vald, report_inputs):
+    monkeypatch.setattr(vald_client, "get_vald_token", lambda: "test-token")
+    _, ref_data = report_inputs
+    reference_calls = []
+
+    def reference(min_age, max_age):
+        reference_calls.append((min_age, max_age))
+        return ref_data
+
+    def factory(test_list_ttl=None, **kwargs):
+        client = ValdClient(rate_limit_per_sec=1000, burst=100, use_trial_cache=False, use_session_index=False,
+                            test_list_ttl=test_list_ttl)
+        client.session.request = fake_vald.request
+        svc = ReportService(client=client, reference=reference, **kwargs)
+        svc.reference_calls = reference_calls
+        return svc
+
+    return factory
+
+
+async def _get(port, path):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+    await writer.drain()
+    raw = await reader.read()
+    writer.close()
+    head, body = raw.split(b"\r\n\r\n", 1)
+    lines = head.decode().split("\r\n")
+    headers = dict(line.split(": ", 1) for line in lines[1:])
+    assert int(headers["Content-Length"]) == len(body)
+    return int(lines[0].split()[1]), headers["Content-Type"], body
+
+
+def _serve(svc, scenario):
+    """Run ``scenario(port)`` against ``svc`` listening on a free port."""
+    async def main():
+        server = await svc.start("127.0.0.1", 0)
+        try:
+            return await asyncio.wait_for(scenario(server.sockets[0].getsockname()[1]), 30)
+        finally:
+            server.close()
+            await server.wait_closed()
+
+    try:
+        return asyncio.run(main())
+    finally:
+        svc.close()
+
+
+def test_athlete_search_and_dates(make_service):
+    async def scenario(port):
+        return (await _get(port, "/athletes?q=kel"), await _get(port, "/athletes/p1/dates"),
+                await _get(port, "/athletes/p2/dates"))
+
+    athletes, dates, no_dates = _serve(make_service(), scenario)
+
+    assert athletes[0] == 200
+    assert json.loads(athletes[2]) == [{"name": "Ace Kelly", "profileId": "p1"}]
+    assert json.loads(dates[2]) == ["2025-09-08", "2025-09-01"]
+    assert json.loads(no_dates[2]) == []
+
+
+def test_sessions_uploaded_while_running_are_found(make_service, fake_vald):
+    svc = make_service(test_list_ttl=timedelta(0))
+
+    async def scenario(port):
+        before = await _get(port, "/athletes/p1/dates")
+        fake_vald.days.append(15)
+        after = await _get(port, "/athletes/p1/dates")
+        report = await _get(port, "/report?athlete=Ace%20Kelly&date=2025-09-15&band=college")
+        return before, after, report
+
+    before, after, report = _serve(svc, scenario)
+
+    assert json.loads(before[2]) == ["2025-09-08", "2025-09-01"]
+    assert json.loads(after[2]) == ["2025-09-15", "2025-09-08", "2025-09-01"]
+    assert report[0] == 200
+
+
+def test_identical_report_requests_share_one_build(make_service, fake_vald):
+    svc = make_service()
+    fake_vald.hold_trials.clear()
+    path = "/report?athlete=ace%20kelly&date=2025-09-08&band=college"
+
+    async def scenario(port):
+        requests = [asyncio.ensure_future(_get(port, path)) for _ in range(3)]
+        other = asyncio.ensure_future(_get(port, path.replace("college", "pro")))
+        while svc.coalescer.coalesced < 2:
+            await asyncio.sleep(0.01)
+        fake_vald.hold_trials.set()
+        return await asyncio.gather(*requests), await other
+
+    responses, other = _serve(svc, scenario)
+
+    assert [status for status, _, _ in responses] == [200, 200, 200]
+    assert responses[0][1] == "application/pdf"
+    assert responses[0][2].startswith(b"%PDF")
+    assert responses[0][2] == responses[1][2] == responses[2][2]
+    assert other[0] == 200
+    # One build per band; each build fetched the session's four tests once
+    assert svc.reports_built == 2
+    assert fake_vald.count("/trials") == 8
+    assert fake_vald.count("/profiles") == 1
+    assert svc.reference_calls == [(18, 22), (21, 35)]
+
+
+def test_reference_data_is_reused_between_reports(make_service):
+    svc = make_service()
+    path = "/report?athlete=Ace Kelly&date=2025-09-01&min_age=18&max_age=22&chart_backend=vector"
+
+    async def scenario(port):
+        return [await _get(port, path.replace(" ", "%20")) for _ in range(2)]
+
+    responses = _serve(svc, scenario)
+
+    assert [status for status, _, _ in responses] == [200, 200]
+    assert svc.reports_built == 2
+    assert svc.reference_calls == [(18, 22)]
+
+
+@pytest.mark.parametrize("path, status", [
+    ("/report?athlete=Ace%20Kelly&date=2025-09-02&band=college", 404),
+    ("/report?athlete=Nobody&date=2025-09-08&band=college", 404),
+    ("/report?athlete=Ace%20Kelly&date=09/08/2025&band=college", 400),
+    ("/report?athlete=Ace%20Kelly&date=2025-09-08&band=masters", 400),
+    ("/report?athlete=Ace%20Kelly&date=2025-09-08&min_age=18", 400),
+    ("/report?athlete=Ace%20Kelly&date=2025-09-08&band=hs&chart_backend=svg", 400),
+    ("/nowhere", 404),
+])
+def test_bad_requests_are_answered_with_errors(make_service, path, status):
+    async def scenario(port):
+        return await _get(port, path)
+
+    answered, content_type, body = _serve(make_service(), scenario)
+
+    assert answered == status
+    assert content_type == "application/json"
+    assert "error" in json.loads(body)
+
+
+def test_failed_build_is_shared_and_not_kept():
+    calls = []
+    release = None
+
+    async def build():
+        calls.append(1)
+        await release.wait()
+        raise RuntimeError("boom")
+
+    async def main():
+        nonlocal release
+        release = asyncio.Event()
+        coalescer = Coalescer()
+        waiters = [asyncio.ensure_future(coalescer.run("k", build)) for _ in range(2)]
+        await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(*waiters, return_exceptions=True)
+        assert len(coalescer) == 0
+        release.clear()
+        release.set()
+        with pytest.raises(RuntimeError):
+            await coalescer.run("k", build)
+        return results
+
+    results = asyncio.run(main())
+
+    assert [type(r) for r in results] == [RuntimeError, RuntimeError]
+    assert len(calls) == 2
+
+
+def test_health(make_service):
+    async def scenario(port):
+        return await _get(port, "/health")
+
+    status, _, body = _serve(make_service(), scenario)
+
+    assert status == 200
+    assert json.loads(body)["status"] == "ok"
+
+
+def test_metrics_report_stage_timings(make_service):
+    svc = make_service(recorder=spans.Recorder(max_spans=0))
+    path = "/report?athlete=ace%20kelly&date=2025-09-08&band=college&chart_backend=vector"
+
+    async def scenario(port):
+        await _get(port, path)
+        return await _get(port, "/metrics")
+
+    status, content_type, body = _serve(svc, scenario)
+    text = body.decode()
+
+    assert status == 200
+    assert content_type.startswith("text/plain")
+    assert 'nevald_stage_duration_seconds_count{stage="vald.trials"} 4' in text
+    assert 'nevald_stage_cache_misses_total{stage="vald.trials"} 4' in text
+    assert 'nevald_stage_duration_seconds_count{stage="report.save"} 1' in text
+    assert "nevald_service_reports_built_total 1" in text
+    assert spans.get_recorder() is None
+
+
+def test_metrics_are_off_without_a_recorder(make_service):
+    async def scenario(port):
+        return await _get(port, "/metrics")
+
+    assert _serve(make_service(), scenario)[0] == 404
@@ -0,0 +1,107 @@
+import io
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from nevald_report_gen import spans
+from nevald_report_gen.api import vald_client
+from nevald_report_gen.api.response_cache import TrialCache
+
+
+def test_disabled_spans_are_shared_noops():
+    assert spans.get_recorder() is None
+    with spans.span("anything", table="cmj") as stage:
+        stage.set(cache_hit=True).add(bytes=10)
+    assert stage is spans.NOOP_SPAN
+    assert spans.current() is spans.NOOP_SPAN
+
+
+def test_spans_nest_and_aggregate():
+    with spans.recording() as recorder:
+        with spans.span("outer") as outer:
+            for hit in (False, True):
+                with spans.span("inner", cache_hit=hit):
+                    spans.current().add(bytes=100, requests=1).add(bytes=50)
+        with pytest.raises(ValueError):
+            with spans.span("inner"):
+                raise ValueError("boom")
+    assert spans.get_recorder() is None
+
+    records = recorder.spans()
+    assert [r["name"] for r in records] == ["inner", "inner", "outer", "inner"]
+    assert [r["parent"] for r in records] == [outer.span_id, outer.span_id, None, None]
+    assert records[0]["bytes"] == 150 and records[0]["requests"] == 1
+    assert records[3]["error"] == "ValueError"
+
+    inner = recorder.stats()["inner"]
+    assert (inner["count"], inner["bytes"], inner["cache_hits"], inner["cache_misses"], inner["errors"]) == (3, 300, 1, 1, 1)
+    assert inner["total_s"] >= inner["max_s"] > 0
+
+
+def test_bound_calls_keep_their_parent_in_worker_threads():
+    with spans.recording() as recorder:
+        with spans.span("session") as session:
+            def fetch(i):
+                with spans.span("fetch", i=i):
+                    pass
+            with ThreadPoolExecutor(max_workers=4) as pool:
+                list(pool.map(lambda call: call(), [spans.bind(fetch, i) for i in range(8)]))
+
+    fetches = [r for r in recorder.spans() if r["name"] == "fetch"]
+    assert sorted(r["i"] for r in fetches) == list(range(8))
+    assert {r["parent"] for r in fetches} == {session.span_id}
+
+
+def test_recorder_keeps_totals_beyond_max_spans():
+    with spans.recording(spans.Recorder(max_spans=2)) as recorder:
+        for _ in range(5):
+            with spans.span("stage"):
+                pass
+
+    assert len(recorder.spans()) == 2
+    assert recorder.stats()["stage"]["count"] == 5
+
+
+def test_exports():
+    with spans.recording() as recorder:
+        with spans.span('vald "trials"', cache_hit=False) as stage:
+            stage.add(bytes=2048)
+
+    out = io.StringIO()
+    recorder.write_jsonl(out)
+    (record,) = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert record["name"] == 'vald "trials"'
+    assert record["bytes"] == 2048
+
+    text = recorder.prometheus()
+    assert "# TYPE nevald_stage_duration_seconds summary" in text
+    assert 'nevald_stage_duration_seconds_count{stage="vald \\"trials\\""} 1' in text
+    assert 'nevald_stage_bytes_total{stage="vald \\"trials\\""} 2048' in text
+    assert 'nevald_stage_cache_misses_total{stage="vald \\"trials\\""} 1' in text
+
+
+def test_trial_downloads_record_bytes_and_cache_hits(monkeypatch, tmp_path):
+    monkeypatch.setattr(vald_client, "get_vald_token", lambda: "test-token")
+    client = vald_client.ValdClient(rate_limit_per_sec=1000, trial_cache=TrialCache(tmp_path / "trials.sqlite"),
+                                    use_session_index=False)
+    payload = json.dumps([{"results": [{"value": 1.0, "limb": "Trial",
+                                        "definition": {"result": "JUMP_HEIGHT", "unit": "Centimeter"}}]}]).encode()
+
+    class Response:
+        status_code = 200
+        headers = {}
+        content = payload
+
+        def raise_for_status(self):
+            pass
+
+    client.session.request = lambda method, url, **kwargs: Response()
+
+    with spans.recording() as recorder:
+        client.get_fd_results("t1", "CMJ")
+        client.get_fd_results("t1", "CMJ")
+
+    first, second = recorder.spans()
+    assert (first["cache_hit"], first["requests"], first["bytes"]) == (False, 1, len(payload))
+    assert second["cache_hit"] is True and "bytes" not in second